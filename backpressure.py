@@ -0,0 +1,122 @@
+"""Bounded work between stream read loops and their handlers.
+
+A read loop that awaits every handler inline serialises all of them,
+including their I/O and think time. A read loop that hands work off without
+a limit lets a burst grow memory without bound. The two helpers here sit
+in between:
+
+- ``HighWaterMark`` tracks how much work a component holds. Once the level
+  reaches ``high``, the read loop pauses before its next XREADGROUP until the
+  level falls back to ``low``. Unread entries stay in the stream, where they
+  cost no process memory. The level is exported as
+  ``pubsub_queue_depth{component,queue}`` and each pause is counted in
+  ``pubsub_read_pauses_total``.
+- ``WorkQueue`` is a bounded queue drained by ``concurrency`` handler tasks,
+  with a ``HighWaterMark`` over the queued plus in-flight items.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+from logs import get_logger
+from metrics import QUEUE_DEPTH, READ_PAUSES
+
+# Pauses come and go with the load, so they are logged (and sampled) like per-message events
+log = get_logger('backpressure')
+transition_log = get_logger('backpressure', per_message=True)
+
+
+class HighWaterMark:
+    """Pauses a read loop while the level is at or above ``high`` until it drops to ``low``"""
+
+    def __init__(self, component: str, queue: str, high: int, low: int = None):
+        self.name = f"{component} {queue}"
+        self.high = high  # 0 = unbounded
+        self.low = high // 2 if low is None else low
+        self.level = 0
+        self.depth = QUEUE_DEPTH.labels(component=component, queue=queue)
+        self.pauses = READ_PAUSES.labels(component=component, queue=queue)
+        self.open = asyncio.Event()
+        self.open.set()
+
+    @property
+    def room(self) -> Optional[int]:
+        """How much more work fits below ``high`` (None when unbounded)"""
+        return max(self.high - self.level, 0) if self.high else None
+
+    def update(self, level: int):
+        self.level = level
+        self.depth.set(level)
+        if self.high and level >= self.high and self.open.is_set():
+            self.open.clear()
+            self.pauses.inc()
+            transition_log.info("⏸️ %s at its high-water mark (%d); pausing reads until it drops to %d",
+                                self.name, self.high, self.low)
+        elif not self.open.is_set() and level <= self.low:
+            self.open.set()
+            transition_log.info("▶️ %s down to %d; resuming reads", self.name, level)
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait until reading may go on; False if ``timeout`` passed first"""
+        if self.open.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.open.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class WorkQueue:
+    """A bounded queue of items handled by ``concurrency`` tasks"""
+
+    def __init__(self, component: str, name: str, handler: Callable[[object], Awaitable[None]],
+                 concurrency: int, size: int):
+        self.handler = handler
+        self.concurrency = max(concurrency, 1)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.in_flight = 0
+        self.mark = HighWaterMark(component, name, size)
+        self.workers: List[asyncio.Task] = []
+
+    @property
+    def room(self) -> Optional[int]:
+        return self.mark.room
+
+    def start(self):
+        self.workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def put(self, item):
+        await self.queue.put(item)
+        self._update()
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait while the queue is at its high-water mark; False if ``timeout`` passed first"""
+        return await self.mark.wait(timeout)
+
+    def _update(self):
+        self.mark.update(self.queue.qsize() + self.in_flight)
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            self.in_flight += 1
+            self._update()
+            try:
+                await self.handler(item)
+            except Exception as e:
+                log.error("❌ Error handling queued work: %s", e)
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+                self._update()
+
+    async def drain(self):
+        """Let the handlers finish every queued item, then stop them"""
+        await self.queue.join()
+        self.stop()
+
+    def stop(self):
+        """Cancel the handlers, dropping whatever is still queued"""
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
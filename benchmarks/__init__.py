@@ -0,0 +1,4 @@
+"""Benchmarks for the Pub/Sub event planning system.
+
+Run from the repository root, e.g. ``python -m benchmarks.listener_latency``.
+"""
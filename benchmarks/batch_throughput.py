@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Consumer throughput at different XREADGROUP batch sizes.
+
+A burst of RSVP-sized messages is written to a scratch stream, then drained
+by a consumer that reads ``batch`` entries per XREADGROUP and acknowledges
+each batch with one multi-ID XACK. The ``--per-message-ack`` flag restores
+the old one-XACK-per-message behaviour for comparison.
+"""
+
+import argparse
+import asyncio
+import time
+from redis_client import RedisClient
+
+STREAM = 'bench:batch_throughput'
+GROUP = 'bench_consumers'
+
+SAMPLE_RESPONSE = {
+    'id': 'a3f5c2e0-0000-4000-8000-000000000000',
+    'invitation_id': 'b7e1d4c9-0000-4000-8000-000000000000',
+    'guest_name': 'Alice Chen',
+    'guest_id': 'guest_1',
+    'response': 'yes',
+    'message': 'Looking forward to it!',
+    'timestamp': '2025-02-15T14:00:00',
+}
+
+
+async def fill_stream(client: RedisClient, messages: int):
+    await client.redis.delete(STREAM)
+    await client.redis.xgroup_create(STREAM, GROUP, '0', mkstream=True)
+    pipe = client.redis.pipeline(transaction=False)
+    for index in range(messages):
+        pipe.xadd(STREAM, SAMPLE_RESPONSE)
+        if index % 1000 == 999:
+            await pipe.execute()
+    await pipe.execute()
+
+
+async def drain(client: RedisClient, messages: int, batch: int, per_message_ack: bool) -> float:
+    consumed = 0
+    started = time.perf_counter()
+    while consumed < messages:
+        result = await client.redis.xreadgroup(GROUP, 'bench', {STREAM: '>'}, count=batch, block=100)
+        for _, stream_messages in result:
+            message_ids = [message_id for message_id, _ in stream_messages]
+            if per_message_ack:
+                for message_id in message_ids:
+                    await client.redis.xack(STREAM, GROUP, message_id)
+            else:
+                await client.redis.xack(STREAM, GROUP, *message_ids)
+            consumed += len(message_ids)
+    return time.perf_counter() - started
+
+
+async def run(messages: int, batch_sizes: list, per_message_ack: bool):
+    client = RedisClient()
+    print(f"📊 Draining {messages} messages ({'per-message' if per_message_ack else 'batched'} XACK)")
+    for batch in batch_sizes:
+        await fill_stream(client, messages)
+        elapsed = await drain(client, messages, batch, per_message_ack)
+        print(f"   batch={batch:>5}: {messages / elapsed:>10.0f} msgs/s ({elapsed:.2f}s)")
+    await client.redis.delete(STREAM)
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--per-message-ack', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.batch_sizes, args.per_message_ack))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""Wire size and encode/decode cost of each codec for the three models.
+
+Pure CPU benchmark, no Redis needed. Bytes per message count field names
+plus values, which is what a stream entry stores. Besides the codec itself,
+the ``xadd`` column adds building the XADD command and the ``read`` column
+adds parsing the entry out of an XREADGROUP reply, both with redis-py's own
+(pure-Python) serializer and RESP parser: that work grows with the number of
+fields, so it is where the single-field packed format saves time.
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+import uuid
+from datetime import datetime
+from redis.connection import Connection
+from redis._parsers import _AsyncRESP2Parser
+from redis._parsers.encoders import Encoder
+from models import CODECS, EventInvitation, GuestResponse, EventSummary
+
+
+def sample_response(index: int = 0) -> GuestResponse:
+    return GuestResponse(
+        id=str(uuid.uuid4()), invitation_id=str(uuid.uuid4()), guest_name=f"Guest {index}",
+        guest_id=f"guest_{index}", response='maybe', message="I'll confirm closer to the date.",
+        timestamp=datetime.now()
+    )
+
+
+def samples(summary_responses: int):
+    invitation = EventInvitation(
+        id=str(uuid.uuid4()), event_name="Team Building Workshop", event_date="2025-02-15",
+        event_time="14:00", location="Conference Room A",
+        description="Join us for an engaging team building session with fun activities and networking opportunities!",
+        host_name="Sarah Johnson", host_id=str(uuid.uuid4()), timestamp=datetime.now()
+    )
+    responses = [sample_response(index) for index in range(summary_responses)]
+    summary = EventSummary(
+        id=str(uuid.uuid4()), invitation_id=invitation.id, host_id=invitation.host_id,
+        total_invited=len(responses), total_responses=len(responses), yes_count=0, no_count=0,
+        maybe_count=len(responses), responses=responses, timestamp=datetime.now()
+    )
+    return [invitation, responses[0] if responses else sample_response(), summary]
+
+
+def wire_bytes(data: dict) -> int:
+    return sum(len(str(key).encode()) + len(str(value).encode()) for key, value in data.items())
+
+
+def _bulk(value) -> bytes:
+    data = str(value).encode()
+    return b'$%d\r\n%s\r\n' % (len(data), data)
+
+
+def entry_reply(data: dict) -> bytes:
+    """One stream entry as Redis sends it: [id, [field, value, ...]]"""
+    items = [item for pair in data.items() for item in pair]
+    return b'*2\r\n' + _bulk('1-0') + b'*%d\r\n' % len(items) + b''.join(_bulk(item) for item in items)
+
+
+async def _parse(reply: bytes, number: int) -> float:
+    reader = asyncio.StreamReader()
+    reader.feed_data(reply * number)
+    reader.feed_eof()
+    parser = _AsyncRESP2Parser(65536)
+    parser._stream, parser.encoder, parser._connected = reader, Encoder('utf-8', 'strict', True), True
+    started = time.perf_counter()
+    for _ in range(number):
+        await parser.read_response()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--summary-responses', type=int, default=50,
+                        help='responses embedded in the sample EventSummary')
+    parser.add_argument('--number', type=int, default=5000, help='iterations per measurement')
+    args = parser.parse_args()
+
+    connection = Connection(decode_responses=True)
+
+    def xadd(model, codec):
+        data = model.to_redis_dict(codec)
+        return connection.pack_command('XADD', 'stream', '*', *[item for pair in data.items() for item in pair])
+
+    print(f"{'model':<16}{'codec':<8}{'bytes':>9}{'encode µs':>12}{'decode µs':>12}{'xadd µs':>10}{'read µs':>10}")
+    for model in samples(args.summary_responses):
+        cls = type(model)
+        for name, codec in CODECS.items():
+            encoded = model.to_redis_dict(codec)
+            encode = timeit.timeit(lambda: model.to_redis_dict(codec), number=args.number)
+            decode = timeit.timeit(lambda: cls.from_redis_dict(dict(encoded)), number=args.number)
+            command = timeit.timeit(lambda: xadd(model, codec), number=args.number)
+            trusted = timeit.timeit(lambda: cls.from_trusted_dict(dict(encoded)), number=args.number)
+            parse = asyncio.run(_parse(entry_reply(encoded), args.number))
+            print(f"{cls.__name__:<16}{name:<8}{wire_bytes(encoded):>9}"
+                  f"{encode / args.number * 1e6:>12.2f}{decode / args.number * 1e6:>12.2f}"
+                  f"{command / args.number * 1e6:>10.2f}{(parse + trusted) / args.number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
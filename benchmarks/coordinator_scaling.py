@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""Aggregate response throughput with 1..N coordinator workers.
+
+Starts N coordinator worker processes sharing the ``coordinators`` group,
+publishes a set of invitations, then replays five guest responses per
+invitation onto the reply streams named in the fan-out and times how long
+it takes until every summary has reached the host's summary stream.
+Needs a running redis-server (workers live in separate processes).
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from config import Config
+from coordinator import Coordinator
+from models import EventInvitation, GuestResponse
+from redis_client import RedisClient
+from routing import guest_stream, summary_stream
+
+HOST_ID = 'bench_scaling_host'
+GUEST_IDS = [f"guest_{index}" for index in range(1, 6)]
+
+
+def worker_main(index: int, count: int, ready):
+    sys.stdout = open(os.devnull, 'w')
+    asyncio.run(run_worker(index, count, ready))
+
+
+async def run_worker(index: int, count: int, ready):
+    coordinator = Coordinator(index, count)
+    await coordinator.start()
+    ready.set()
+    await asyncio.gather(coordinator.listen_for_invitations(), coordinator.listen_for_responses())
+
+
+async def reset(client: RedisClient):
+    await client.cleanup_streams()
+    async for key in client.redis.scan_iter(match=f"{Config.COORDINATOR_STATE_PREFIX}:*"):
+        await client.redis.delete(key)
+
+
+async def wait_for_length(client: RedisClient, stream: str, length: int, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while await client.redis.xlen(stream) < length:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"stream '{stream}' did not reach {length} entries")
+        await asyncio.sleep(0.01)
+
+
+async def drive(invitations: int, timeout: float) -> float:
+    client = RedisClient()
+
+    await client.publish_many(Config.INVITATION_STREAM, (
+        EventInvitation(
+            id=str(uuid.uuid4()), event_name=f"Event {index}", event_date="2025-02-15", event_time="14:00",
+            location="Conference Room A", description="Scaling benchmark", host_name="Bench Host",
+            host_id=HOST_ID, timestamp=datetime.now()
+        ).to_redis_dict()
+        for index in range(invitations)
+    ))
+    for guest_id in GUEST_IDS:
+        await wait_for_length(client, guest_stream(guest_id), invitations, timeout)
+
+    # Every guest answers on the reply stream of the worker that owns the invitation
+    reply_streams = {}
+    for _, fields in await client.redis.xrange(guest_stream(GUEST_IDS[0])):
+        reply_stream = fields.get('reply_stream') or Config.RESPONSE_STREAM
+        reply_streams[EventInvitation.from_redis_dict(fields).id] = reply_stream
+
+    responses = (
+        (reply_stream, GuestResponse(
+            id=str(uuid.uuid4()), invitation_id=invitation_id, guest_name=guest_id, guest_id=guest_id,
+            response='yes', message='See you there', timestamp=datetime.now()
+        ).to_redis_dict())
+        for invitation_id, reply_stream in reply_streams.items() for guest_id in GUEST_IDS
+    )
+
+    started = time.perf_counter()
+    await client.publish_batch(responses)
+    await wait_for_length(client, summary_stream(HOST_ID), invitations, timeout)
+    elapsed = time.perf_counter() - started
+    await client.close()
+    return elapsed
+
+
+async def prepare():
+    client = RedisClient()
+    await reset(client)
+    await client.close()
+
+
+def run(worker_count: int, invitations: int, timeout: float) -> float:
+    asyncio.run(prepare())
+
+    context = multiprocessing.get_context('spawn')
+    events = [context.Event() for _ in range(worker_count)]
+    workers = [context.Process(target=worker_main, args=(index, worker_count, events[index]), daemon=True)
+               for index in range(worker_count)]
+    for worker in workers:
+        worker.start()
+    try:
+        for event in events:
+            if not event.wait(timeout):
+                raise TimeoutError("coordinator worker did not start")
+        return asyncio.run(drive(invitations, timeout))
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--invitations', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=300.0)
+    args = parser.parse_args()
+
+    responses = args.invitations * len(GUEST_IDS)
+    print(f"📊 {args.invitations} invitations, {responses} responses per run")
+    baseline = None
+    for worker_count in args.workers:
+        elapsed = run(worker_count, args.invitations, args.timeout)
+        rate = responses / elapsed
+        baseline = baseline or rate
+        print(f"   workers={worker_count}: {rate:>9.0f} responses/s ({elapsed:.2f}s, {rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+"""Decode throughput per model: validated models vs the trusted fast path.
+
+For each model and codec, reports decode operations per second for:
+
+- "validated": ``from_redis_dict``, a pydantic model with parsed timestamps;
+- "trusted": ``from_trusted_dict``, a slotted view with the timestamp left
+  unparsed (and, for summaries, the embedded responses left undecoded);
+- "trusted+read": a view whose timestamp (and summary responses) are then
+  read, i.e. the cost when the lazy parts are used after all;
+- "forward": a view re-encoded with the same codec, which is what the
+  coordinator does with every invitation it fans out.
+
+Pure CPU benchmark, no Redis needed.
+"""
+
+import argparse
+import timeit
+from config import Config
+from models import CODECS
+from benchmarks.codec import samples
+
+
+def read_all(view):
+    view.timestamp
+    for response in getattr(view, 'responses', ()):
+        response.timestamp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--summary-responses', type=int, default=50,
+                        help='responses embedded in the sample EventSummary')
+    parser.add_argument('--number', type=int, default=20000, help='iterations per measurement')
+    args = parser.parse_args()
+    Config.VALIDATE_INTERNAL_MESSAGES = False
+
+    print(f"{'model':<16}{'codec':<8}{'validated':>12}{'trusted':>12}{'trusted+read':>14}{'forward':>12}{'speedup':>9}")
+    for model in samples(args.summary_responses):
+        cls = type(model)
+        number = max(args.number // max(args.summary_responses, 1), 100) if cls.__name__ == 'EventSummary' else args.number
+        for codec in CODECS.values():
+            encoded = model.to_redis_dict(codec)
+            timings = {
+                'validated': lambda: cls.from_redis_dict(dict(encoded)),
+                'trusted': lambda: cls.from_trusted_dict(encoded),
+                'trusted+read': lambda: read_all(cls.from_trusted_dict(encoded)),
+                'forward': lambda: cls.from_trusted_dict(encoded).to_redis_dict(codec),
+            }
+            rates = {name: number / timeit.timeit(run, number=number) for name, run in timings.items()}
+            print(f"{cls.__name__:<16}{codec.name:<8}" + ''.join(
+                f"{rates[name]:>{width}.0f}" for name, width in (('validated', 12), ('trusted', 12),
+                                                                  ('trusted+read', 14), ('forward', 12)))
+                  + f"{rates['trusted'] / rates['validated']:>8.1f}x")
+    print("(decode operations per second)")
+
+
+if __name__ == "__main__":
+    main()
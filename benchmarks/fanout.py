@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""Invitation fan-out time: one XADD per round trip vs chunked pipelines.
+
+Builds a synthetic guest list and forwards one invitation to every guest,
+first with a plain XADD per recipient (the old ``process_invitation`` loop),
+then with ``RedisClient.publish_many``.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from redis_client import RedisClient
+from models import EventInvitation
+
+STREAM = 'bench:fanout'
+
+
+def sample_invitation(description_bytes: int) -> EventInvitation:
+    return EventInvitation(
+        id=str(uuid.uuid4()),
+        event_name="Team Building Workshop",
+        event_date="2025-02-15",
+        event_time="14:00",
+        location="Conference Room A",
+        description="x" * description_bytes,
+        host_name="Sarah Johnson",
+        host_id="host_1",
+        timestamp=datetime.now()
+    )
+
+
+def guest_messages(invitation: EventInvitation, guests: int):
+    invitation_data = invitation.to_redis_dict()
+    for index in range(guests):
+        yield {**invitation_data, 'target_guest_id': f"guest_{index}", 'target_guest_name': f"Guest {index}"}
+
+
+async def per_message(client: RedisClient, invitation: EventInvitation, guests: int):
+    for data in guest_messages(invitation, guests):
+        await client.redis.xadd(STREAM, data)
+
+
+async def pipelined(client: RedisClient, invitation: EventInvitation, guests: int, chunk_size: int):
+    await client.publish_many(STREAM, guest_messages(invitation, guests), chunk_size=chunk_size)
+
+
+async def run(guest_counts: list, chunk_size: int, description_bytes: int, skip_baseline: bool):
+    client = RedisClient()
+    invitation = sample_invitation(description_bytes)
+    payload_bytes = sum(len(k) + len(str(v)) for k, v in next(guest_messages(invitation, 1)).items())
+    print(f"📊 Fan-out of one invitation (~{payload_bytes} bytes per entry, chunk size {chunk_size})")
+    for guests in guest_counts:
+        results = []
+        strategies = [('pipelined', lambda: pipelined(client, invitation, guests, chunk_size))]
+        if not skip_baseline:
+            strategies.insert(0, ('per-xadd', lambda: per_message(client, invitation, guests)))
+        for name, strategy in strategies:
+            await client.redis.delete(STREAM)
+            started = time.perf_counter()
+            await strategy()
+            elapsed = time.perf_counter() - started
+            results.append(f"{name}={elapsed:.3f}s ({guests / elapsed:.0f} guests/s)")
+        print(f"   guests={guests:>7}: " + "  ".join(results))
+    await client.redis.delete(STREAM)
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guests', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--description-bytes', type=int, default=100)
+    parser.add_argument('--skip-baseline', action='store_true', help='only run the pipelined strategy')
+    args = parser.parse_args()
+    asyncio.run(run(args.guests, args.chunk_size, args.description_bytes, args.skip_baseline))
+
+
+if __name__ == "__main__":
+    main()
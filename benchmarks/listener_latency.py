@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""Delivery latency with many listeners sharing one event loop.
+
+Compares the old pattern (synchronous ``redis.Redis`` called from inside
+``async def`` loops) with the asyncio ``RedisClient``. Each listener owns a
+stream; one message is published to every stream and the time from publish
+to receipt is recorded per listener.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import redis
+from redis_client import RedisClient
+from config import Config
+
+GROUP = 'bench_listeners'
+
+
+def stream_name(index: int) -> str:
+    return f"bench:listener:{index}"
+
+
+async def sync_listener(client: redis.Redis, index: int, latencies: list, block: int):
+    """The pre-asyncio pattern: a blocking XREADGROUP inside a coroutine"""
+    while True:
+        messages = client.xreadgroup(GROUP, f"c{index}", {stream_name(index): '>'}, count=1, block=block)
+        for _, stream_messages in messages:
+            for _, fields in stream_messages:
+                latencies.append(time.perf_counter() - float(fields['sent']))
+                return
+        await asyncio.sleep(0)
+
+
+async def async_listener(client: RedisClient, index: int, latencies: list, block: int):
+    while True:
+        messages = await client.redis.xreadgroup(GROUP, f"c{index}", {stream_name(index): '>'}, count=1, block=block)
+        for _, stream_messages in messages:
+            for _, fields in stream_messages:
+                latencies.append(time.perf_counter() - float(fields['sent']))
+                return
+
+
+async def run(mode: str, listeners: int, block: int) -> list:
+    setup = RedisClient()
+    for index in range(listeners):
+        await setup.redis.delete(stream_name(index))
+        await setup.redis.xgroup_create(stream_name(index), GROUP, '$', mkstream=True)
+
+    latencies = []
+    if mode == 'sync':
+        client = redis.Redis(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, decode_responses=True)
+        tasks = [asyncio.create_task(sync_listener(client, i, latencies, block)) for i in range(listeners)]
+    else:
+        client = RedisClient()
+        tasks = [asyncio.create_task(async_listener(client, i, latencies, block)) for i in range(listeners)]
+
+    # Let every listener issue its first XREADGROUP before publishing
+    await asyncio.sleep(0.2)
+    for index in range(listeners):
+        await setup.redis.xadd(stream_name(index), {'sent': repr(time.perf_counter())})
+
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=listeners * block / 1000 + 30)
+
+    for index in range(listeners):
+        await setup.redis.delete(stream_name(index))
+    await setup.close()
+    if mode == 'sync':
+        client.close()
+    else:
+        await client.close()
+    return latencies
+
+
+def report(mode: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{mode:>5}: listeners={len(latencies)} "
+          f"p50={statistics.median(latencies) * 1000:.1f}ms "
+          f"p95={p95 * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--listeners', type=int, default=20)
+    parser.add_argument('--block', type=int, default=1000, help='XREADGROUP block time in ms')
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        report(mode, asyncio.run(run(mode, args.listeners, args.block)))
+
+
+if __name__ == "__main__":
+    main()
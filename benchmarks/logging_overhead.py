@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""Per-message cost of the coordinator's response path with logging off, on, sampled and rate limited.
+
+Runs ``Coordinator.process_responses`` against the in-memory state store, so
+no Redis is needed. The "print" row replays the per-response print() calls
+the coordinator used to make, for comparison. The per-response records are
+DEBUG, so the default INFO level skips them; "logging on" and the sampled and
+rate-limited rows run at DEBUG. "loop" is the time spent on the
+event loop; "drained" also waits for the log thread to write everything out.
+Output goes to /dev/null by default, the best case for print(); pass
+``--output`` a file or terminal to include real write costs.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from config import Config
+from models import EventInvitation, GuestResponse
+import logs
+
+
+def make_invitation() -> EventInvitation:
+    return EventInvitation(
+        id=str(uuid.uuid4()), event_name="Team Building Workshop", event_date="2025-02-15",
+        event_time="14:00", location="Conference Room A", description="Benchmark event",
+        host_name="Sarah Johnson", host_id=str(uuid.uuid4()), timestamp=datetime.now()
+    )
+
+
+def make_responses(invitation_id: str, count: int):
+    return [
+        GuestResponse(
+            id=str(uuid.uuid4()), invitation_id=invitation_id, guest_name=f"Guest {index}",
+            guest_id=f"guest_{index}", response='yes', message="Count me in!", timestamp=datetime.now()
+        )
+        for index in range(count)
+    ]
+
+
+def print_response(response, result):
+    """The print() calls process_responses made per response before logs.py"""
+    status_emoji = {"yes": "✅", "no": "❌", "maybe": "❓"}.get(response.response, "❓")
+    print(f"\n📝 GUEST RESPONSE RECEIVED VIA REDIS")
+    print(f"{status_emoji} {response.guest_name}: {response.response.upper()}")
+    if response.message:
+        print(f"💬 Message: \"{response.message}\"")
+    print(f"📊 Responses collected: {result.responded}/{result.expected}")
+
+
+async def run_mode(coordinator, messages: int, batch: int, use_print: bool):
+    invitation = make_invitation()
+    await coordinator.state.add_invitation(invitation, messages + 1)  # never completes, so no summary
+    responses = make_responses(invitation.id, messages)
+
+    started = time.perf_counter()
+    for offset in range(0, messages, batch):
+        chunk = responses[offset:offset + batch]
+        if use_print:
+            results = await coordinator.state.record_responses(chunk)
+            for response, result in zip(chunk, results):
+                print_response(response, result)
+        else:
+            await coordinator.process_responses(chunk)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000, help='responses per mode')
+    parser.add_argument('--batch', type=int, default=100, help='responses per process_responses call')
+    parser.add_argument('--output', default=os.devnull, help='where log and print output goes')
+    args = parser.parse_args()
+
+    Config.COORDINATOR_STATE = 'memory'
+    from coordinator import Coordinator  # after the state override
+    coordinator = Coordinator()
+
+    modes = [
+        # (name, level, sample_every, rate_limit, use_print)
+        ('print', None, 1, 0, True),
+        ('logging off', 'WARNING', 1, 0, False),
+        ('default (INFO)', 'INFO', 1, 0, False),
+        ('logging on', 'DEBUG', 1, 0, False),
+        ('sampled 1/100', 'DEBUG', 100, 0, False),
+        ('rate 10/s', 'DEBUG', 1, 10, False),
+    ]
+
+    console = sys.stdout
+    print(f"{'mode':<16}{'loop µs/msg':>14}{'drained µs/msg':>17}")
+    with open(args.output, 'w', encoding='utf-8') as output:
+        for name, level, sample_every, rate_limit, use_print in modes:
+            logs.setup_logging(level or 'WARNING', stream=output, prefix='',
+                               sample_every=sample_every, rate_limit=rate_limit, force=True)
+            sys.stdout = output if use_print else console
+            try:
+                loop_seconds = asyncio.run(run_mode(coordinator, args.messages, args.batch, use_print))
+                started = time.perf_counter()
+                logs.flush_logging()
+                output.flush()
+                drained_seconds = loop_seconds + time.perf_counter() - started
+            finally:
+                sys.stdout = console
+            print(f"{name:<16}{loop_seconds / args.messages * 1e6:>14.2f}"
+                  f"{drained_seconds / args.messages * 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""Run many EventHost listeners in one process and check summary routing.
+
+Every host subscribes to its own summary partition. One summary per host is
+published the way the coordinator does it (to ``summary_stream(host_id)``);
+the run fails if any host receives a summary for another host or misses its
+own.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+from event_host import EventHost
+from models import EventSummary
+from redis_client import RedisClient
+from routing import summary_stream
+
+
+class RecordingHost(EventHost):
+    """EventHost that records summaries instead of printing them"""
+
+    def __init__(self, host_name: str, host_id: str):
+        super().__init__(host_name, host_id)
+        self.received = []
+
+    def process_summary(self, summary: EventSummary, status: str = 'complete'):
+        self.received.append(summary)
+
+
+def sample_summary(host_id: str) -> EventSummary:
+    return EventSummary(
+        id=str(uuid.uuid4()),
+        invitation_id=str(uuid.uuid4()),
+        host_id=host_id,
+        total_invited=0,
+        total_responses=0,
+        yes_count=0,
+        no_count=0,
+        maybe_count=0,
+        responses=[],
+        timestamp=datetime.now()
+    )
+
+
+async def run(hosts_count: int, timeout: float) -> bool:
+    hosts = [RecordingHost(f"Host {index}", f"bench_host_{index}") for index in range(hosts_count)]
+    for host in hosts:
+        await host.start()
+    tasks = [asyncio.create_task(host.listen_for_summaries()) for host in hosts]
+
+    publisher = RedisClient()
+    started = time.perf_counter()
+    await publisher.publish_batch(
+        (summary_stream(host.host_id), sample_summary(host.host_id).to_redis_dict()) for host in hosts
+    )
+
+    deadline = started + timeout
+    while time.perf_counter() < deadline and not all(host.received for host in hosts):
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    for host in hosts:
+        host.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    missing = [host.host_id for host in hosts if not host.received]
+    misrouted = [host.host_id for host in hosts
+                 if any(summary.host_id != host.host_id for summary in host.received)]
+    print(f"📊 {hosts_count} hosts: all summaries delivered in {elapsed:.2f}s"
+          if not missing else f"📊 {hosts_count} hosts: {len(missing)} missed their summary")
+    if misrouted:
+        print(f"❌ {len(misrouted)} host(s) received another host's summary")
+
+    for host in hosts:
+        await publisher.redis.delete(host.summary_stream)
+        await host.close()
+    await publisher.close()
+    return not missing and not misrouted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.hosts, args.timeout)) else 1)
+
+
+if __name__ == "__main__":
+    main()
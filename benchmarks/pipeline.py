@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+"""End-to-end benchmark of the invitation → response → summary pipeline.
+
+Runs hosts, coordinator workers and guests in one event loop, publishes
+``hosts × events`` invitations and waits for every summary. Reports
+throughput, publish-to-summary latency percentiles and Redis round trips per
+event (single commands and pipeline executions on the shared client), and
+can write the results as JSON for comparing runs.
+
+``--backend redis`` uses the configured Redis server; ``--backend memory``
+(see memory_broker.py) and ``--backend fakeredis`` (needs the fakeredis and
+lupa packages) run fully in-process.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from config import Config
+from models import EventSummary
+
+
+class RoundTripCounter:
+    """Counts round trips on a Redis client: each command, and each pipeline execution once"""
+
+    def __init__(self, client):
+        self.count = 0
+        execute_command = client.execute_command
+        make_pipeline = client.pipeline
+
+        async def counted_execute_command(*args, **options):
+            self.count += 1
+            return await execute_command(*args, **options)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = make_pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*execute_args, **execute_kwargs):
+                self.count += 1
+                return await execute(*execute_args, **execute_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        client.execute_command = counted_execute_command
+        client.pipeline = counted_pipeline
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run(args) -> dict:
+    # Imported here so the backend and state settings above apply to every component
+    from coordinator import Coordinator
+    from event_guest import EventGuest
+    from event_host import EventHost
+    from guest_registry import Guest
+    from redis_client import RedisClient
+
+    class BenchHost(EventHost):
+        """EventHost that records when each summary arrives instead of printing it"""
+
+        def __init__(self, host_name: str, host_id: str, received: dict):
+            super().__init__(host_name, host_id)
+            self.received = received
+
+        def process_summary(self, summary: EventSummary, status: str = 'complete'):
+            self.received[summary.invitation_id] = time.perf_counter()
+
+    admin = RedisClient()
+    await admin.connect()
+    counter = RoundTripCounter(admin.redis)
+    if args.backend == 'redis' and args.clean:
+        await admin.cleanup_streams()
+
+    run_id = uuid.uuid4().hex[:8]
+    received = {}
+    coordinators = [Coordinator(index, args.coordinators) for index in range(args.coordinators)]
+    guests = [
+        EventGuest(f"Bench Guest {index}", f"bench_{run_id}_guest_{index}", {
+            'response_delay': args.response_delay,
+            'likely_response': random.choice(['yes', 'no', 'maybe']),
+            'response_probability': {'yes': 0.4, 'maybe': 0.3, 'no': 0.3}
+        })
+        for index in range(args.guests)
+    ]
+    hosts = [BenchHost(f"Bench Host {index}", f"bench_{run_id}_host_{index}", received)
+             for index in range(args.hosts)]
+
+    # Every host invites all benchmark guests (its registry list is host:<host_id>)
+    registry = coordinators[0].registry
+    bench_guests = [Guest(guest.guest_id, guest.guest_name) for guest in guests]
+    for host in hosts:
+        await registry.add_guests(f"host:{host.host_id}", bench_guests)
+
+    await asyncio.gather(*(component.start() for component in coordinators + guests + hosts))
+    tasks = [asyncio.create_task(guest.listen_for_invitations()) for guest in guests]
+    tasks += [asyncio.create_task(host.listen_for_summaries()) for host in hosts]
+    for coordinator in coordinators:
+        tasks.append(asyncio.create_task(coordinator.listen_for_invitations()))
+        tasks.append(asyncio.create_task(coordinator.listen_for_responses()))
+    await asyncio.sleep(0.2)  # let every listener issue its first XREADGROUP
+
+    description = ('x' * args.payload_bytes) if args.payload_bytes else "Benchmark event"
+    published = {}
+    round_trips_before = counter.count
+    started = time.perf_counter()
+    for event in range(args.events):
+        for host in hosts:
+            invitation = host.create_invitation(f"Bench Event {event}", "2025-02-15", "14:00",
+                                                "Conference Room A", description)
+            published[invitation.id] = time.perf_counter()
+            await host.publish_invitation(invitation)
+        if args.interval:
+            await asyncio.sleep(args.interval)
+
+    deadline = started + args.timeout
+    while len(received) < len(published) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    round_trips = counter.count - round_trips_before
+
+    for component in coordinators + guests + hosts:
+        component.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = sorted((received[invitation_id] - sent) * 1000
+                       for invitation_id, sent in published.items() if invitation_id in received)
+    completed = len(latencies)
+
+    # Remove this run's delivery, summary and registry data
+    leftovers = [guest.delivery_stream for guest in guests] + [host.summary_stream for host in hosts]
+    leftovers += [f"{Config.GUEST_REGISTRY_PREFIX}:list:host:{host.host_id}" for host in hosts]
+    leftovers += [f"{Config.GUEST_REGISTRY_PREFIX}:guest:{guest.guest_id}" for guest in guests]
+    for offset in range(0, len(leftovers), Config.PUBLISH_CHUNK_SIZE):
+        await admin.redis.delete(*leftovers[offset:offset + Config.PUBLISH_CHUNK_SIZE])
+    for component in coordinators + guests + hosts:
+        await component.close()
+    await admin.close()
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'backend': args.backend, 'state': Config.COORDINATOR_STATE, 'codec': Config.WIRE_CODEC,
+            'hosts': args.hosts, 'events_per_host': args.events, 'guests': args.guests,
+            'coordinators': args.coordinators, 'payload_bytes': args.payload_bytes,
+            'response_delay': args.response_delay, 'interval': args.interval,
+        },
+        'events_published': len(published),
+        'events_completed': completed,
+        'elapsed_seconds': round(elapsed, 4),
+        'events_per_second': round(completed / elapsed, 2) if elapsed else 0.0,
+        'responses_per_second': round(completed * args.guests / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0.0,
+        },
+        'round_trips_per_event': round(round_trips / max(len(published), 1), 2),
+    }
+
+
+def report(result: dict):
+    latency = result['latency_ms']
+    print(f"📊 {result['events_completed']}/{result['events_published']} events in {result['elapsed_seconds']:.2f}s "
+          f"({result['events_per_second']:.1f} events/s, {result['responses_per_second']:.1f} responses/s)")
+    print(f"⏱️  latency p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms "
+          f"p99={latency['p99']:.1f}ms max={latency['max']:.1f}ms")
+    print(f"🔁 {result['round_trips_per_event']:.1f} Redis round trips per event")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['redis', 'memory', 'fakeredis'], default=Config.BROKER_BACKEND)
+    parser.add_argument('--state', choices=['redis', 'memory'], default=Config.COORDINATOR_STATE,
+                        help='coordinator state store')
+    parser.add_argument('--hosts', type=int, default=1)
+    parser.add_argument('--events', type=int, default=10, help='invitations published per host')
+    parser.add_argument('--guests', type=int, default=5, help='invitees per event')
+    parser.add_argument('--coordinators', type=int, default=1, help='coordinator workers')
+    parser.add_argument('--payload-bytes', type=int, default=0, help='size of each invitation description')
+    parser.add_argument('--response-delay', type=float, default=0.0, help='seconds each guest waits before answering')
+    parser.add_argument('--interval', type=float, default=0.0, help='seconds between publishing rounds')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--clean', action='store_true', help='delete all pipeline streams first (redis backend)')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    Config.BROKER_BACKEND = args.backend
+    Config.COORDINATOR_STATE = args.state
+    result = asyncio.run(run(args))
+    report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(result, handle, indent=2)
+        print(f"💾 Results written to {args.output}")
+    sys.exit(0 if result['events_completed'] == result['events_published'] else 1)
+
+
+if __name__ == "__main__":
+    main()
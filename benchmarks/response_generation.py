@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""Response generation speed: per-guest ``_generate_response`` vs bulk sampling.
+
+"legacy" replays the random/uuid4 draws ``_generate_response`` used to make.
+"per-guest" calls ``EventGuest._generate_response`` once per guest, as the
+guests do: a batch of one from the shared sampler, returned as an
+unvalidated ResponseView instead of a model. The bulk modes draw every
+response with one ``ResponseSampler`` call (see response_generator.py): in
+pure Python, vectorised with NumPy, and "auto", which uses NumPy from
+``NUMPY_MIN_BATCH`` guests up. "models" produces GuestResponse objects;
+"wire" produces the dicts that are published (``to_redis_dict`` per guest
+vs ``EventGuest.generate_response_dicts``). Speedups are relative to the
+legacy row with the same output. Guests have a mix of the demo preferences.
+No Redis needed.
+"""
+
+import argparse
+import random
+import time
+import types
+import uuid
+from datetime import datetime
+from event_guest import EventGuest, RESPONSE_MESSAGES
+from models import EventInvitation, GuestResponse
+from response_generator import NUMPY_MIN_BATCH, ResponseSampler, np, preference_matrix
+
+PREFERENCES = [
+    {'likely_response': 'yes', 'response_probability': {'yes': 0.7, 'maybe': 0.2, 'no': 0.1}},
+    {'likely_response': 'maybe', 'response_probability': {'yes': 0.3, 'maybe': 0.5, 'no': 0.2}},
+    {'likely_response': 'no', 'response_probability': {'yes': 0.2, 'maybe': 0.2, 'no': 0.6}},
+]
+
+
+def make_guests(count: int):
+    # Stand-ins with the attributes _generate_response reads; a real EventGuest also opens a Redis client
+    profiles = [preference_matrix([preferences])[:2] for preferences in PREFERENCES]
+    return [
+        types.SimpleNamespace(guest_name=f"Guest {index}", guest_id=f"guest_{index}",
+                              preferences=PREFERENCES[index % len(PREFERENCES)],
+                              response_profile=profiles[index % len(PREFERENCES)])
+        for index in range(count)
+    ]
+
+
+def legacy_response(guest, invitation) -> GuestResponse:
+    """The draws _generate_response made before it used the shared sampler"""
+    probabilities = guest.preferences['response_probability']
+    if random.random() < 0.7:
+        choice = guest.preferences['likely_response']
+    else:
+        choice = random.choices(list(probabilities.keys()), weights=list(probabilities.values()))[0]
+    return GuestResponse(
+        id=str(uuid.uuid4()), invitation_id=invitation.id, guest_name=guest.guest_name, guest_id=guest.guest_id,
+        response=choice, message=random.choice(RESPONSE_MESSAGES[choice]), timestamp=datetime.now()
+    )
+
+
+def per_guest(guests, invitation, wire: bool, generate=EventGuest._generate_response) -> float:
+    started = time.perf_counter()
+    for guest in guests:
+        response = generate(guest, invitation)
+        if wire:
+            response.to_redis_dict()
+    return time.perf_counter() - started
+
+
+def bulk(guests, invitation, wire: bool, use_numpy: bool, numpy_min_batch: int) -> float:
+    sampler = ResponseSampler(RESPONSE_MESSAGES, use_numpy=use_numpy, numpy_min_batch=numpy_min_batch)
+    generate = EventGuest.generate_response_dicts if wire else EventGuest.generate_responses
+    started = time.perf_counter()
+    generate(guests, invitation, sampler)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+
+    invitation = EventInvitation(
+        id=str(uuid.uuid4()), event_name="Team Building Workshop", event_date="2025-02-15",
+        event_time="14:00", location="Conference Room A", description="Benchmark event",
+        host_name="Sarah Johnson", host_id=str(uuid.uuid4()), timestamp=datetime.now()
+    )
+    samplers = [('python', False, 0)]
+    if np is not None:
+        samplers += [('numpy', True, 0), ('auto', True, NUMPY_MIN_BATCH)]
+
+    print(f"{'responses':>10}{'output':>8}{'mode':>16}{'seconds':>10}{'µs/response':>13}{'speedup':>9}")
+    for count in args.counts:
+        guests = make_guests(count)
+        for output, wire in (('models', False), ('wire', True)):
+            baseline = per_guest(guests, invitation, wire, legacy_response)
+            rows = [('legacy', baseline), ('per-guest', per_guest(guests, invitation, wire))]
+            rows += [(f"bulk ({name})", bulk(guests, invitation, wire, use_numpy, min_batch))
+                     for name, use_numpy, min_batch in samplers]
+            for name, elapsed in rows:
+                print(f"{count:>10}{output:>8}{name:>16}{elapsed:>10.3f}{elapsed / count * 1e6:>13.2f}"
+                      f"{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
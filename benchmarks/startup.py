@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""Startup time of many components in one process: shared pool vs one client each.
+
+"shared" starts N EventGuests the way the components do now: every
+RedisClient on the loop shares one connection pool, the server is pinged
+once and all consumer groups are created in one pipelined batch. "per-client"
+replays what each RedisClient used to do on its own connection: PING, then
+XADD + XRANGE + XDEL of a dummy entry on three streams, then XGROUP CREATE.
+
+Both modes use the configured ``BROKER_BACKEND``. Against a real Redis the
+per-client mode opens one connection per component; with ``memory`` or
+``fakeredis`` it measures only the client-side work.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from redis.exceptions import ResponseError
+from config import Config
+from event_guest import EventGuest
+from redis_client import RedisClient, _make_redis
+
+BOOTSTRAP_STREAMS = ['bench_startup:invitations', 'bench_startup:responses', 'bench_startup:summaries']
+
+
+async def start_shared(count: int, run_id: str):
+    guests = [EventGuest(f"Bench Guest {index}", f"bench_{run_id}_{index}", {'response_delay': 0})
+              for index in range(count)]
+    started = time.perf_counter()
+    await asyncio.gather(*(guest.start() for guest in guests))
+    elapsed = time.perf_counter() - started
+    streams = [guest.delivery_stream for guest in guests]
+    for guest in guests:
+        await guest.close()
+    return elapsed, streams
+
+
+async def start_per_client_one(index: int, run_id: str):
+    client = _make_redis()  # a pool of its own, on whichever BROKER_BACKEND is configured
+    await client.ping()
+    for stream in BOOTSTRAP_STREAMS:
+        dummy_id = await client.xadd(stream, {'init': 'stream_created'})
+        await client.xrange(stream, count=1)
+        await client.xdel(stream, dummy_id)
+    stream = f"bench_startup:{run_id}:{index}"
+    try:
+        await client.xgroup_create(stream, Config.GUEST_GROUP, '0', mkstream=True)
+    except ResponseError:
+        pass
+    return client, stream
+
+
+async def start_per_client(count: int, run_id: str):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(start_per_client_one(index, run_id) for index in range(count)))
+    elapsed = time.perf_counter() - started
+    for client, _ in results:
+        await client.aclose()
+    return elapsed, [stream for _, stream in results] + BOOTSTRAP_STREAMS
+
+
+async def run(mode: str, count: int) -> float:
+    run_id = uuid.uuid4().hex[:8]
+    start = start_shared if mode == 'shared' else start_per_client
+    elapsed, streams = await start(count, run_id)
+
+    cleanup = RedisClient()
+    for offset in range(0, len(streams), Config.PUBLISH_CHUNK_SIZE):
+        await cleanup.redis.delete(*streams[offset:offset + Config.PUBLISH_CHUNK_SIZE])
+    await cleanup.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--components', type=int, nargs='+', default=[1, 100, 10000])
+    parser.add_argument('--per-client-max', type=int, default=1000,
+                        help='skip the per-client mode above this many components (one connection each)')
+    args = parser.parse_args()
+
+    print(f"{'components':>10}{'mode':>12}{'total ms':>12}{'µs/component':>15}")
+    for count in args.components:
+        for mode in ('per-client', 'shared'):
+            if mode == 'per-client' and count > args.per_client_max:
+                print(f"{count:>10}{mode:>12}{'skipped':>12}")
+                continue
+            elapsed = asyncio.run(run(mode, count))
+            print(f"{count:>10}{mode:>12}{elapsed * 1000:>12.1f}{elapsed / count * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
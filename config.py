@@ -7,13 +7,111 @@ class Config:
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
     REDIS_DB = int(os.getenv('REDIS_DB', 0))
+    # 'redis' (a Redis server), 'memory' (in-process streams for single-process runs, see memory_broker.py)
+    # or 'fakeredis' (in-process, for offline benchmarks; needs fakeredis + lupa)
+    BROKER_BACKEND = os.getenv('BROKER_BACKEND', 'redis')
+    # Connections per shared pool (one pool per process and event loop); 0 = unbounded
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 0))
     
     # Stream names for Pub/Sub
     INVITATION_STREAM = 'event_invitations'
     RESPONSE_STREAM = 'guest_responses'
     SUMMARY_STREAM = 'event_summaries'
     
+    # Per-guest delivery streams for forwarded invitations (see routing.py)
+    GUEST_DELIVERY_PREFIX = 'guest_invitations'
+    GUEST_STREAM_SHARDS = int(os.getenv('GUEST_STREAM_SHARDS', 0))  # 0 = one stream per guest
+    
+    # Per-host summary streams (see routing.py)
+    SUMMARY_PARTITIONS = int(os.getenv('SUMMARY_PARTITIONS', 0))  # 0 = one stream per host
+    
     # Consumer groups
     COORDINATOR_GROUP = 'coordinators'
     GUEST_GROUP = 'guests'
-    HOST_GROUP = 'hosts'
\ No newline at end of file
+    HOST_GROUP = 'hosts'
+    
+    # Stream consumption
+    CONSUMER_BATCH_SIZE = int(os.getenv('CONSUMER_BATCH_SIZE', 100))  # max entries per XREADGROUP
+    CONSUMER_BLOCK_MS = int(os.getenv('CONSUMER_BLOCK_MS', 1000))
+    
+    # Bulk publishing
+    PUBLISH_CHUNK_SIZE = int(os.getenv('PUBLISH_CHUNK_SIZE', 500))  # XADDs per pipeline round trip
+    
+    # Coordinator aggregation state: 'redis' (durable) or 'memory'
+    COORDINATOR_STATE = os.getenv('COORDINATOR_STATE', 'redis')
+    COORDINATOR_STATE_PREFIX = 'coordinator'
+    # Entries left pending by another consumer are claimed after this much idle time
+    RECOVERY_MIN_IDLE_MS = int(os.getenv('RECOVERY_MIN_IDLE_MS', 60000))
+    
+    # Coordinator workers sharing the coordinator group (see routing.HashRing)
+    COORDINATOR_WORKERS = int(os.getenv('COORDINATOR_WORKERS', 1))
+    COORDINATOR_WORKER_INDEX = int(os.getenv('COORDINATOR_WORKER_INDEX', 0))
+    HASH_RING_REPLICAS = 128  # virtual nodes per worker
+    
+    # RSVP deadlines: an invitation is summarised with whatever answers it has after this long
+    # (0 = wait for every guest); progress summaries are sent as these fractions of guests answer
+    RSVP_DEADLINE_SECONDS = float(os.getenv('RSVP_DEADLINE_SECONDS', 3600))
+    DEADLINE_CHECK_INTERVAL_SECONDS = float(os.getenv('DEADLINE_CHECK_INTERVAL_SECONDS', 1))
+    PROGRESS_THRESHOLDS = [float(value) for value in os.getenv('PROGRESS_THRESHOLDS', '').split(',') if value.strip()]
+    
+    # Backpressure (see backpressure.py): reads pause at a high-water mark and resume at half of it
+    GUEST_CONCURRENCY = int(os.getenv('GUEST_CONCURRENCY', 10))  # invitations a guest handles at once
+    GUEST_QUEUE_SIZE = int(os.getenv('GUEST_QUEUE_SIZE', 100))  # invitations a guest holds (queued + in flight)
+    COORDINATOR_FANOUT_CONCURRENCY = int(os.getenv('COORDINATOR_FANOUT_CONCURRENCY', 4))  # invitations fanned out at once
+    MAX_PENDING_INVITATIONS = int(os.getenv('MAX_PENDING_INVITATIONS', 10000))  # per worker; 0 = unbounded
+    
+    # Response deduplication (see dedup.py): an in-process LRU, plus shared Redis sets with 'redis'
+    DEDUP_INDEX = os.getenv('DEDUP_INDEX', 'memory')
+    DEDUP_PREFIX = 'dedup'
+    DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', 100000))  # keys kept in the LRU
+    DEDUP_TTL_SECONDS = float(os.getenv('DEDUP_TTL_SECONDS', 86400))  # keys kept for one to two of these
+    
+    # Component runner (see runner.py): listeners get this long to finish their batch on shutdown
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv('SHUTDOWN_DRAIN_SECONDS', 10))
+    
+    # Stream retention (see retention.py); 0 disables each limit
+    # Approximate cap applied on every XADD. Off by default: it can trim entries that are
+    # still unread or unacknowledged, which the pending-aware compactor never does
+    STREAM_MAXLEN = int(os.getenv('STREAM_MAXLEN', 0))
+    STREAM_RETENTION_SECONDS = int(os.getenv('STREAM_RETENTION_SECONDS', 86400))  # MINID age limit
+    COMPACTOR_INTERVAL_SECONDS = int(os.getenv('COMPACTOR_INTERVAL_SECONDS', 60))
+    
+    # Summaries with more responses than this carry only the counts; the responses go to a
+    # chunked detail list that hosts read lazily (see summary_details.py)
+    SUMMARY_INLINE_RESPONSES = int(os.getenv('SUMMARY_INLINE_RESPONSES', 100))
+    SUMMARY_DETAIL_PREFIX = 'summary_details'
+    SUMMARY_DETAIL_CHUNK = int(os.getenv('SUMMARY_DETAIL_CHUNK', 1000))  # responses per list element
+    SUMMARY_DETAIL_TTL_SECONDS = int(os.getenv('SUMMARY_DETAIL_TTL_SECONDS', 86400))
+    
+    # Wire format for published models: 'fields' or 'packed' (see models.py); reading accepts both.
+    # 'packed' writes one field per entry: smaller, and cheaper for redis-py to send and parse
+    WIRE_CODEC = os.getenv('WIRE_CODEC', 'fields')
+    # Components decode each other's messages without pydantic validation; set to validate everything
+    VALIDATE_INTERNAL_MESSAGES = os.getenv('VALIDATE_INTERNAL_MESSAGES', '').lower() in ('1', 'true', 'yes')
+    
+    # Guest registry (see guest_registry.py): 'redis' (sets + hashes) or 'file' (JSON lines)
+    GUEST_REGISTRY = os.getenv('GUEST_REGISTRY', 'redis')
+    GUEST_REGISTRY_PREFIX = 'registry'
+    GUEST_REGISTRY_DIR = os.getenv('GUEST_REGISTRY_DIR', 'guest_lists')
+    DEFAULT_GUEST_LIST = os.getenv('DEFAULT_GUEST_LIST', 'default')
+    # List a host asks the coordinator to invite ('' = the usual event/host/default lookup)
+    HOST_GUEST_LIST = os.getenv('HOST_GUEST_LIST', '')
+    REGISTRY_SCAN_COUNT = int(os.getenv('REGISTRY_SCAN_COUNT', 1000))  # guests per SSCAN page / file batch
+    REGISTRY_COUNT_TTL_SECONDS = float(os.getenv('REGISTRY_COUNT_TTL_SECONDS', 30))  # cached list sizes
+    
+    # Guest swarm (see swarm.py): virtual guests answering from one process; needs GUEST_STREAM_SHARDS
+    SWARM_GROUP = 'guest_swarm'
+    SWARM_GUEST_LIST = os.getenv('SWARM_GUEST_LIST', 'swarm')  # kept apart from the demo guests' default list
+    SWARM_TICK_MS = int(os.getenv('SWARM_TICK_MS', 10))  # responses due within one tick are published together
+    
+    # Logging (see logs.py); per-message events can be sampled and rate limited
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', '%(message)s')
+    LOG_PREFIX = os.getenv('LOG_PREFIX', '')  # prepended to every line, e.g. the component name
+    LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))  # keep 1 in N per-message records
+    LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', 0))  # per-message records per second per template; 0 = unlimited
+    
+    # Metrics (see metrics.py); each component serves /metrics on its --metrics-port (0 = off)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_SAMPLE_SECONDS = float(os.getenv('METRICS_SAMPLE_SECONDS', 5))  # consumer lag / pending sampling
@@ -1,248 +1,589 @@
 #!/usr/bin/env python3
 
+import argparse
 import asyncio
+import logging
+import math
+import time
 import uuid
 from datetime import datetime
 import sys
 import signal
-from collections import defaultdict
 from redis_client import RedisClient
 from models import EventInvitation, GuestResponse, EventSummary
 from config import Config
+from routing import (
+    guest_stream, summary_stream, coordinator_name, coordinator_ring,
+    coordinator_inbox, coordinator_response_stream
+)
+from coordinator_state import create_state
+from guest_registry import GUEST_LIST_FIELD, create_registry, ensure_default_list, resolve_list
+from retention import StreamCompactor
+from summary_details import prepare as prepare_details, should_split
+from dedup import DedupIndex, response_keys
+from backpressure import HighWaterMark
+from logs import get_logger, setup_logging
+from metrics import MESSAGES, STAGE_SECONDS, MetricsEndpoint
+
+log = get_logger('coordinator')
+message_log = get_logger('coordinator', per_message=True)
+
+STATUS_EMOJI = {"yes": "✅", "no": "❌", "maybe": "❓"}
+
+DECODE_SECONDS = STAGE_SECONDS.labels(component='coordinator', stage='decode')
+FANOUT_SECONDS = STAGE_SECONDS.labels(component='coordinator', stage='fanout')
+AGGREGATE_SECONDS = STAGE_SECONDS.labels(component='coordinator', stage='aggregate')
+SUMMARY_SECONDS = STAGE_SECONDS.labels(component='coordinator', stage='summary')
+INVITATIONS = MESSAGES.labels(component='coordinator', kind='invitation')
+RESPONSES = MESSAGES.labels(component='coordinator', kind='response')
+SUMMARIES = MESSAGES.labels(component='coordinator', kind='summary')
+PROGRESS_SUMMARIES = MESSAGES.labels(component='coordinator', kind='progress_summary')
+DUPLICATES = MESSAGES.labels(component='coordinator', kind='duplicate_response')
+
+def progress_marks(expected: int, thresholds=None):
+    """Response counts at which a progress summary is sent for ``expected`` guests"""
+    thresholds = Config.PROGRESS_THRESHOLDS if thresholds is None else thresholds
+    return {math.ceil(fraction * expected) for fraction in thresholds if 0 < fraction < 1} - {0, expected}
 
 class Coordinator:
-    def __init__(self):
+    def __init__(self, worker_index: int = None, worker_count: int = None):
         self.redis_client = RedisClient()
         self.running = True
-        self.pending_invitations = {}  # invitation_id -> invitation
-        self.guest_responses = defaultdict(list)  # invitation_id -> [responses]
-        self.expected_guests = {}  # invitation_id -> expected_count
-        
-        # Create consumer groups for Redis Streams
-        self.redis_client.create_consumer_group(
-            Config.INVITATION_STREAM, 
-            Config.COORDINATOR_GROUP
-        )
-        self.redis_client.create_consumer_group(
-            Config.RESPONSE_STREAM, 
-            Config.COORDINATOR_GROUP
-        )
         
-        print("🎛️  Coordinator service initialized and ready")
-        print("🔗 Connected to Redis Pub/Sub system")
+        # Each invitation is owned by one worker, chosen by consistent hashing on its ID
+        self.worker_index = Config.COORDINATOR_WORKER_INDEX if worker_index is None else worker_index
+        self.worker_count = worker_count or Config.COORDINATOR_WORKERS
+        self.worker_name = coordinator_name(self.worker_index)
+        self.ring = coordinator_ring(self.worker_count)
+        
+        # The shared streams are load-balanced over all workers; the inbox and
+        # response stream of a worker only carry invitations it owns
+        self.invitation_streams = [Config.INVITATION_STREAM, coordinator_inbox(self.worker_name)]
+        self.response_streams = [Config.RESPONSE_STREAM, coordinator_response_stream(self.worker_name)]
+        self.invitation_consumer = f"{self.worker_name}_main"
+        self.response_consumer = f"{self.worker_name}_responses"
+        # Pending invitations, response tallies and expected counts (see coordinator_state.py)
+        self.state = create_state(self.redis_client)
+        # Invitee lists per event/host, iterated in batches (see guest_registry.py)
+        self.registry = create_registry(self.redis_client)
+        # Response IDs and stream entries already recorded, so redeliveries are skipped (see dedup.py)
+        self.dedup = DedupIndex(self.redis_client)
+        # Invitations this worker owns that are still waiting for answers. Reading new
+        # invitations pauses at MAX_PENDING_INVITATIONS until summaries free room (see backpressure.py)
+        self.pending = set()
+        self.pending_mark = HighWaterMark('coordinator', 'pending_invitations', Config.MAX_PENDING_INVITATIONS)
+        self.fanout_slots = asyncio.Semaphore(Config.COORDINATOR_FANOUT_CONCURRENCY)
+        # Invitations whose final summary is being sent, so a deadline and a last response
+        # arriving together do not both finalise the same invitation
+        self.finalising = set()
+        # Invitations still being fanned out: their expected count is only an estimate until it ends
+        self.fanning_out = set()
+        # One compactor per deployment is enough; the first worker runs it
+        self.compactor = None
+        if self.worker_index == 0 and Config.COMPACTOR_INTERVAL_SECONDS and Config.STREAM_RETENTION_SECONDS:
+            self.compactor = StreamCompactor(self.redis_client)
+    
+    async def start(self):
+        """Connect to Redis and create the coordinator consumer groups"""
+        await self.redis_client.connect()
+        
+        # Create consumer groups for Redis Streams (requested together, so sent as one pipeline)
+        await asyncio.gather(*(
+            self.redis_client.create_consumer_group(stream, Config.COORDINATOR_GROUP)
+            for stream in self.invitation_streams + self.response_streams
+        ))
+        
+        await ensure_default_list(self.registry)
+        self.pending.update(invitation_id for invitation_id in await self.state.active_invitations()
+                            if self.owns(invitation_id))
+        self.pending_mark.update(len(self.pending))
+        await self.recover()
+        
+        log.info("🎛️  Coordinator service initialized and ready (worker %d/%d)",
+                 self.worker_index + 1, self.worker_count)
+        log.info("🔗 Connected to Redis Pub/Sub system")
+    
+    async def recover(self):
+        """Resume work left unfinished by a previous coordinator run.
+        
+        Messages that were delivered but never acknowledged are claimed and
+        processed again, then any invitation whose responses were all recorded
+        but whose summary was never sent is finalised.
+        """
+        for stream in self.invitation_streams:
+            invitations = await self.redis_client.claim_pending(
+                stream, Config.COORDINATOR_GROUP, self.invitation_consumer
+            )
+            if invitations:
+                await self.process_invitation_batch(stream, invitations)
+        
+        for stream in self.response_streams:
+            responses = await self.redis_client.claim_pending(
+                stream, Config.COORDINATOR_GROUP, self.response_consumer
+            )
+            if responses:
+                await self.process_response_batch(stream, responses)
+        
+        for invitation_id in await self.state.completed_invitations():
+            if self.owns(invitation_id):
+                await self.generate_summary(invitation_id)
+    
+    def owns(self, invitation_id: str) -> bool:
+        """Whether this worker holds the aggregation state for ``invitation_id``"""
+        return self.ring.owner(invitation_id) == self.worker_name
     
     async def listen_for_invitations(self):
         """Listen for new invitations from hosts via Redis Streams"""
-        print("👂 Listening for invitations from hosts...")
+        log.info("👂 Listening for invitations from hosts...")
         
         while self.running:
             try:
-                messages = self.redis_client.consume_messages(
-                    Config.INVITATION_STREAM,
+                # Too many invitations pending: leave new ones in the stream while responses
+                # and deadlines finalise the pending ones
+                if not await self.pending_mark.wait(Config.CONSUMER_BLOCK_MS / 1000):
+                    continue
+                room = self.pending_mark.room
+                messages = await self.redis_client.consume_streams(
+                    self.invitation_streams,
                     Config.COORDINATOR_GROUP,
-                    "coordinator_main",
-                    count=1,
-                    block=1000
+                    self.invitation_consumer,
+                    count=Config.CONSUMER_BATCH_SIZE if room is None else min(Config.CONSUMER_BATCH_SIZE, room),
+                    block=Config.CONSUMER_BLOCK_MS
                 )
                 
                 for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        invitation = EventInvitation.from_redis_dict(fields)
-                        await self.process_invitation(invitation)
-                        
-                        # Acknowledge the message
-                        self.redis_client.acknowledge_message(
-                            Config.INVITATION_STREAM,
-                            Config.COORDINATOR_GROUP,
-                            message_id
-                        )
+                    await self.process_invitation_batch(stream, stream_messages)
                         
             except Exception as e:
                 if self.running:
-                    print(f"❌ Error listening for invitations: {e}")
+                    log.error("❌ Error listening for invitations: %s", e)
                 await asyncio.sleep(1)
     
-    async def process_invitation(self, invitation: EventInvitation):
-        """Process a new invitation and forward to all registered guests"""
-        print(f"\n📨 RECEIVED INVITATION FROM HOST VIA REDIS")
-        print(f"🎉 Event: {invitation.event_name}")
-        print(f"👤 Host: {invitation.host_name}")
-        print(f"📅 Date: {invitation.event_date} at {invitation.event_time}")
-        print(f"📍 Location: {invitation.location}")
-        
-        # Store the invitation
-        self.pending_invitations[invitation.id] = invitation
-        
-        # Simulate registered guests (in a real system, this would come from a database)
-        registered_guests = [
-            {"id": "guest_1", "name": "Alice Chen", "email": "alice.chen@company.com"},
-            {"id": "guest_2", "name": "Bob Rodriguez", "email": "bob.rodriguez@company.com"},
-            {"id": "guest_3", "name": "Carol Williams", "email": "carol.williams@company.com"},
-            {"id": "guest_4", "name": "David Kim", "email": "david.kim@company.com"},
-            {"id": "guest_5", "name": "Emma Thompson", "email": "emma.thompson@company.com"},
-        ]
-        
-        self.expected_guests[invitation.id] = len(registered_guests)
-        
-        print(f"📤 Forwarding invitation to {len(registered_guests)} registered guests...")
-        
-        # Forward invitation to all registered guests via Redis Streams
-        for guest in registered_guests:
-            guest_invitation_data = invitation.to_redis_dict()
-            guest_invitation_data['target_guest_id'] = guest['id']
-            guest_invitation_data['target_guest_name'] = guest['name']
+    async def process_invitation_batch(self, stream, stream_messages):
+        """Handle a batch of invitations, then acknowledge it with a single XACK.
+        
+        Invitations owned by another worker are forwarded to that worker's inbox. Owned
+        invitations are fanned out concurrently, up to COORDINATOR_FANOUT_CONCURRENCY at once.
+        """
+        processed = []
+        forwarded = []
+        owned = []
+        try:
+            for message_id, fields in stream_messages:
+                started = time.perf_counter()
+                invitation = EventInvitation.from_trusted_dict(fields)
+                DECODE_SECONDS.observe(time.perf_counter() - started)
+                guest_list = fields.get(GUEST_LIST_FIELD)
+                owner = self.ring.owner(invitation.id)
+                if owner == self.worker_name:
+                    owned.append((message_id, invitation, guest_list))
+                else:
+                    data = invitation.to_redis_dict()
+                    if guest_list:
+                        data[GUEST_LIST_FIELD] = guest_list
+                    forwarded.append((coordinator_inbox(owner), data))
+                    processed.append(message_id)
             
-            self.redis_client.publish_message(
-                Config.INVITATION_STREAM,
-                guest_invitation_data
+            results = await asyncio.gather(*(self.fan_out(invitation, guest_list)
+                                             for _, invitation, guest_list in owned),
+                                           return_exceptions=True)
+            errors = []
+            for (message_id, _, _), result in zip(owned, results):
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                else:
+                    processed.append(message_id)
+            if errors:
+                raise errors[0]
+        finally:
+            if forwarded:
+                await self.redis_client.publish_batch(forwarded)
+            # Acknowledged after fan-out, so a crash before it redelivers the invitation,
+            # whose fan-out then resumes from the progress recorded in the state
+            await self.redis_client.acknowledge_messages(
+                stream,
+                Config.COORDINATOR_GROUP,
+                processed
             )
-            
-            print(f"   ✉️  Sent to {guest['name']} ({guest['email']}) via Redis")
+    
+    async def fan_out(self, invitation: EventInvitation, guest_list: str = None):
+        """Process an owned invitation once a fan-out slot is free"""
+        async with self.fanout_slots:
+            started = time.perf_counter()
+            await self.process_invitation(invitation, guest_list)
+            FANOUT_SECONDS.observe(time.perf_counter() - started)
+            INVITATIONS.inc()
+    
+    async def process_invitation(self, invitation: EventInvitation, guest_list: str = None):
+        """Process a new invitation and forward to all registered guests"""
+        message_log.info(
+            "\n📨 RECEIVED INVITATION FROM HOST VIA REDIS\n🎉 Event: %s\n👤 Host: %s\n📅 Date: %s at %s\n📍 Location: %s",
+            invitation.event_name, invitation.host_name, invitation.event_date, invitation.event_time,
+            invitation.location
+        )
+        
+        # Invitees come from the list the host named, else the event's, else the host's,
+        # else the default list. The size is a cached count, so the list itself is never loaded
+        # at once; it is only an estimate until fan-out has counted the guests it published to.
+        list_id, expected = await resolve_list(self.registry, invitation, guest_list)
         
-        print(f"✅ Invitation forwarded to all guests via Redis Streams")
+        # Store the invitation (and its RSVP deadline) before any guest can answer it
+        deadline = time.time() + Config.RSVP_DEADLINE_SECONDS if Config.RSVP_DEADLINE_SECONDS else None
+        skip = 0
+        if not await self.state.add_invitation(invitation, expected, deadline):
+            # Redelivered: resume an unfinished fan-out after the guests it recorded,
+            # rather than sending every guest a second copy
+            skip = await self.state.fanout_progress(invitation.id)
+            if skip is None:
+                message_log.info("🔁 Invitation %s was already fanned out; skipping", invitation.id)
+                return
+            log.info("🔁 Resuming fan-out of invitation %s after %d guest(s)", invitation.id, skip)
+        self.pending.add(invitation.id)
+        self.pending_mark.update(len(self.pending))
+        self.fanning_out.add(invitation.id)
+        
+        message_log.info("📤 Forwarding invitation to %d registered guests (list '%s')...", expected, list_id)
+        
+        # Serialise the shared invitation fields once; each guest only adds its target fields.
+        # Guests answer on this worker's response stream, since it owns the invitation.
+        invitation_data = invitation.to_redis_dict()
+        invitation_data['reply_stream'] = coordinator_response_stream(self.worker_name)
+        
+        # Forward each registry page to the guests' own delivery streams via pipelined XADDs.
+        # Progress is recorded after every page, so a crash repeats at most one page; a resumed
+        # fan-out walks the list in the same order and skips the guests already invited.
+        published = 0
+        try:
+            async for guests in self.registry.iter_guests(list_id):
+                if skip >= len(guests):
+                    skip -= len(guests)
+                    published += len(guests)
+                    continue
+                published += skip
+                guests, skip = guests[skip:], 0
+                message_ids = await self.redis_client.publish_batch(
+                    (guest_stream(guest.id),
+                     {**invitation_data, 'target_guest_id': guest.id, 'target_guest_name': guest.name})
+                    for guest in guests
+                )
+                published += len(message_ids)
+                await self.state.record_fanout(invitation.id, published)
+        finally:
+            self.fanning_out.discard(invitation.id)
+        message_log.debug("📤 Published %d invitation(s) to guest delivery streams", published)
+        
+        # The list may have changed since its size was cached (another process, registry or
+        # swarm), so the guests actually invited are the ones to wait for
+        responded = await self.state.finish_fanout(invitation.id, published)
+        if published != expected:
+            log.info("📇 List '%s' has %d guests now, not the cached %d; expecting %d responses",
+                     list_id, published, expected, published)
+        
+        message_log.info("✅ Invitation forwarded to all guests via Redis Streams")
+        if responded >= published:
+            await self.generate_summary(invitation.id)
     
     async def listen_for_responses(self):
         """Listen for responses from guests via Redis Streams"""
-        print("👂 Listening for responses from guests...")
+        log.info("👂 Listening for responses from guests...")
         
         while self.running:
             try:
-                messages = self.redis_client.consume_messages(
-                    Config.RESPONSE_STREAM,
+                messages = await self.redis_client.consume_streams(
+                    self.response_streams,
                     Config.COORDINATOR_GROUP,
-                    "coordinator_responses",
-                    count=1,
-                    block=1000
+                    self.response_consumer,
+                    count=Config.CONSUMER_BATCH_SIZE,
+                    block=Config.CONSUMER_BLOCK_MS
                 )
                 
                 for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        response = GuestResponse.from_redis_dict(fields)
-                        await self.process_response(response)
-                        
-                        # Acknowledge the message
-                        self.redis_client.acknowledge_message(
-                            Config.RESPONSE_STREAM,
-                            Config.COORDINATOR_GROUP,
-                            message_id
-                        )
+                    await self.process_response_batch(stream, stream_messages)
                         
             except Exception as e:
                 if self.running:
-                    print(f"❌ Error listening for responses: {e}")
+                    log.error("❌ Error listening for responses: %s", e)
                 await asyncio.sleep(1)
     
-    async def process_response(self, response: GuestResponse):
-        """Process a guest response received via Redis"""
-        status_emoji = {"yes": "✅", "no": "❌", "maybe": "❓"}.get(response.response, "❓")
+    async def process_response_batch(self, stream, stream_messages):
+        """Record a batch of responses; the state update and the XACK are applied together.
         
-        print(f"\n📝 GUEST RESPONSE RECEIVED VIA REDIS")
-        print(f"{status_emoji} {response.guest_name}: {response.response.upper()}")
-        if response.message:
-            print(f"💬 Message: \"{response.message}\"")
+        Responses for invitations owned by another worker are forwarded to its response stream.
+        Responses seen before (redeliveries, forwarded twice) are only acknowledged.
+        """
+        message_ids, responses, keys = [], [], []
+        forwarded, forwarded_ids = [], []
+        for message_id, fields in stream_messages:
+            started = time.perf_counter()
+            response = GuestResponse.from_trusted_dict(fields)
+            DECODE_SECONDS.observe(time.perf_counter() - started)
+            owner = self.ring.owner(response.invitation_id)
+            if owner == self.worker_name:
+                message_ids.append(message_id)
+                responses.append(response)
+                keys.append(response_keys(stream, message_id, response))
+            else:
+                forwarded.append((coordinator_response_stream(owner), response.to_redis_dict()))
+                forwarded_ids.append(message_id)
         
-        # Store the response
-        self.guest_responses[response.invitation_id].append(response)
+        if forwarded:
+            await self.redis_client.publish_batch(forwarded)
+            await self.redis_client.acknowledge_messages(stream, Config.COORDINATOR_GROUP, forwarded_ids)
+        if not responses:
+            return
         
-        # Check if we have all responses for this invitation
-        expected_count = self.expected_guests.get(response.invitation_id, 0)
-        current_count = len(self.guest_responses[response.invitation_id])
+        seen = await self.dedup.seen(keys)
+        fresh = [(response, key) for response, key, duplicate in zip(responses, keys, seen) if not duplicate]
+        if len(fresh) < len(responses):
+            DUPLICATES.inc(len(responses) - len(fresh))
+            message_log.info("🔁 Skipping %d already recorded response(s)", len(responses) - len(fresh))
+        if not fresh:
+            await self.redis_client.acknowledge_messages(stream, Config.COORDINATOR_GROUP, message_ids)
+            return
+        # The duplicates are acknowledged together with the fresh responses
+        await self.process_responses(
+            [response for response, _ in fresh], (stream, Config.COORDINATOR_GROUP, message_ids)
+        )
+        await self.dedup.remember(key for _, key in fresh)
+    
+    async def process_response(self, response: GuestResponse):
+        """Process a guest response received via Redis"""
+        await self.process_responses([response])
+    
+    async def process_responses(self, responses, ack=None):
+        """Apply guest responses to the running tallies and send any summaries that are due"""
+        started = time.perf_counter()
+        results = await self.state.record_responses(responses, ack)
+        AGGREGATE_SECONDS.observe(time.perf_counter() - started)
+        RESPONSES.inc(len(responses))
         
-        print(f"📊 Responses collected: {current_count}/{expected_count}")
+        # Per-response records are DEBUG: at INFO they would cost more than the aggregation itself
+        detailed = message_log.isEnabledFor(logging.DEBUG)
+        completed, progress = [], []
+        for response, result in zip(responses, results):
+            if detailed:
+                message_log.debug(
+                    "\n📝 GUEST RESPONSE RECEIVED VIA REDIS\n%s %s: %s%s",
+                    STATUS_EMOJI.get(response.response, "❓"), response.guest_name, response.response.upper(),
+                    f'\n💬 Message: "{response.message}"' if response.message else ''
+                )
+            
+            if not result.known:
+                log.warning("❌ No pending invitation for ID: %s", response.invitation_id)
+                continue
+            if not result.applied:
+                if detailed:
+                    message_log.debug("🔁 Ignoring duplicate or outdated response from %s", response.guest_name)
+                continue
+            
+            # Check if we have all responses for this invitation
+            if detailed:
+                message_log.debug("📊 Responses collected: %d/%d", result.responded, result.expected)
+            
+            if result.responded >= result.expected:
+                # During fan-out the expected count is an estimate; fan-out checks again when it ends
+                if response.invitation_id not in completed and response.invitation_id not in self.fanning_out:
+                    completed.append(response.invitation_id)
+            elif result.new_guest and result.responded in progress_marks(result.expected):
+                # Only a guest's first answer raises the count, so each mark is crossed once;
+                # marks crossed within one batch share a single progress summary
+                if response.invitation_id not in progress:
+                    progress.append(response.invitation_id)
         
-        if current_count >= expected_count:
-            await self.generate_summary(response.invitation_id)
+        for invitation_id in completed:
+            await self.generate_summary(invitation_id)
+        for invitation_id in progress:
+            if invitation_id not in completed:
+                await self.send_progress(invitation_id)
     
-    async def generate_summary(self, invitation_id: str):
-        """Generate and send summary back to host via Redis Streams"""
-        invitation = self.pending_invitations.get(invitation_id)
-        responses = self.guest_responses.get(invitation_id, [])
+    async def watch_deadlines(self):
+        """Finalise invitations whose RSVP deadline passed with guests still silent"""
+        log.info("⏰ Watching RSVP deadlines (%.0fs after each invitation)", Config.RSVP_DEADLINE_SECONDS)
         
-        if not invitation:
-            print(f"❌ No invitation found for ID: {invitation_id}")
+        while self.running:
+            try:
+                for invitation_id in await self.state.due_invitations(time.time()):
+                    if self.owns(invitation_id):
+                        await self.generate_summary(invitation_id, status='deadline')
+            except Exception as e:
+                if self.running:
+                    log.error("❌ Error checking RSVP deadlines: %s", e)
+            await asyncio.sleep(Config.DEADLINE_CHECK_INTERVAL_SECONDS)
+    
+    async def send_progress(self, invitation_id: str):
+        """Send the host the counts so far; the invitation stays pending"""
+        data = await self.state.load_summary(invitation_id, include_responses=False)
+        if not data or invitation_id in self.finalising:
             return
         
-        print(f"\n📊 GENERATING SUMMARY")
-        print(f"🎉 Event: {invitation.event_name}")
-        
-        # Count responses
-        yes_count = sum(1 for r in responses if r.response == 'yes')
-        no_count = sum(1 for r in responses if r.response == 'no')
-        maybe_count = sum(1 for r in responses if r.response == 'maybe')
-        
-        # Create summary
-        summary = EventSummary(
+        summary_data = {**self.build_summary(invitation_id, data).to_redis_dict(), 'status': 'progress'}
+        await self.redis_client.publish_message(summary_stream(data.invitation.host_id), summary_data)
+        PROGRESS_SUMMARIES.inc()
+        message_log.info("📈 Progress summary sent for %s: %d/%d responses",
+                         data.invitation.event_name, data.responded, data.expected)
+    
+    def build_summary(self, invitation_id: str, data, responses=()) -> EventSummary:
+        """The summary of ``data`` (counts so far) with the given embedded responses"""
+        # Built from our own state, whose responses may be unvalidated views
+        # (see models.MessageView), so it is not validated again
+        return EventSummary.model_construct(
             id=str(uuid.uuid4()),
             invitation_id=invitation_id,
-            host_id=invitation.host_id,
-            total_invited=len(responses),
-            total_responses=len(responses),
-            yes_count=yes_count,
-            no_count=no_count,
-            maybe_count=maybe_count,
-            responses=responses,
+            host_id=data.invitation.host_id,
+            total_invited=data.expected,
+            total_responses=data.responded,
+            yes_count=data.counts['yes'],
+            no_count=data.counts['no'],
+            maybe_count=data.counts['maybe'],
+            responses=list(responses),
             timestamp=datetime.now()
         )
+    
+    async def generate_summary(self, invitation_id: str, status: str = 'complete'):
+        """Generate and send summary back to host via Redis Streams"""
+        if invitation_id in self.finalising:
+            return
+        self.finalising.add(invitation_id)
+        started = time.perf_counter()
+        try:
+            await self._generate_summary(invitation_id, status)
+        finally:
+            self.finalising.discard(invitation_id)
+            # Also when the invitation was already gone, so the pending mark cannot stay high
+            self.pending.discard(invitation_id)
+            self.pending_mark.update(len(self.pending))
+        SUMMARY_SECONDS.observe(time.perf_counter() - started)
+    
+    async def _generate_summary(self, invitation_id: str, status: str):
+        data = await self.state.load_summary(invitation_id)
         
-        print(f"✅ Attending: {yes_count}")
-        print(f"❓ Maybe: {maybe_count}")
-        print(f"❌ Not Attending: {no_count}")
-        print(f"📈 Response Rate: 100%")
-        print(f"🎯 Attendance Rate: {(yes_count/len(responses))*100:.1f}%")
+        if not data:
+            log.warning("❌ No invitation found for ID: %s", invitation_id)
+            return
         
-        # Send summary back to host via Redis Streams
-        self.redis_client.publish_message(
-            Config.SUMMARY_STREAM,
-            summary.to_redis_dict()
-        )
+        invitation = data.invitation
+
+        # Counts are maintained incrementally as responses arrive
+        yes_count = data.counts['yes']
+        no_count = data.counts['no']
+        maybe_count = data.counts['maybe']
+        total_responses = data.responded
+        total_invited = data.expected
         
-        print(f"📤 Summary sent back to host: {invitation.host_name} via Redis")
+        # Large events keep their responses out of the summary entry (see summary_details.py)
+        split = should_split(data.responses)
         
-        # Clean up
-        del self.pending_invitations[invitation_id]
-        del self.guest_responses[invitation_id]
-        del self.expected_guests[invitation_id]
+        # The host tells a final summary sent at the RSVP deadline from a complete one by its status
+        summary = self.build_summary(invitation_id, data, () if split else data.responses)
+        summary_data = {**summary.to_redis_dict(), 'status': status}
+        details = None
+        if split:
+            details = prepare_details(summary.id, data.responses)
+            summary_data.update(details[0].to_fields())
         
-        print(f"🧹 Cleaned up data for invitation: {invitation_id}")
+        message_log.info(
+            "\n📊 GENERATING SUMMARY\n🎉 Event: %s\n✅ Attending: %d\n❓ Maybe: %d\n❌ Not Attending: %d\n"
+            "📈 Response Rate: %.1f%%\n🎯 Attendance Rate: %.1f%%",
+            invitation.event_name, yes_count, maybe_count, no_count,
+            (total_responses/max(total_invited, 1))*100, (yes_count/max(total_responses, 1))*100
+        )
+        if status == 'deadline':
+            message_log.info("⏰ RSVP deadline reached; %d guest(s) never replied", total_invited - total_responses)
+        
+        # Send summary back to the host's own summary stream and drop the invitation's state
+        await self.state.finish(
+            invitation_id,
+            summary_stream(invitation.host_id),
+            summary_data,
+            details
+        )
+        
+        message_log.info("📤 Summary sent back to host: %s via Redis", invitation.host_name)
+        message_log.debug("🧹 Cleaned up data for invitation: %s", invitation_id)
+        SUMMARIES.inc()
+    
+    def listeners(self):
+        """The coroutines that run the coordinator once it has started"""
+        listeners = [self.listen_for_invitations(), self.listen_for_responses()]
+        if Config.RSVP_DEADLINE_SECONDS:
+            listeners.append(self.watch_deadlines())
+        if self.compactor:
+            listeners.append(self.compactor.run())
+        return listeners
+    
+    def consumer_groups(self):
+        """The (stream, group) pairs this coordinator reads, for lag and pending metrics"""
+        return [(stream, Config.COORDINATOR_GROUP) for stream in self.invitation_streams + self.response_streams]
     
     def stop(self):
         """Stop the coordinator"""
         self.running = False
-        print("\n🛑 Coordinator stopping...")
+        if self.compactor:
+            self.compactor.stop()
+        log.info("\n🛑 Coordinator stopping...")
+    
+    async def close(self):
+        """Release the Redis connection"""
+        await self.redis_client.close()
 
 def signal_handler(signum, frame):
-    print("\n🛑 Received interrupt signal...")
+    log.info("\n🛑 Received interrupt signal...")
     sys.exit(0)
 
-async def main():
+async def main(worker_index: int = None, worker_count: int = None, metrics_port: int = None):
     signal.signal(signal.SIGINT, signal_handler)
     
-    coordinator = Coordinator()
+    coordinator = Coordinator(worker_index, worker_count)
+    await coordinator.start()
     
-    # Start both listeners concurrently
-    invitation_task = asyncio.create_task(coordinator.listen_for_invitations())
-    response_task = asyncio.create_task(coordinator.listen_for_responses())
+    # Start both listeners (plus the deadline watcher and compactor) concurrently
+    tasks = [asyncio.create_task(listener) for listener in coordinator.listeners()]
+    
+    metrics_port = Config.METRICS_PORT if metrics_port is None else metrics_port
+    metrics_endpoint = None
+    if metrics_port:
+        metrics_endpoint = MetricsEndpoint(metrics_port, coordinator.redis_client, coordinator.consumer_groups())
+        await metrics_endpoint.start()
     
     try:
-        print("🎛️  Coordinator is running...")
-        print("💡 Ready to receive invitations from hosts and responses from guests")
-        print("🔄 Will automatically forward invitations and generate summaries")
-        print("📡 All communication via Redis Pub/Sub streams")
+        log.info("🎛️  Coordinator is running...")
+        log.info("💡 Ready to receive invitations from hosts and responses from guests")
+        log.info("🔄 Will automatically forward invitations and generate summaries")
+        log.info("📡 All communication via Redis Pub/Sub streams")
         
-        # Run both tasks concurrently
-        await asyncio.gather(invitation_task, response_task)
+        # Run both listeners (and the compactor) concurrently
+        await asyncio.gather(*tasks)
         
     except KeyboardInterrupt:
-        print("\n🛑 Coordinator interrupted by user")
+        log.info("\n🛑 Coordinator interrupted by user")
     finally:
         coordinator.stop()
-        invitation_task.cancel()
-        response_task.cancel()
+        if metrics_endpoint:
+            await metrics_endpoint.stop()
+        for task in tasks:
+            task.cancel()
+        await coordinator.close()
 
 if __name__ == "__main__":
-    print("🎛️  STARTING COORDINATOR - PUB/SUB COMPONENT")
-    print("=" * 50)
-    print("📡 This component routes messages between hosts and guests")
-    print("🔗 Uses Redis Streams for Pub/Sub messaging")
-    print("=" * 50)
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Coordinator - Pub/Sub component")
+    parser.add_argument('--worker-index', type=int, default=None,
+                        help='index of this worker (default: COORDINATOR_WORKER_INDEX)')
+    parser.add_argument('--worker-count', type=int, default=None,
+                        help='total number of coordinator workers (default: COORDINATOR_WORKERS)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve /metrics on this port (default: METRICS_PORT, 0 = off)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='run this many workers, one process and event loop each (metrics are aggregated)')
+    args = parser.parse_args()
+    
+    setup_logging()
+    log.info("🎛️  STARTING COORDINATOR - PUB/SUB COMPONENT")
+    log.info("=" * 50)
+    log.info("📡 This component routes messages between hosts and guests")
+    log.info("🔗 Uses Redis Streams for Pub/Sub messaging")
+    log.info("=" * 50)
+    if args.workers > 1:
+        # Worker i of N in process i, all in the shared coordinator group (runner imports this module)
+        from runner import run_pool, worker_shares
+        sys.exit(run_pool(worker_shares(['coordinator'], args.workers), metrics_port=args.metrics_port))
+    asyncio.run(main(args.worker_index, args.worker_count, args.metrics_port))
\ No newline at end of file
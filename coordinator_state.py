@@ -0,0 +1,344 @@
+import heapq
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from config import Config
+from models import EventInvitation, GuestResponse, FIELD_CODEC
+from redis_client import RedisClient
+from summary_details import SummaryDetails, queue_store
+from logs import get_logger
+
+message_log = get_logger('state', per_message=True)
+
+# (stream, group, message_ids) acknowledged together with a state update
+Ack = Tuple[str, str, Sequence[str]]
+
+
+class RecordResult(NamedTuple):
+    """Outcome of recording one response"""
+    applied: bool  # False for duplicates, outdated answers and unknown invitations
+    known: bool    # False when the invitation is not pending
+    responded: int
+    expected: int
+    new_guest: bool = False  # the response was this guest's first, so ``responded`` just went up
+
+
+class SummaryData(NamedTuple):
+    """Everything generate_summary needs for one invitation"""
+    invitation: EventInvitation
+    expected: int
+    responded: int
+    counts: Dict[str, int]
+    responses: List[GuestResponse]
+
+
+class ResponseTally:
+    """Running yes/no/maybe counts for one invitation.
+
+    Only the latest response per guest is kept, so memory is bounded by the
+    number of distinct guests, and a guest changing their answer moves one
+    count instead of adding another.
+    """
+    __slots__ = ('counts', 'latest')
+
+    def __init__(self):
+        self.counts = {'yes': 0, 'no': 0, 'maybe': 0}
+        self.latest = {}  # guest_id -> latest GuestResponse
+
+    def record(self, response: GuestResponse) -> bool:
+        """Apply a response; returns False if an equal or newer one is already recorded"""
+        previous = self.latest.get(response.guest_id)
+        if previous is not None:
+            if previous.id == response.id or previous.timestamp > response.timestamp:
+                return False
+            self.counts[previous.response] -= 1
+        self.latest[response.guest_id] = response
+        self.counts[response.response] = self.counts.get(response.response, 0) + 1
+        return True
+
+    @property
+    def responded(self) -> int:
+        """Number of distinct guests that have answered"""
+        return len(self.latest)
+
+
+class MemoryCoordinatorState:
+    """Aggregation state kept in process memory (lost on restart)"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.pending_invitations = {}  # invitation_id -> invitation
+        self.guest_responses = {}  # invitation_id -> ResponseTally
+        self.expected_guests = {}  # invitation_id -> expected_count
+        self.fanouts = {}  # invitation_id -> guests invited so far, while fan-out is unfinished
+        # Min-heap of (deadline, invitation_id); entries of finished invitations are dropped lazily
+        self.deadlines = []
+
+    async def add_invitation(self, invitation: EventInvitation, expected: int, deadline: float = None) -> bool:
+        """Store a new invitation; False (and nothing changes) if it is already pending"""
+        if invitation.id in self.pending_invitations:
+            return False
+        self.pending_invitations[invitation.id] = invitation
+        self.guest_responses.setdefault(invitation.id, ResponseTally())
+        self.expected_guests[invitation.id] = expected
+        self.fanouts[invitation.id] = 0
+        if deadline is not None:
+            heapq.heappush(self.deadlines, (deadline, invitation.id))
+        return True
+
+    async def record_responses(self, responses: List[GuestResponse], ack: Ack = None) -> List[RecordResult]:
+        results = []
+        for response in responses:
+            tally = self.guest_responses.get(response.invitation_id)
+            if tally is None:
+                results.append(RecordResult(False, False, 0, 0))
+                continue
+            new_guest = response.guest_id not in tally.latest
+            applied = tally.record(response)
+            results.append(RecordResult(applied, True, tally.responded, self.expected_guests[response.invitation_id],
+                                        applied and new_guest))
+        if ack:
+            await self.redis_client.acknowledge_messages(*ack)
+        return results
+
+    async def load_summary(self, invitation_id: str, include_responses: bool = True) -> Optional[SummaryData]:
+        invitation = self.pending_invitations.get(invitation_id)
+        if not invitation:
+            return None
+        tally = self.guest_responses[invitation_id]
+        return SummaryData(invitation, self.expected_guests[invitation_id], tally.responded,
+                           dict(tally.counts), list(tally.latest.values()) if include_responses else [])
+
+    async def finish(self, invitation_id: str, summary_stream: str, summary_data: Dict,
+                     details: Tuple[SummaryDetails, List[str]] = None) -> str:
+        """Store any detail chunks, publish the summary and drop the invitation's state"""
+        if details:
+            pipe = self.redis_client.redis.pipeline(transaction=False)
+            queue_store(pipe, *details)
+            await pipe.execute()
+        message_id = await self.redis_client.publish_message(summary_stream, summary_data)
+        del self.pending_invitations[invitation_id]
+        self.guest_responses.pop(invitation_id, None)
+        del self.expected_guests[invitation_id]
+        self.fanouts.pop(invitation_id, None)
+        return message_id
+
+    async def fanout_progress(self, invitation_id: str) -> Optional[int]:
+        """Guests invited so far, or None once fan-out has finished"""
+        return self.fanouts.get(invitation_id)
+
+    async def record_fanout(self, invitation_id: str, published: int):
+        self.fanouts[invitation_id] = published
+
+    async def finish_fanout(self, invitation_id: str, expected: int) -> int:
+        """Mark fan-out finished and expect ``expected`` responses; returns the responses so far"""
+        self.fanouts.pop(invitation_id, None)
+        self.expected_guests[invitation_id] = expected
+        return self.guest_responses[invitation_id].responded
+
+    async def active_invitations(self) -> List[str]:
+        return list(self.pending_invitations)
+
+    async def completed_invitations(self) -> List[str]:
+        return [invitation_id for invitation_id, tally in self.guest_responses.items()
+                if tally.responded >= self.expected_guests[invitation_id]]
+
+    async def due_invitations(self, now: float) -> List[str]:
+        """Pending invitations whose RSVP deadline is at or before ``now``.
+
+        Like the Redis store's sorted set, the heap keeps an entry until
+        ``finish`` drops its invitation, so a summary that failed to send is
+        retried on the next check. Entries of finished invitations are dropped
+        once they reach the top of the heap.
+        """
+        heap = self.deadlines
+        while heap and heap[0][1] not in self.pending_invitations:
+            heapq.heappop(heap)
+        # Walk only the heap nodes that are due: a node's children are never earlier than it
+        due = {}
+        nodes = [0] if heap else []
+        while nodes:
+            index = nodes.pop()
+            deadline, invitation_id = heap[index]
+            if deadline > now:
+                continue
+            if invitation_id in self.pending_invitations:
+                due[invitation_id] = deadline
+            nodes.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(heap))
+        return sorted(due, key=due.get)
+
+
+# Records one response and returns {applied, responded, expected, new_guest};
+# applied is -1 when the invitation is unknown. The previous answer of the same
+# guest is replaced (and its count moved) unless it is the same response or newer.
+RECORD_RESPONSE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    return {-1, 0, 0, 0}
+end
+local applied = 1
+local new_guest = 0
+local previous = redis.call('HGET', KEYS[1], ARGV[1])
+if previous then
+    previous = cjson.decode(previous)
+    if previous['id'] == ARGV[3] or previous['timestamp'] > ARGV[4] then
+        applied = 0
+    else
+        redis.call('HINCRBY', KEYS[2], previous['response'], -1)
+    end
+else
+    redis.call('HINCRBY', KEYS[2], 'responded', 1)
+    new_guest = 1
+end
+if applied == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('HINCRBY', KEYS[2], ARGV[5], 1)
+end
+return {applied, tonumber(redis.call('HGET', KEYS[2], 'responded') or 0),
+        tonumber(redis.call('HGET', KEYS[3], 'expected') or 0), new_guest}
+"""
+
+
+class RedisCoordinatorState:
+    """Aggregation state kept in Redis so a coordinator can restart without losing events.
+
+    Per invitation there is a hash with the invitation fields and expected
+    count, a hash of the latest response per guest and a hash of counters.
+    RSVP deadlines are the scores of a sorted set of invitation IDs.
+    Responses are recorded by a Lua script queued in the same MULTI/EXEC as
+    the XACK of their messages, so a crash either keeps both or neither.
+    """
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.redis = redis_client.redis
+        self.prefix = Config.COORDINATOR_STATE_PREFIX
+        self.active_key = f"{self.prefix}:active"
+        self.deadlines_key = f"{self.prefix}:deadlines"
+        self.record_script = self.redis.register_script(RECORD_RESPONSE_SCRIPT)
+
+    def _keys(self, invitation_id: str) -> Tuple[str, str, str]:
+        # Hash tag keeps one invitation's keys in the same cluster slot
+        tag = f"{{{invitation_id}}}"
+        return (f"{self.prefix}:responses:{tag}", f"{self.prefix}:tally:{tag}", f"{self.prefix}:invitation:{tag}")
+
+    async def add_invitation(self, invitation: EventInvitation, expected: int, deadline: float = None) -> bool:
+        """Store a new invitation; False if it is already pending.
+
+        HSETNX tells the two apart inside the transaction. Writing a pending
+        invitation again only rewrites the same invitation fields; its
+        expected count, fan-out progress and deadline are set only once.
+        """
+        _, _, invitation_key = self._keys(invitation.id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hsetnx(invitation_key, 'id', invitation.id)
+        pipe.hset(invitation_key, mapping=invitation.to_redis_dict(FIELD_CODEC))
+        pipe.hsetnx(invitation_key, 'expected', expected)
+        pipe.hsetnx(invitation_key, 'published', 0)
+        pipe.sadd(self.active_key, invitation.id)
+        if deadline is not None:
+            pipe.zadd(self.deadlines_key, {invitation.id: deadline}, nx=True)
+        results = await pipe.execute()
+        return bool(results[0])
+
+    async def record_responses(self, responses: List[GuestResponse], ack: Ack = None) -> List[RecordResult]:
+        pipe = self.redis.pipeline(transaction=True)
+        for response in responses:
+            # The Lua script reads id/response/timestamp, so state always uses the field format
+            data = response.to_redis_dict(FIELD_CODEC)
+            await self.record_script(
+                keys=self._keys(response.invitation_id),
+                args=[response.guest_id, json.dumps(data), response.id, data['timestamp'], response.response],
+                client=pipe
+            )
+        if ack and ack[2]:
+            pipe.xack(ack[0], ack[1], *ack[2])
+        results = await pipe.execute()
+        return [RecordResult(applied == 1, applied != -1, responded, expected, new_guest == 1)
+                for applied, responded, expected, new_guest in results[:len(responses)]]
+
+    async def load_summary(self, invitation_id: str, include_responses: bool = True) -> Optional[SummaryData]:
+        responses_key, tally_key, invitation_key = self._keys(invitation_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(invitation_key)
+        pipe.hgetall(tally_key)
+        if include_responses:
+            pipe.hvals(responses_key)
+        invitation_data, tally, *responses = await pipe.execute()
+        responses = responses[0] if responses else []
+        if not invitation_data:
+            return None
+        expected = int(invitation_data.pop('expected'))
+        invitation_data.pop('published', None)
+        counts = {answer: int(tally.get(answer, 0)) for answer in ('yes', 'no', 'maybe')}
+        return SummaryData(
+            EventInvitation.from_trusted_dict(invitation_data),
+            expected,
+            int(tally.get('responded', 0)),
+            counts,
+            [GuestResponse.from_trusted_dict(json.loads(r)) for r in responses]
+        )
+
+    async def finish(self, invitation_id: str, summary_stream: str, summary_data: Dict,
+                     details: Tuple[SummaryDetails, List[str]] = None) -> str:
+        """Store any detail chunks, publish the summary and drop the invitation's state in one transaction"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xadd(summary_stream, summary_data, **self.redis_client._trim_args())
+        pipe.delete(*self._keys(invitation_id))
+        pipe.srem(self.active_key, invitation_id)
+        pipe.zrem(self.deadlines_key, invitation_id)
+        if details:
+            queue_store(pipe, *details)
+        message_id = (await pipe.execute())[0]
+        message_log.debug("📤 Published message %s to stream '%s'", message_id, summary_stream)
+        return message_id
+
+    async def fanout_progress(self, invitation_id: str) -> Optional[int]:
+        """Guests invited so far, or None once fan-out has finished"""
+        _, _, invitation_key = self._keys(invitation_id)
+        published = await self.redis.hget(invitation_key, 'published')
+        return None if published is None or int(published) < 0 else int(published)
+
+    async def record_fanout(self, invitation_id: str, published: int):
+        _, _, invitation_key = self._keys(invitation_id)
+        await self.redis.hset(invitation_key, 'published', published)
+
+    async def finish_fanout(self, invitation_id: str, expected: int) -> int:
+        """Mark fan-out finished (published = -1) and expect ``expected`` responses; returns the responses so far"""
+        _, tally_key, invitation_key = self._keys(invitation_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(invitation_key, mapping={'expected': expected, 'published': -1})
+        pipe.hget(tally_key, 'responded')
+        _, responded = await pipe.execute()
+        return int(responded or 0)
+
+    async def active_invitations(self) -> List[str]:
+        """Every invitation still waiting for its final summary"""
+        return [invitation_id async for invitation_id in self.redis.sscan_iter(self.active_key)]
+
+    async def completed_invitations(self) -> List[str]:
+        """Invitations whose responses are all in but whose summary was never sent"""
+        completed = []
+        async for invitation_id in self.redis.sscan_iter(self.active_key):
+            _, tally_key, invitation_key = self._keys(invitation_id)
+            expected = await self.redis.hget(invitation_key, 'expected')
+            responded = await self.redis.hget(tally_key, 'responded')
+            if expected is not None and int(responded or 0) >= int(expected):
+                completed.append(invitation_id)
+        return completed
+
+    async def due_invitations(self, now: float) -> List[str]:
+        """Pending invitations whose RSVP deadline is at or before ``now``.
+
+        They stay in the sorted set until ``finish`` removes them, so a
+        deadline is not lost if the coordinator stops before finalising it.
+        """
+        return await self.redis.zrangebyscore(self.deadlines_key, '-inf', now)
+
+
+def create_state(redis_client: RedisClient):
+    """Build the state store selected by Config.COORDINATOR_STATE.
+
+    The memory broker cannot run the Redis store's Lua script, so it always gets the memory store.
+    """
+    if Config.COORDINATOR_STATE == 'memory' or Config.BROKER_BACKEND == 'memory':
+        return MemoryCoordinatorState(redis_client)
+    return RedisCoordinatorState(redis_client)
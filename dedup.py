@@ -0,0 +1,125 @@
+"""Deduplication index for idempotent response ingestion.
+
+Streams deliver at least once. A response can reach the coordinator twice:
+- an entry claimed again after a crash;
+- a response forwarded to its owner again because the forwarding worker
+  died before its XACK;
+- a guest retrying a publish.
+
+The coordinator state already stores only the latest answer per
+(invitation, guest), so a duplicate never inflates the counts. This index
+lets the coordinator drop such duplicates before they cost a state round
+trip. That includes duplicates of responses whose invitation was already
+finalised and removed.
+
+A response is identified by its ``id`` (the same across forwarding and
+retries) and by its stream entry. The index holds:
+
+- an in-process LRU of the most recent ``DEDUP_CACHE_SIZE`` keys, always on;
+- with ``DEDUP_INDEX=redis``, Redis sets shared by all coordinator workers
+  and restarts. Each set is one key per ``DEDUP_TTL_SECONDS`` time bucket and
+  is kept for two buckets, so a key is remembered for one to two TTLs.
+
+Keys are added only after their batch was recorded, so a batch that failed
+is not mistaken for a duplicate when it is delivered again.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Sequence, Tuple
+from config import Config
+
+Keys = Tuple[str, ...]
+
+
+def response_keys(stream: str, message_id, response) -> Keys:
+    """The keys identifying one delivered response: its ID and its stream entry"""
+    if isinstance(message_id, bytes):
+        message_id = message_id.decode()
+    return f"r:{response.id}", f"m:{stream}:{message_id}"
+
+
+class LRUSet:
+    """A set that forgets its least recently added keys beyond ``capacity``"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.keys: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str):
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        while len(self.keys) > self.capacity:
+            self.keys.popitem(last=False)
+
+
+class RedisSeenSet:
+    """Seen keys in time-bucketed Redis sets, each expiring two buckets after it starts"""
+
+    def __init__(self, redis, prefix: str = None, ttl: float = None):
+        self.redis = redis
+        self.prefix = prefix or Config.DEDUP_PREFIX
+        self.ttl = ttl or Config.DEDUP_TTL_SECONDS
+
+    def buckets(self) -> Tuple[str, str]:
+        """The current bucket's key and the previous one's"""
+        bucket = int(time.time() // self.ttl)
+        return f"{self.prefix}:{bucket}", f"{self.prefix}:{bucket - 1}"
+
+    async def contains(self, keys: Sequence[str]) -> List[bool]:
+        if not keys:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in self.buckets():
+            pipe.smismember(bucket, list(keys))
+        current, previous = await pipe.execute()
+        return [bool(a) or bool(b) for a, b in zip(current, previous)]
+
+    async def add(self, keys: Sequence[str]):
+        if not keys:
+            return
+        bucket = self.buckets()[0]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(bucket, *keys)
+        pipe.expire(bucket, int(self.ttl * 2) + 1)
+        await pipe.execute()
+
+
+class DedupIndex:
+    """Answers "was this delivery seen before?" for batches of responses"""
+
+    def __init__(self, redis_client=None, backend: str = None, capacity: int = None):
+        backend = backend or Config.DEDUP_INDEX
+        self.recent = LRUSet(capacity or Config.DEDUP_CACHE_SIZE)
+        self.shared = RedisSeenSet(redis_client.redis) if backend == 'redis' and redis_client else None
+
+    async def seen(self, batch: Sequence[Keys]) -> List[bool]:
+        """For each entry of ``batch``, whether any of its keys was seen before or earlier in the batch"""
+        flags = [any(key in self.recent for key in keys) for keys in batch]
+        if self.shared is not None:
+            unknown = [index for index, flag in enumerate(flags) if not flag]
+            keys = [key for index in unknown for key in batch[index]]
+            found = iter(await self.shared.contains(keys))
+            for index in unknown:
+                # Consume every key's flag so the iterator stays aligned
+                flags[index] = any([next(found) for _ in batch[index]])
+        in_batch = set()
+        for index, keys in enumerate(batch):
+            if not flags[index] and any(key in in_batch for key in keys):
+                flags[index] = True
+            in_batch.update(keys)
+        return flags
+
+    async def remember(self, batch: Iterable[Keys]):
+        """Record the keys of deliveries that were processed"""
+        keys = [key for entry in batch for key in entry]
+        for key in keys:
+            self.recent.add(key)
+        if self.shared is not None:
+            await self.shared.add(keys)
@@ -1,46 +1,22 @@
 #!/usr/bin/env python3
 
 import asyncio
-import subprocess
-import sys
-import time
 import signal
+import sys
 from redis_client import RedisClient
+from logs import setup_logging
+from runner import ComponentRunner, parse_units
 
 class PubSubDemo:
     def __init__(self):
-        self.processes = []
         self.redis_client = RedisClient()
+        # Every component runs in this event loop; the runner starts and drains them
+        self.runner = ComponentRunner(parse_units(['coordinator', 'guests', 'host']))
     
-    def cleanup_redis(self):
+    async def cleanup_redis(self):
         """Clean up Redis streams for a fresh demo"""
         print("🧹 Cleaning up Redis streams for fresh demo...")
-        self.redis_client.cleanup_streams()
-        time.sleep(1)
-    
-    def start_component(self, script_name, component_name):
-        """Start a component as a separate process"""
-        print(f"🚀 Starting {component_name}...")
-        process = subprocess.Popen([
-            sys.executable, script_name
-        ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-           universal_newlines=True, bufsize=1)
-        
-        self.processes.append((process, component_name))
-        return process
-    
-    def stop_all_processes(self):
-        """Stop all running processes"""
-        print("\n🛑 Stopping all components...")
-        for process, name in self.processes:
-            if process.poll() is None:  # Process is still running
-                print(f"   Stopping {name}...")
-                process.terminate()
-                try:
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    process.kill()
-        self.processes.clear()
+        await self.redis_client.cleanup_streams()
     
     async def run_demo(self):
         """Run the complete demo"""
@@ -48,7 +24,7 @@ class PubSubDemo:
         print("=" * 60)
         
         # Clean up any previous state
-        self.cleanup_redis()
+        await self.cleanup_redis()
         
         print("\n📋 DEMO OVERVIEW:")
         print("1. 🎛️  Coordinator will start and listen for invitations and responses")
@@ -61,20 +37,13 @@ class PubSubDemo:
         input("\n⏸️  Press Enter to start the demo...")
         
         try:
-            # Start Coordinator
-            print("\n🎛️  STARTING COORDINATOR...")
-            coordinator_process = self.start_component("coordinator.py", "Coordinator")
-            await asyncio.sleep(2)  # Give coordinator time to initialize
-            
-            # Start Guests
-            print("\n👥 STARTING EVENT GUESTS...")
-            guests_process = self.start_component("event_guest.py", "Event Guests")
-            await asyncio.sleep(3)  # Give guests time to initialize
+            print("\n🚀 STARTING COORDINATOR, EVENT GUESTS AND EVENT HOST...")
+            ready_in = await self.runner.start()
+            print(f"✅ All components ready in {ready_in:.2f}s (consumer groups created)")
             
-            # Start Host (this will create and send the invitation)
-            print("\n🎯 STARTING EVENT HOST...")
-            print("📤 The host will automatically create and send an invitation...")
-            host_process = self.start_component("event_host.py", "Event Host")
+            # The host creates and sends the invitation only once everyone is listening
+            print("📤 The host will now create and send an invitation...")
+            await self.runner.publish_invitations()
             
             print("\n🔄 DEMO IS NOW RUNNING!")
             print("=" * 40)
@@ -87,30 +56,38 @@ class PubSubDemo:
             print("   📡 All messages flowing through Redis Pub/Sub streams")
             print("=" * 40)
             
-            # Let the demo run for a reasonable time
-            print("\n⏳ Demo will run for 30 seconds to show the complete flow...")
-            await asyncio.sleep(30)
+            # Run until the host has its summary (at most 30 seconds)
+            print("\n⏳ Demo will run until the host receives its summary (at most 30 seconds)...")
+            hosts = self.runner.hosts
+            await self.runner.wait(30, until=lambda: all(host.summaries_received for host in hosts))
             
             print("\n🎬 DEMO COMPLETED!")
             print("✅ You should have seen the complete Pub/Sub event planning flow!")
             print("📡 All communication was handled via Redis Streams")
             
-        except KeyboardInterrupt:
-            print("\n🛑 Demo interrupted by user")
         finally:
-            self.stop_all_processes()
+            print("\n🛑 Stopping all components...")
+            await self.runner.shutdown()
+            await self.redis_client.close()
     
-    def signal_handler(self, signum, frame):
+    def signal_handler(self):
         """Handle interrupt signals"""
         print("\n🛑 Received interrupt signal...")
-        self.stop_all_processes()
-        sys.exit(0)
+        self.runner.stop()
+
+async def check_redis():
+    """Ping Redis once before starting the demo"""
+    redis_client = RedisClient()
+    try:
+        await redis_client.redis.ping()
+    finally:
+        await redis_client.close()
 
 async def main():
     demo = PubSubDemo()
     
-    # Set up signal handler
-    signal.signal(signal.SIGINT, demo.signal_handler)
+    # Set up signal handler; the components drain before the demo exits
+    asyncio.get_running_loop().add_signal_handler(signal.SIGINT, demo.signal_handler)
     
     await demo.run_demo()
 
@@ -125,12 +102,12 @@ if __name__ == "__main__":
     
     # Check if Redis is available
     try:
-        redis_client = RedisClient()
-        redis_client.redis.ping()
+        asyncio.run(check_redis())
         print("✅ Redis connection successful!")
     except Exception as e:
         print(f"❌ Redis connection failed: {e}")
         print("🔧 Please start Redis server and try again")
         sys.exit(1)
     
+    setup_logging()
     asyncio.run(main())
\ No newline at end of file
@@ -1,32 +1,123 @@
 #!/usr/bin/env python3
 
+import argparse
 import asyncio
+import time
 import uuid
 import random
-from datetime import datetime
 import sys
 import signal
+from typing import List
 from redis_client import RedisClient
-from models import EventInvitation, GuestResponse
+from models import EventInvitation, GuestResponse, ResponseView
 from config import Config
+from routing import guest_stream, guest_group
+from response_generator import ResponseSampler, preference_matrix
+from backpressure import WorkQueue
+from logs import get_logger, setup_logging
+from metrics import MESSAGES, STAGE_SECONDS, MetricsEndpoint
+
+log = get_logger('guest')
+message_log = get_logger('guest', per_message=True)
+
+STATUS_EMOJI = {"yes": "✅", "no": "❌", "maybe": "❓"}
+
+# Messages guests send with each kind of response
+RESPONSE_MESSAGES = {
+    'yes': [
+        "Looking forward to it!",
+        "Count me in!",
+        "Sounds great, I'll be there!",
+        "Yes, definitely attending!",
+        "Can't wait to join!",
+        "I'll definitely be there!"
+    ],
+    'no': [
+        "Sorry, I have a conflict that day.",
+        "Unfortunately, I can't make it.",
+        "I have another commitment.",
+        "Sorry, won't be able to attend.",
+        "Previous engagement, sorry!",
+        "Wish I could, but I'm not available."
+    ],
+    'maybe': [
+        "I'll try my best to make it.",
+        "Tentatively yes, but might change.",
+        "Let me check my schedule and confirm.",
+        "Possibly, depends on other meetings.",
+        "I'll confirm closer to the date.",
+        "Hoping to attend, but not 100% sure yet."
+    ]
+}
+
+# The demo guests: (name, guest ID, preferences)
+DEMO_GUESTS = [
+    ("Alice Chen", "guest_1", {
+        'response_delay': 2.0,
+        'likely_response': 'yes',
+        'response_probability': {'yes': 0.7, 'maybe': 0.2, 'no': 0.1}
+    }),
+    ("Bob Rodriguez", "guest_2", {
+        'response_delay': 3.0,
+        'likely_response': 'maybe',
+        'response_probability': {'yes': 0.3, 'maybe': 0.5, 'no': 0.2}
+    }),
+    ("Carol Williams", "guest_3", {
+        'response_delay': 1.5,
+        'likely_response': 'yes',
+        'response_probability': {'yes': 0.8, 'maybe': 0.1, 'no': 0.1}
+    }),
+    ("David Kim", "guest_4", {
+        'response_delay': 4.0,
+        'likely_response': 'no',
+        'response_probability': {'yes': 0.2, 'maybe': 0.2, 'no': 0.6}
+    }),
+    ("Emma Thompson", "guest_5", {
+        'response_delay': 2.5,
+        'likely_response': 'maybe',
+        'response_probability': {'yes': 0.4, 'maybe': 0.4, 'no': 0.2}
+    })
+]
+
+# Draws every guest response in this process, one guest or many at a time (see response_generator.py)
+RESPONSE_SAMPLER = ResponseSampler(RESPONSE_MESSAGES)
+
+DECODE_SECONDS = STAGE_SECONDS.labels(component='guest', stage='decode')
+RESPOND_SECONDS = STAGE_SECONDS.labels(component='guest', stage='respond')
+INVITATIONS = MESSAGES.labels(component='guest', kind='invitation')
+RESPONSES = MESSAGES.labels(component='guest', kind='response')
 
 class EventGuest:
-    def __init__(self, guest_name: str, guest_id: str = None, preferences: dict = None):
+    def __init__(self, guest_name: str, guest_id: str = None, preferences: dict = None, worker: int = 0):
         self.guest_name = guest_name
         self.guest_id = guest_id or str(uuid.uuid4())
         self.preferences = preferences or self._default_preferences()
+        # Likely response and cumulative weights, worked out once for RESPONSE_SAMPLER
+        self.response_profile = preference_matrix([self.preferences])[:2]
         self.redis_client = RedisClient()
         self.running = True
         
+        # Invitations arrive on this guest's own delivery stream
+        self.delivery_stream = guest_stream(self.guest_id)
+        self.delivery_group = guest_group(self.guest_id)
+        # Worker processes running the same guest share its group under their own consumer names
+        self.consumer = f"guest_{self.guest_id}" if worker == 0 else f"guest_{self.guest_id}_{worker}"
+        # Handled invitations not yet acknowledged; the read loop sends them in one XACK
+        self.acks = []
+    
+    async def start(self):
+        """Connect to Redis and create the guest consumer group"""
+        await self.redis_client.connect()
+        
         # Create consumer group for receiving invitations
-        self.redis_client.create_consumer_group(
-            Config.INVITATION_STREAM, 
-            Config.GUEST_GROUP
+        await self.redis_client.create_consumer_group(
+            self.delivery_stream, 
+            self.delivery_group
         )
         
-        print(f"👤 Guest '{self.guest_name}' (ID: {self.guest_id}) initialized")
-        print(f"🎯 Preferences: {self.preferences}")
-        print(f"🔗 Connected to Redis Pub/Sub system")
+        log.info("👤 Guest '%s' (ID: %s) initialized", self.guest_name, self.guest_id)
+        log.info("🎯 Preferences: %s", self.preferences)
+        log.info("🔗 Connected to Redis Pub/Sub system")
     
     def _default_preferences(self):
         """Default guest preferences"""
@@ -41,201 +132,222 @@ class EventGuest:
         }
     
     async def listen_for_invitations(self):
-        """Listen for invitations from the coordinator via Redis Streams"""
-        print(f"👂 {self.guest_name} is listening for invitations...")
+        """Listen for invitations from the coordinator via Redis Streams.
         
-        while self.running:
-            try:
-                messages = self.redis_client.consume_messages(
-                    Config.INVITATION_STREAM,
-                    Config.GUEST_GROUP,
-                    f"guest_{self.guest_id}",
-                    count=1,
-                    block=1000
-                )
-                
-                for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        # Check if this invitation is for this guest or is a general invitation
-                        target_guest_id = fields.get('target_guest_id')
-                        if target_guest_id and target_guest_id != self.guest_id:
-                            # This invitation is for a different guest, skip it
-                            continue
-                        
-                        invitation = EventInvitation.from_redis_dict(fields)
-                        await self.process_invitation(invitation)
-                        
-                        # Acknowledge the message
-                        self.redis_client.acknowledge_message(
-                            Config.INVITATION_STREAM,
-                            Config.GUEST_GROUP,
-                            message_id
-                        )
-                        
-            except Exception as e:
-                if self.running:
-                    print(f"❌ Error listening for invitations: {e}")
-                await asyncio.sleep(1)
-    
-    async def process_invitation(self, invitation: EventInvitation):
-        """Process an invitation and generate a response"""
-        print(f"\n📨 {self.guest_name} RECEIVED INVITATION VIA REDIS")
-        print(f"🎉 Event: {invitation.event_name}")
-        print(f"👤 Host: {invitation.host_name}")
-        print(f"📅 Date: {invitation.event_date} at {invitation.event_time}")
-        print(f"📍 Location: {invitation.location}")
-        print(f"📝 Description: {invitation.description}")
+        Invitations go to a bounded queue whose handlers think and answer
+        concurrently (GUEST_CONCURRENCY). Reading pauses while GUEST_QUEUE_SIZE
+        invitations are queued or in flight.
+        """
+        log.info("👂 %s is listening for invitations...", self.guest_name)
+        work = WorkQueue('guest', self.guest_id, self.handle_invitation,
+                         Config.GUEST_CONCURRENCY, Config.GUEST_QUEUE_SIZE)
+        work.start()
         
+        try:
+            while self.running:
+                try:
+                    await self.flush_acks()
+                    if not await work.wait(Config.CONSUMER_BLOCK_MS / 1000):
+                        continue
+                    
+                    room = work.room
+                    messages = await self.redis_client.consume_messages(
+                        self.delivery_stream,
+                        self.delivery_group,
+                        self.consumer,
+                        count=Config.CONSUMER_BATCH_SIZE if room is None else min(Config.CONSUMER_BATCH_SIZE, room),
+                        block=Config.CONSUMER_BLOCK_MS
+                    )
+                    
+                    for stream, stream_messages in messages:
+                        for message_id, fields in stream_messages:
+                            # A shard stream also carries other guests' invitations;
+                            # they are acknowledged in this guest's private group and skipped
+                            target_guest_id = fields.get('target_guest_id')
+                            if target_guest_id and target_guest_id != self.guest_id:
+                                self.acks.append(message_id)
+                                continue
+                            
+                            # Answer on the stream of the coordinator worker that owns the invitation
+                            reply_stream = fields.get('reply_stream') or Config.RESPONSE_STREAM
+                            started = time.perf_counter()
+                            invitation = EventInvitation.from_trusted_dict(fields)
+                            DECODE_SECONDS.observe(time.perf_counter() - started)
+                            INVITATIONS.inc()
+                            await work.put((message_id, invitation, reply_stream))
+                            
+                except Exception as e:
+                    if self.running:
+                        log.error("❌ Error listening for invitations: %s", e)
+                    await asyncio.sleep(1)
+            
+            # Answer everything already read before stopping
+            await work.drain()
+        finally:
+            work.stop()
+            await self.flush_acks()
+    
+    async def handle_invitation(self, item):
+        """Work queue handler: answer one invitation, then mark it for acknowledgement"""
+        message_id, invitation, reply_stream = item
+        await self.process_invitation(invitation, reply_stream)
+        self.acks.append(message_id)
+    
+    async def flush_acks(self):
+        """Acknowledge every handled invitation with a single XACK"""
+        if not self.acks:
+            return
+        processed, self.acks = self.acks, []
+        try:
+            await self.redis_client.acknowledge_messages(self.delivery_stream, self.delivery_group, processed)
+        except Exception:
+            self.acks[:0] = processed
+            raise
+    
+    async def process_invitation(self, invitation: EventInvitation, reply_stream: str = Config.RESPONSE_STREAM):
+        """Process an invitation and generate a response"""
         # Simulate thinking time
         thinking_time = self.preferences['response_delay']
-        print(f"🤔 {self.guest_name} is thinking... (will respond in {thinking_time:.1f}s)")
+        message_log.info(
+            "\n📨 %s RECEIVED INVITATION VIA REDIS\n🎉 Event: %s\n👤 Host: %s\n📅 Date: %s at %s\n"
+            "📍 Location: %s\n📝 Description: %s\n🤔 %s is thinking... (will respond in %.1fs)",
+            self.guest_name, invitation.event_name, invitation.host_name, invitation.event_date,
+            invitation.event_time, invitation.location, invitation.description, self.guest_name, thinking_time
+        )
         await asyncio.sleep(thinking_time)
         
         # Generate response
         response = self._generate_response(invitation)
         
         # Send response
-        await self.send_response(response)
+        await self.send_response(response, reply_stream)
     
-    def _generate_response(self, invitation: EventInvitation) -> GuestResponse:
+    def _generate_response(self, invitation: EventInvitation) -> ResponseView:
         """Generate a response based on guest preferences"""
-        # Use preferences to influence response
-        likely_response = self.preferences.get('likely_response', 'maybe')
-        probabilities = self.preferences.get('response_probability', {
-            'yes': 0.4, 'maybe': 0.3, 'no': 0.3
-        })
-        
-        # Add some randomness but bias toward likely response
-        if random.random() < 0.7:  # 70% chance to follow preference
-            response_choice = likely_response
-        else:  # 30% chance for random response
-            choices = list(probabilities.keys())
-            weights = list(probabilities.values())
-            response_choice = random.choices(choices, weights=weights)[0]
-        
-        # Generate appropriate message
-        messages = {
-            'yes': [
-                "Looking forward to it!",
-                "Count me in!",
-                "Sounds great, I'll be there!",
-                "Yes, definitely attending!",
-                "Can't wait to join!",
-                "I'll definitely be there!"
-            ],
-            'no': [
-                "Sorry, I have a conflict that day.",
-                "Unfortunately, I can't make it.",
-                "I have another commitment.",
-                "Sorry, won't be able to attend.",
-                "Previous engagement, sorry!",
-                "Wish I could, but I'm not available."
-            ],
-            'maybe': [
-                "I'll try my best to make it.",
-                "Tentatively yes, but might change.",
-                "Let me check my schedule and confirm.",
-                "Possibly, depends on other meetings.",
-                "I'll confirm closer to the date.",
-                "Hoping to attend, but not 100% sure yet."
-            ]
-        }
-        
-        response_message = random.choice(messages[response_choice])
-        
-        return GuestResponse(
-            id=str(uuid.uuid4()),
-            invitation_id=invitation.id,
-            guest_name=self.guest_name,
-            guest_id=self.guest_id,
-            response=response_choice,
-            message=response_message,
-            timestamp=datetime.now()
-        )
+        # A batch of one from the shared sampler: the same draws the bulk generators make.
+        # The guest wrote every value itself, so the response skips model validation.
+        likely, table = self.response_profile
+        return RESPONSE_SAMPLER.views(invitation.id, [self.guest_id], [self.guest_name], likely, table)[0]
     
-    async def send_response(self, response: GuestResponse):
+    async def send_response(self, response: GuestResponse, reply_stream: str = Config.RESPONSE_STREAM):
         """Send response back to coordinator via Redis Streams"""
-        status_emoji = {"yes": "✅", "no": "❌", "maybe": "❓"}.get(response.response, "❓")
-        
-        print(f"\n📤 {self.guest_name} SENDING RESPONSE")
-        print(f"{status_emoji} Response: {response.response.upper()}")
-        print(f"💬 Message: \"{response.message}\"")
-        
-        self.redis_client.publish_message(
-            Config.RESPONSE_STREAM,
+        started = time.perf_counter()
+        await self.redis_client.publish_message(
+            reply_stream,
             response.to_redis_dict()
         )
+        RESPOND_SECONDS.observe(time.perf_counter() - started)
+        RESPONSES.inc()
         
-        print(f"✅ Response sent to coordinator via Redis Streams")
+        message_log.info(
+            "\n📤 %s SENDING RESPONSE\n%s Response: %s\n💬 Message: \"%s\"\n✅ Response sent to coordinator via Redis Streams",
+            self.guest_name, STATUS_EMOJI.get(response.response, "❓"), response.response.upper(), response.message
+        )
+    
+    @staticmethod
+    def generate_responses(guests: List['EventGuest'], invitation: EventInvitation,
+                           sampler: ResponseSampler = None) -> List[GuestResponse]:
+        """Responses of many guests to one invitation, drawn in bulk.
+        
+        Same distribution as calling ``_generate_response`` on each guest, at a
+        fraction of the cost for large simulations (see response_generator.py).
+        """
+        return (sampler or RESPONSE_SAMPLER).responses(invitation.id, *EventGuest._bulk_arguments(guests))
+    
+    @staticmethod
+    def generate_response_dicts(guests: List['EventGuest'], invitation: EventInvitation,
+                                sampler: ResponseSampler = None) -> List[dict]:
+        """Like ``generate_responses``, but encoded straight to wire dicts without building models"""
+        return (sampler or RESPONSE_SAMPLER).redis_dicts(invitation.id, *EventGuest._bulk_arguments(guests))
+    
+    @staticmethod
+    def _bulk_arguments(guests: List['EventGuest']):
+        likely, table, row_index = preference_matrix([guest.preferences for guest in guests])
+        return (
+            [guest.guest_id for guest in guests],
+            [guest.guest_name for guest in guests],
+            likely,
+            table,
+            row_index
+        )
+    
+    def listeners(self):
+        """The coroutines that run the guest once it has started"""
+        return [self.listen_for_invitations()]
+    
+    def consumer_groups(self):
+        """The (stream, group) pairs this guest reads, for lag and pending metrics"""
+        return [(self.delivery_stream, self.delivery_group)]
     
     def stop(self):
         """Stop the guest"""
         self.running = False
-        print(f"\n🛑 Guest '{self.guest_name}' stopping...")
+        log.info("\n🛑 Guest '%s' stopping...", self.guest_name)
+    
+    async def close(self):
+        """Release the Redis connection"""
+        await self.redis_client.close()
 
 def signal_handler(signum, frame):
-    print("\n🛑 Received interrupt signal...")
+    log.info("\n🛑 Received interrupt signal...")
     sys.exit(0)
 
-async def main():
+async def main(metrics_port: int = None):
     signal.signal(signal.SIGINT, signal_handler)
     
     # Create guest instances with different preferences
-    guests = [
-        EventGuest("Alice Chen", "guest_1", {
-            'response_delay': 2.0,
-            'likely_response': 'yes',
-            'response_probability': {'yes': 0.7, 'maybe': 0.2, 'no': 0.1}
-        }),
-        EventGuest("Bob Rodriguez", "guest_2", {
-            'response_delay': 3.0,
-            'likely_response': 'maybe',
-            'response_probability': {'yes': 0.3, 'maybe': 0.5, 'no': 0.2}
-        }),
-        EventGuest("Carol Williams", "guest_3", {
-            'response_delay': 1.5,
-            'likely_response': 'yes',
-            'response_probability': {'yes': 0.8, 'maybe': 0.1, 'no': 0.1}
-        }),
-        EventGuest("David Kim", "guest_4", {
-            'response_delay': 4.0,
-            'likely_response': 'no',
-            'response_probability': {'yes': 0.2, 'maybe': 0.2, 'no': 0.6}
-        }),
-        EventGuest("Emma Thompson", "guest_5", {
-            'response_delay': 2.5,
-            'likely_response': 'maybe',
-            'response_probability': {'yes': 0.4, 'maybe': 0.4, 'no': 0.2}
-        })
-    ]
+    guests = [EventGuest(name, guest_id, preferences) for name, guest_id, preferences in DEMO_GUESTS]
+    
+    await asyncio.gather(*(guest.start() for guest in guests))
+    
+    metrics_port = Config.METRICS_PORT if metrics_port is None else metrics_port
+    metrics_endpoint = None
+    if metrics_port:
+        metrics_endpoint = MetricsEndpoint(metrics_port, guests[0].redis_client, [
+            pair for guest in guests for pair in guest.consumer_groups()
+        ])
+        await metrics_endpoint.start()
     
     # Start all guests listening concurrently
-    tasks = []
-    for guest in guests:
-        task = asyncio.create_task(guest.listen_for_invitations())
-        tasks.append(task)
+    tasks = [asyncio.create_task(listener) for guest in guests for listener in guest.listeners()]
     
     try:
-        print("👥 All guests are now listening for invitations...")
-        print("💡 Each guest has different response preferences and delays")
-        print("🔄 Guests will automatically respond when they receive invitations")
-        print("📡 All communication via Redis Pub/Sub streams")
+        log.info("👥 All guests are now listening for invitations...")
+        log.info("💡 Each guest has different response preferences and delays")
+        log.info("🔄 Guests will automatically respond when they receive invitations")
+        log.info("📡 All communication via Redis Pub/Sub streams")
         
         # Run all guest listeners concurrently
         await asyncio.gather(*tasks)
         
     except KeyboardInterrupt:
-        print("\n🛑 Guests interrupted by user")
+        log.info("\n🛑 Guests interrupted by user")
     finally:
         for guest in guests:
             guest.stop()
+        if metrics_endpoint:
+            await metrics_endpoint.stop()
         for task in tasks:
             task.cancel()
+        for guest in guests:
+            await guest.close()
 
 if __name__ == "__main__":
-    print("👥 STARTING EVENT GUESTS - PUB/SUB COMPONENT")
-    print("=" * 50)
-    print("📡 This component receives invitations and sends responses")
-    print("🔗 Uses Redis Streams for Pub/Sub messaging")
-    print("=" * 50)
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Event guests")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve /metrics on this port (default: METRICS_PORT, 0 = off)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='run every guest in this many processes, one event loop each (metrics are aggregated)')
+    args = parser.parse_args()
+    
+    setup_logging()
+    log.info("👥 STARTING EVENT GUESTS - PUB/SUB COMPONENT")
+    log.info("=" * 50)
+    log.info("📡 This component receives invitations and sends responses")
+    log.info("🔗 Uses Redis Streams for Pub/Sub messaging")
+    log.info("=" * 50)
+    if args.workers > 1:
+        # Each process runs every guest; they share each guest's group (runner imports this module)
+        from runner import run_pool, worker_shares
+        sys.exit(run_pool(worker_shares(['guests'], args.workers), metrics_port=args.metrics_port))
+    asyncio.run(main(args.metrics_port))
\ No newline at end of file
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
+import argparse
 import asyncio
+import logging
+import time
 import uuid
 from datetime import datetime
 import sys
@@ -8,22 +11,47 @@ import signal
 from redis_client import RedisClient
 from models import EventInvitation, EventSummary
 from config import Config
+from routing import summary_stream, summary_group
+from guest_registry import GUEST_LIST_FIELD
+from summary_details import SummaryDetails, iter_details
+from logs import get_logger, setup_logging
+from metrics import MESSAGES, STAGE_SECONDS, MetricsEndpoint
+
+log = get_logger('host')
+message_log = get_logger('host', per_message=True)
+
+STATUS_EMOJI = {"yes": "✅", "no": "❌", "maybe": "❓"}
+
+DECODE_SECONDS = STAGE_SECONDS.labels(component='host', stage='decode')
+SUMMARY_SECONDS = STAGE_SECONDS.labels(component='host', stage='summary')
+SUMMARIES = MESSAGES.labels(component='host', kind='summary')
 
 class EventHost:
-    def __init__(self, host_name: str, host_id: str = None):
+    def __init__(self, host_name: str, host_id: str = None, guest_list: str = None):
         self.host_name = host_name
         self.host_id = host_id or str(uuid.uuid4())
+        # Registry list the coordinator should invite ('' lets it pick, see guest_registry.py)
+        self.guest_list = Config.HOST_GUEST_LIST if guest_list is None else guest_list
         self.redis_client = RedisClient()
         self.running = True
+        self.summaries_received = 0  # final summaries (complete or deadline) for this host
+        
+        # Summaries arrive on this host's own partition
+        self.summary_stream = summary_stream(self.host_id)
+        self.summary_group = summary_group(self.host_id)
+    
+    async def start(self):
+        """Connect to Redis and create the host consumer group"""
+        await self.redis_client.connect()
         
         # Create consumer group for receiving summaries
-        self.redis_client.create_consumer_group(
-            Config.SUMMARY_STREAM, 
-            Config.HOST_GROUP
+        await self.redis_client.create_consumer_group(
+            self.summary_stream, 
+            self.summary_group
         )
         
-        print(f"🎯 Event Host '{self.host_name}' (ID: {self.host_id}) initialized")
-        print(f"🔗 Connected to Redis Pub/Sub system")
+        log.info("🎯 Event Host '%s' (ID: %s) initialized", self.host_name, self.host_id)
+        log.info("🔗 Connected to Redis Pub/Sub system")
     
     def create_invitation(self, event_name: str, event_date: str, event_time: str, 
                          location: str, description: str) -> EventInvitation:
@@ -41,129 +69,220 @@ class EventHost:
         )
         return invitation
     
-    def publish_invitation(self, invitation: EventInvitation):
+    async def publish_invitation(self, invitation: EventInvitation):
         """Publish an invitation to the coordinator via Redis Streams"""
-        print(f"\n📤 PUBLISHING INVITATION")
-        print(f"🎉 Event: {invitation.event_name}")
-        print(f"📅 Date: {invitation.event_date} at {invitation.event_time}")
-        print(f"📍 Location: {invitation.location}")
-        print(f"📝 Description: {invitation.description}")
+        message_log.info(
+            "\n📤 PUBLISHING INVITATION\n🎉 Event: %s\n📅 Date: %s at %s\n📍 Location: %s\n📝 Description: %s",
+            invitation.event_name, invitation.event_date, invitation.event_time, invitation.location,
+            invitation.description
+        )
         
-        message_id = self.redis_client.publish_message(
+        data = invitation.to_redis_dict()
+        if self.guest_list:
+            data[GUEST_LIST_FIELD] = self.guest_list
+        message_id = await self.redis_client.publish_message(
             Config.INVITATION_STREAM,
-            invitation.to_redis_dict()
+            data
         )
         
-        print(f"✅ Invitation published to Redis stream with ID: {message_id}")
+        message_log.info("✅ Invitation published to Redis stream with ID: %s", message_id)
         return message_id
     
     async def listen_for_summaries(self):
         """Listen for event summaries from the coordinator via Redis Streams"""
-        print(f"👂 Listening for event summaries...")
+        log.info("👂 Listening for event summaries...")
         
         while self.running:
             try:
-                messages = self.redis_client.consume_messages(
-                    Config.SUMMARY_STREAM,
-                    Config.HOST_GROUP,
+                messages = await self.redis_client.consume_messages(
+                    self.summary_stream,
+                    self.summary_group,
                     f"host_{self.host_id}",
-                    count=1,
-                    block=1000
+                    count=Config.CONSUMER_BATCH_SIZE,
+                    block=Config.CONSUMER_BLOCK_MS
                 )
                 
                 for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        # Check if this summary is for this host
-                        if fields.get('host_id') == self.host_id:
-                            summary = EventSummary.from_redis_dict(fields)
-                            self.process_summary(summary)
-                            
-                            # Acknowledge the message
-                            self.redis_client.acknowledge_message(
-                                Config.SUMMARY_STREAM,
-                                Config.HOST_GROUP,
-                                message_id
-                            )
+                    processed = []
+                    try:
+                        for message_id, fields in stream_messages:
+                            # A hash partition also carries other hosts' summaries;
+                            # they are acknowledged in this host's private group and skipped
+                            started = time.perf_counter()
+                            summary = EventSummary.from_trusted_dict(fields)
+                            DECODE_SECONDS.observe(time.perf_counter() - started)
+                            if summary.host_id == self.host_id and fields.get('status') == 'progress':
+                                self.process_progress(summary)
+                            elif summary.host_id == self.host_id:
+                                started = time.perf_counter()
+                                self.process_summary(summary, fields.get('status', 'complete'))
+                                SUMMARY_SECONDS.observe(time.perf_counter() - started)
+                                SUMMARIES.inc()
+                                self.summaries_received += 1
+                                # Large events: the counts are out, now the responses
+                                details = SummaryDetails.from_fields(fields)
+                                if details:
+                                    await self.stream_summary_details(details)
+                            processed.append(message_id)
+                    finally:
+                        # Acknowledge the whole batch with a single XACK
+                        await self.redis_client.acknowledge_messages(
+                            self.summary_stream,
+                            self.summary_group,
+                            processed
+                        )
                         
             except Exception as e:
                 if self.running:
-                    print(f"❌ Error listening for summaries: {e}")
+                    log.error("❌ Error listening for summaries: %s", e)
                 await asyncio.sleep(1)
     
-    def process_summary(self, summary: EventSummary):
-        """Process and display the event summary"""
-        print(f"\n🎉 RECEIVED EVENT SUMMARY VIA REDIS PUB/SUB")
-        print(f"=" * 50)
-        print(f"📊 Event Summary for Invitation ID: {summary.invitation_id}")
-        print(f"👥 Total Invited: {summary.total_invited}")
-        print(f"📝 Total Responses: {summary.total_responses}")
-        print(f"✅ Attending: {summary.yes_count}")
-        print(f"❓ Maybe: {summary.maybe_count}")
-        print(f"❌ Not Attending: {summary.no_count}")
-        print(f"📈 Response Rate: {(summary.total_responses/summary.total_invited)*100:.1f}%")
-        print(f"🎯 Attendance Rate: {(summary.yes_count/summary.total_invited)*100:.1f}%")
+    def process_progress(self, summary: EventSummary):
+        """Display a progress summary: the counts so far, while guests are still answering"""
+        message_log.info(
+            "📈 Progress for invitation %s: %d/%d responses (✅ %d ❓ %d ❌ %d)",
+            summary.invitation_id, summary.total_responses, summary.total_invited,
+            summary.yes_count, summary.maybe_count, summary.no_count
+        )
+    
+    def process_summary(self, summary: EventSummary, status: str = 'complete'):
+        """Process and display the event summary; ``status`` is 'deadline' when guests never replied"""
+        # The detail lines are only built when the record will actually be emitted
+        if not message_log.isEnabledFor(logging.INFO):
+            return
         
-        print(f"\n📋 DETAILED RESPONSES:")
-        print("-" * 30)
+        if summary.responses or not summary.total_responses:
+            details = "\n".join(self._detail_lines(summary.responses))
+        else:
+            details = "(streamed from the summary detail store below)"
         
-        for response in summary.responses:
-            status_emoji = {"yes": "✅", "no": "❌", "maybe": "❓"}.get(response.response, "❓")
-            print(f"{status_emoji} {response.guest_name}: {response.response.upper()}")
+        if status == 'deadline':
+            closing = f"⏰ RSVP deadline reached! {summary.total_invited - summary.total_responses} guest(s) never replied."
+        else:
+            closing = "🎊 Summary complete! Event planning finished via Pub/Sub."
+        
+        message_log.info(
+            "\n🎉 RECEIVED EVENT SUMMARY VIA REDIS PUB/SUB\n%s\n📊 Event Summary for Invitation ID: %s\n"
+            "👥 Total Invited: %d\n📝 Total Responses: %d\n✅ Attending: %d\n❓ Maybe: %d\n❌ Not Attending: %d\n"
+            "📈 Response Rate: %.1f%%\n🎯 Attendance Rate: %.1f%%\n\n📋 DETAILED RESPONSES:\n%s\n%s\n\n"
+            "%s\n%s",
+            "=" * 50, summary.invitation_id, summary.total_invited, summary.total_responses,
+            summary.yes_count, summary.maybe_count, summary.no_count,
+            (summary.total_responses/max(summary.total_invited, 1))*100,
+            (summary.yes_count/max(summary.total_invited, 1))*100,
+            "-" * 30, details, closing, "=" * 50
+        )
+    
+    @staticmethod
+    def _detail_lines(responses):
+        lines = []
+        for response in responses:
+            lines.append(f"{STATUS_EMOJI.get(response.response, '❓')} {response.guest_name}: {response.response.upper()}")
             if response.message:
-                print(f"   💬 \"{response.message}\"")
+                lines.append(f"   💬 \"{response.message}\"")
+        return lines
+    
+    def iter_summary_details(self, details: SummaryDetails):
+        """The responses of a large event's summary, one chunk at a time (see summary_details.py)"""
+        return iter_details(self.redis_client.redis, details)
+    
+    async def stream_summary_details(self, details: SummaryDetails):
+        """Display the responses of a large event's summary chunk by chunk"""
+        if not message_log.isEnabledFor(logging.INFO):
+            return
         
-        print(f"\n🎊 Summary complete! Event planning finished via Pub/Sub.")
-        print("=" * 50)
+        shown = 0
+        async for responses in self.iter_summary_details(details):
+            message_log.info(
+                "📋 Responses %d-%d of %d:\n%s",
+                shown + 1, shown + len(responses), details.responses, "\n".join(self._detail_lines(responses))
+            )
+            shown += len(responses)
+        if shown < details.responses:
+            log.warning("⚠️ Only %d of %d responses were still in the detail store", shown, details.responses)
+    
+    async def publish_sample_invitation(self):
+        """Create and publish the demo invitation"""
+        invitation = self.create_invitation(
+            event_name="Team Building Workshop",
+            event_date="2025-02-15",
+            event_time="14:00",
+            location="Conference Room A",
+            description="Join us for an engaging team building session with fun activities and networking opportunities!"
+        )
+        return await self.publish_invitation(invitation)
+    
+    def listeners(self):
+        """The coroutines that run the host once it has started"""
+        return [self.listen_for_summaries()]
+    
+    def consumer_groups(self):
+        """The (stream, group) pairs this host reads, for lag and pending metrics"""
+        return [(self.summary_stream, self.summary_group)]
     
     def stop(self):
         """Stop the host"""
         self.running = False
-        print(f"\n🛑 Event Host '{self.host_name}' stopping...")
+        log.info("\n🛑 Event Host '%s' stopping...", self.host_name)
+    
+    async def close(self):
+        """Release the Redis connection"""
+        await self.redis_client.close()
 
 def signal_handler(signum, frame):
-    print("\n🛑 Received interrupt signal...")
+    log.info("\n🛑 Received interrupt signal...")
     sys.exit(0)
 
-async def main():
+async def main(metrics_port: int = None, guest_list: str = None):
     signal.signal(signal.SIGINT, signal_handler)
     
     # Create host instance
-    host = EventHost("Sarah Johnson")
+    host = EventHost("Sarah Johnson", guest_list=guest_list)
+    await host.start()
     
     # Start listening for summaries in background
     summary_task = asyncio.create_task(host.listen_for_summaries())
     
+    metrics_port = Config.METRICS_PORT if metrics_port is None else metrics_port
+    metrics_endpoint = None
+    if metrics_port:
+        metrics_endpoint = MetricsEndpoint(metrics_port, host.redis_client, host.consumer_groups())
+        await metrics_endpoint.start()
+    
     try:
-        print("🎯 Event Host started! Creating sample invitation...")
+        log.info("🎯 Event Host started! Creating sample invitation...")
         
         # Create and publish a sample invitation
-        invitation = host.create_invitation(
-            event_name="Team Building Workshop",
-            event_date="2025-02-15",
-            event_time="14:00",
-            location="Conference Room A",
-            description="Join us for an engaging team building session with fun activities and networking opportunities!"
-        )
+        await host.publish_sample_invitation()
         
-        host.publish_invitation(invitation)
-        
-        print("\n⏳ Waiting for responses from guests via Redis Pub/Sub...")
-        print("💡 The coordinator will collect all responses and send back a summary.")
-        print("🔄 This may take a few moments as guests respond at different times...")
+        log.info("\n⏳ Waiting for responses from guests via Redis Pub/Sub...")
+        log.info("💡 The coordinator will collect all responses and send back a summary.")
+        log.info("🔄 This may take a few moments as guests respond at different times...")
         
         # Keep the host running to receive summaries
         await summary_task
         
     except KeyboardInterrupt:
-        print("\n🛑 Host interrupted by user")
+        log.info("\n🛑 Host interrupted by user")
     finally:
         host.stop()
+        if metrics_endpoint:
+            await metrics_endpoint.stop()
         summary_task.cancel()
+        await host.close()
 
 if __name__ == "__main__":
-    print("🎯 STARTING EVENT HOST - PUB/SUB COMPONENT")
-    print("=" * 50)
-    print("📡 This component publishes invitations and receives summaries")
-    print("🔗 Uses Redis Streams for Pub/Sub messaging")
-    print("=" * 50)
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Event host")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve /metrics on this port (default: METRICS_PORT, 0 = off)')
+    parser.add_argument('--guest-list', default=None,
+                        help='registry list to invite, e.g. the swarm\'s (default: HOST_GUEST_LIST)')
+    args = parser.parse_args()
+    
+    setup_logging()
+    log.info("🎯 STARTING EVENT HOST - PUB/SUB COMPONENT")
+    log.info("=" * 50)
+    log.info("📡 This component publishes invitations and receives summaries")
+    log.info("🔗 Uses Redis Streams for Pub/Sub messaging")
+    log.info("=" * 50)
+    asyncio.run(main(args.metrics_port, args.guest_list))
\ No newline at end of file
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""Guest registry: invitee lists the coordinator fans invitations out to.
+
+A list is identified by a string such as ``event:<invitation_id>``,
+``host:<host_id>`` or ``Config.DEFAULT_GUEST_LIST``. A host can also name
+the list to invite in the invitation entry's ``guest_list`` field (see
+``Config.HOST_GUEST_LIST``). Lists are iterated in
+batches (SSCAN cursors in Redis, line-by-line reads for the file store), so
+a 100k-member list is never held in memory at once. List sizes are cached
+for ``Config.REGISTRY_COUNT_TTL_SECONDS``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Tuple
+from config import Config
+from models import EventInvitation
+from redis_client import RedisClient
+from logs import get_logger
+
+log = get_logger('registry')
+
+
+class Guest(NamedTuple):
+    id: str
+    name: str
+    email: str = ''
+
+
+# Registered guests used by the demo when no list has been imported
+DEMO_GUESTS = [
+    Guest("guest_1", "Alice Chen", "alice.chen@company.com"),
+    Guest("guest_2", "Bob Rodriguez", "bob.rodriguez@company.com"),
+    Guest("guest_3", "Carol Williams", "carol.williams@company.com"),
+    Guest("guest_4", "David Kim", "david.kim@company.com"),
+    Guest("guest_5", "Emma Thompson", "emma.thompson@company.com"),
+]
+
+
+# Stream field, next to the invitation's own fields, naming the list the host wants invited
+GUEST_LIST_FIELD = 'guest_list'
+
+
+def candidate_lists(invitation: EventInvitation, guest_list: str = None) -> List[str]:
+    """Lists that may hold an invitation's invitees, most specific first"""
+    lists = [f"event:{invitation.id}", f"host:{invitation.host_id}", Config.DEFAULT_GUEST_LIST]
+    return [guest_list, *lists] if guest_list else lists
+
+
+class CountCache:
+    """List sizes with a short TTL, so every invitation doesn't cost a SCARD"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.entries: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, list_id: str):
+        entry = self.entries.get(list_id)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def set(self, list_id: str, count: int):
+        self.entries[list_id] = (count, time.monotonic() + self.ttl)
+
+    def invalidate(self, list_id: str):
+        self.entries.pop(list_id, None)
+
+
+class RedisGuestRegistry:
+    """Invitee lists as Redis sets of guest IDs, with one hash per guest"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis = redis_client.redis
+        self.prefix = Config.GUEST_REGISTRY_PREFIX
+        self.counts = CountCache(Config.REGISTRY_COUNT_TTL_SECONDS)
+
+    def _list_key(self, list_id: str) -> str:
+        return f"{self.prefix}:list:{list_id}"
+
+    def _guest_key(self, guest_id: str) -> str:
+        return f"{self.prefix}:guest:{guest_id}"
+
+    async def add_guests(self, list_id: str, guests: Iterable[Guest], chunk_size: int = None) -> int:
+        """Add guests to a list (set semantics); returns how many were sent"""
+        chunk_size = chunk_size or Config.PUBLISH_CHUNK_SIZE
+        pipe = self.redis.pipeline(transaction=False)
+        sent = queued = 0
+        for guest in guests:
+            pipe.sadd(self._list_key(list_id), guest.id)
+            pipe.hset(self._guest_key(guest.id), mapping={'name': guest.name, 'email': guest.email})
+            queued += 1
+            if queued >= chunk_size:
+                await pipe.execute()
+                sent += queued
+                queued = 0
+        if queued:
+            await pipe.execute()
+            sent += queued
+        self.counts.invalidate(list_id)
+        return sent
+
+    async def count(self, list_id: str) -> int:
+        count = self.counts.get(list_id)
+        if count is None:
+            count = await self.redis.scard(self._list_key(list_id))
+            self.counts.set(list_id, count)
+        return count
+
+    async def iter_guests(self, list_id: str, batch_size: int = None) -> AsyncIterator[List[Guest]]:
+        """Yield the list in batches via SSCAN (a guest may appear twice if the set changes meanwhile)"""
+        batch_size = batch_size or Config.REGISTRY_SCAN_COUNT
+        cursor = 0
+        while True:
+            cursor, guest_ids = await self.redis.sscan(self._list_key(list_id), cursor, count=batch_size)
+            if guest_ids:
+                pipe = self.redis.pipeline(transaction=False)
+                for guest_id in guest_ids:
+                    pipe.hmget(self._guest_key(guest_id), 'name', 'email')
+                details = await pipe.execute()
+                yield [Guest(guest_id, name or guest_id, email or '')
+                       for guest_id, (name, email) in zip(guest_ids, details)]
+            if cursor == 0:
+                break
+
+
+class FileGuestRegistry:
+    """Local stand-in: one JSON-lines file per list under Config.GUEST_REGISTRY_DIR.
+
+    Files are append-only and not de-duplicated; adding a guest twice makes
+    it appear twice.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or Config.GUEST_REGISTRY_DIR
+        self.counts = CountCache(Config.REGISTRY_COUNT_TTL_SECONDS)
+
+    def _path(self, list_id: str) -> str:
+        return os.path.join(self.directory, f"{list_id.replace(':', '_')}.jsonl")
+
+    def _append(self, list_id: str, guests: List[Guest]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(list_id), 'a', encoding='utf-8') as handle:
+            for guest in guests:
+                handle.write(json.dumps(guest._asdict()) + '\n')
+
+    async def add_guests(self, list_id: str, guests: Iterable[Guest], chunk_size: int = None) -> int:
+        chunk_size = chunk_size or Config.PUBLISH_CHUNK_SIZE
+        sent = 0
+        chunk = []
+        for guest in guests:
+            chunk.append(guest)
+            if len(chunk) >= chunk_size:
+                await asyncio.to_thread(self._append, list_id, chunk)
+                sent += len(chunk)
+                chunk = []
+        if chunk:
+            await asyncio.to_thread(self._append, list_id, chunk)
+            sent += len(chunk)
+        self.counts.invalidate(list_id)
+        return sent
+
+    def _count_lines(self, list_id: str) -> int:
+        try:
+            with open(self._path(list_id), 'rb') as handle:
+                return sum(1 for line in handle if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    async def count(self, list_id: str) -> int:
+        count = self.counts.get(list_id)
+        if count is None:
+            count = await asyncio.to_thread(self._count_lines, list_id)
+            self.counts.set(list_id, count)
+        return count
+
+    async def iter_guests(self, list_id: str, batch_size: int = None) -> AsyncIterator[List[Guest]]:
+        batch_size = batch_size or Config.REGISTRY_SCAN_COUNT
+        try:
+            handle = open(self._path(list_id), 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+
+        def read_batch() -> List[Guest]:
+            batch = []
+            for line in handle:
+                if line.strip():
+                    batch.append(Guest(**json.loads(line)))
+                    if len(batch) >= batch_size:
+                        break
+            return batch
+
+        with handle:
+            while True:
+                batch = await asyncio.to_thread(read_batch)
+                if not batch:
+                    break
+                yield batch
+
+
+async def resolve_list(registry, invitation: EventInvitation, guest_list: str = None) -> Tuple[str, int]:
+    """First non-empty candidate list for an invitation and its (cached) size"""
+    for list_id in candidate_lists(invitation, guest_list):
+        count = await registry.count(list_id)
+        if count:
+            return list_id, count
+    return Config.DEFAULT_GUEST_LIST, 0
+
+
+async def ensure_default_list(registry):
+    """Register the demo guests if the default list is empty"""
+    if not await registry.count(Config.DEFAULT_GUEST_LIST):
+        await registry.add_guests(Config.DEFAULT_GUEST_LIST, DEMO_GUESTS)
+        log.info("📇 Registered %d demo guests in list '%s'", len(DEMO_GUESTS), Config.DEFAULT_GUEST_LIST)
+
+
+def create_registry(redis_client: RedisClient):
+    """Build the registry selected by Config.GUEST_REGISTRY"""
+    if Config.GUEST_REGISTRY == 'file':
+        return FileGuestRegistry()
+    return RedisGuestRegistry(redis_client)
+
+
+SYNTHETIC_GUEST_PREFIX = 'sim_guest_'
+
+
+def synthetic_guests(count: int, start: int = 0) -> Iterable[Guest]:
+    """Generated guests for load tests: sim_guest_<n>"""
+    for index in range(start, start + count):
+        yield Guest(f"{SYNTHETIC_GUEST_PREFIX}{index}", f"Simulated Guest {index}", f"guest{index}@example.com")
+
+
+async def cli(args):
+    redis_client = RedisClient()
+    registry = create_registry(redis_client)
+    try:
+        if args.command == 'add-synthetic':
+            added = await registry.add_guests(args.list, synthetic_guests(args.count, args.start))
+            print(f"📇 Added {added} synthetic guests to list '{args.list}'")
+        print(f"📇 List '{args.list}' has {await registry.count(args.list)} guests")
+    finally:
+        await redis_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage invitee lists")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    synthetic = subparsers.add_parser('add-synthetic', help='add generated guests to a list')
+    synthetic.add_argument('list', help="list ID, e.g. 'host:<host_id>' or 'default'")
+    synthetic.add_argument('count', type=int)
+    synthetic.add_argument('--start', type=int, default=0, help='first guest number')
+    counter = subparsers.add_parser('count', help='print the size of a list')
+    counter.add_argument('list')
+    asyncio.run(cli(parser.parse_args()))
@@ -0,0 +1,246 @@
+"""Logging setup shared by every component.
+
+Log output is written by a background thread fed through a queue, so log I/O
+and message formatting never run on the event loop. Use ``%``-style
+arguments (``log.info("📨 Event: %s", name)``) so nothing is formatted for
+records that are filtered out.
+
+Per-message events go to ``get_logger(name, per_message=True)``. Those
+loggers can be sampled (``LOG_SAMPLE_EVERY=N`` keeps one record in N per
+message template) and rate limited (``LOG_RATE_LIMIT`` records per second per
+template); warnings and errors always pass. Both checks run before anything
+is allocated, and once ``setup_logging`` has run the ``LogRecord`` itself is
+built on the writer thread.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, TextIO, Tuple
+from config import Config
+
+ROOT_LOGGER = 'pubsub'
+_STOP = object()
+
+_lock = threading.Lock()
+_writer: Optional['LogWriter'] = None
+_message_loggers: Dict[str, 'MessageLogger'] = {}
+_filter_settings = {'sample_every': Config.LOG_SAMPLE_EVERY, 'rate_limit': Config.LOG_RATE_LIMIT}
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the writer thread.
+
+    The stock ``QueueHandler.prepare`` formats the record before queueing it
+    (so it can be pickled); records here stay in-process, so that work is
+    moved off the event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class PrefixFormatter(logging.Formatter):
+    """Prefixes every line of a (possibly multi-line) record, e.g. ``[COORDINATOR]``"""
+
+    def __init__(self, fmt: str, prefix: str = ''):
+        super().__init__(fmt)
+        self.prefix = f"[{prefix}] " if prefix else ''
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if not self.prefix:
+            return text
+        return '\n'.join(self.prefix + line for line in text.split('\n'))
+
+
+class LogWriter(threading.Thread):
+    """Drains the log queue, formats records and writes each drained batch with one flush.
+
+    Queue items are either ``LogRecord``s (from ``DeferredQueueHandler``) or
+    ``(logger, level, msg, args, created)`` tuples from ``MessageLogger``.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, stream: TextIO, formatter: logging.Formatter):
+        super().__init__(name='log-writer', daemon=True)
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            lines = []
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                    continue
+                record = item if isinstance(item, logging.LogRecord) else self._make_record(*item)
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception as e:
+                    lines.append(f"⚠️  Unformattable log record {record.msg!r}: {e}")
+            if lines:
+                try:
+                    self.stream.write('\n'.join(lines) + '\n')
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    pass  # closed or broken output; nothing sensible to report it to
+
+    @staticmethod
+    def _make_record(logger: logging.Logger, level: int, msg: str, args: tuple, created: float) -> logging.LogRecord:
+        record = logger.makeRecord(logger.name, level, '(unknown file)', 0, msg, args, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        return record
+
+    def stop(self):
+        """Write out everything queued so far, then end the thread"""
+        self.queue.put(_STOP)
+        self.join()
+
+
+class MessageFilter:
+    """Sampling and per-second rate limiting keyed on the message template.
+
+    A record that passes after others were dropped by the rate limit reports
+    how many were suppressed.
+    """
+
+    def __init__(self, sample_every: int = 1, rate_limit: int = 0):
+        self.sample_every = max(sample_every, 1)
+        self.rate_limit = rate_limit
+        self.seen: Dict[str, int] = {}
+        self.windows: Dict[str, List[float]] = {}  # template -> [window_start, passed, suppressed]
+
+    def allow(self, msg: str, level: int) -> Tuple[bool, int]:
+        """Whether to emit, and how many records were suppressed before this one"""
+        if level >= logging.WARNING:
+            return True, 0
+        if self.sample_every > 1:
+            seen = self.seen.get(msg, 0)
+            self.seen[msg] = seen + 1
+            if seen % self.sample_every:
+                return False, 0
+        if self.rate_limit:
+            now = time.monotonic()
+            window = self.windows.get(msg)
+            if window is None or now - window[0] >= 1.0:
+                self.windows[msg] = [now, 1, 0]
+                return True, window[2] if window else 0
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return False, 0
+            window[1] += 1
+        return True, 0
+
+
+class MessageLogger:
+    """Per-message logger: sampling and rate limiting run before any record is built"""
+    __slots__ = ('logger', 'filter')
+
+    def __init__(self, logger: logging.Logger, message_filter: MessageFilter):
+        self.logger = logger
+        self.filter = message_filter
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level: int, msg: str, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        allowed, suppressed = self.filter.allow(msg, level)
+        if not allowed:
+            return
+        if suppressed:
+            if not args:
+                msg = msg.replace('%', '%%')
+            msg, args = msg + " (%d similar suppressed)", args + (suppressed,)
+        writer = _writer
+        if writer is not None:
+            writer.queue.put((self.logger, level, msg, args, time.time()))
+        else:
+            # Before setup_logging: the standard path; stacklevel points the record at our caller
+            self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg: str, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg: str, *args):
+        self.log(logging.WARNING, msg, *args)
+
+    def error(self, msg: str, *args):
+        self.log(logging.ERROR, msg, *args)
+
+
+def get_logger(name: str, per_message: bool = False):
+    """Logger for a component; ``per_message`` loggers are sampled and rate limited"""
+    if not per_message:
+        return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+    logger = _message_loggers.get(name)
+    if logger is None:
+        logger = _message_loggers[name] = MessageLogger(
+            logging.getLogger(f"{ROOT_LOGGER}.{name}.messages"), MessageFilter(**_filter_settings)
+        )
+    return logger
+
+
+def setup_logging(level: str = None, stream: TextIO = None, prefix: str = None,
+                  sample_every: int = None, rate_limit: int = None, force: bool = False):
+    """Route the ``pubsub`` loggers through a queue to ``stream`` (stdout by default).
+
+    Safe to call more than once; later calls are ignored unless ``force`` is set.
+    """
+    global _writer
+    with _lock:
+        if _writer is not None:
+            if not force:
+                return
+            _stop_writer()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel((level or Config.LOG_LEVEL).upper())
+        root.propagate = False
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(log_queue))
+        formatter = PrefixFormatter(Config.LOG_FORMAT, Config.LOG_PREFIX if prefix is None else prefix)
+        _writer = LogWriter(log_queue, stream or sys.stdout, formatter)
+        _writer.start()
+
+        _filter_settings['sample_every'] = Config.LOG_SAMPLE_EVERY if sample_every is None else sample_every
+        _filter_settings['rate_limit'] = Config.LOG_RATE_LIMIT if rate_limit is None else rate_limit
+        for message_logger in _message_loggers.values():
+            message_logger.filter = MessageFilter(**_filter_settings)
+
+
+def _stop_writer():
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def flush_logging():
+    """Write out everything queued so far and stop the writer thread"""
+    with _lock:
+        _stop_writer()
+
+
+atexit.register(flush_logging)
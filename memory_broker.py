@@ -0,0 +1,777 @@
+"""In-process broker: the Redis commands the components use, kept in memory.
+
+``BROKER_BACKEND=memory`` gives every RedisClient a ``MemoryRedis`` client
+on the process-wide ``MemoryBroker`` instead of a Redis connection, so a
+coordinator, guests and hosts running in one process exchange messages
+without a server or a socket round trip. Unlike ``fakeredis`` it has no
+dependencies and no RESP layer: a command is a method call on plain Python
+structures.
+
+Covered:
+
+- streams: XADD (with MAXLEN/MINID trimming), XREADGROUP (new and pending
+  entries, blocking), XACK, XGROUP CREATE, XPENDING, XCLAIM, XAUTOCLAIM,
+  XINFO GROUPS, XRANGE, XLEN, XTRIM, XDEL;
+- the sets, hashes, lists and sorted sets used by the guest registry,
+  summary detail lists and coordinator state, plus DEL, EXISTS, EXPIRE and
+  SCAN;
+- pipelines, which run their commands back to back on execute; nothing
+  else runs in between, so MULTI/EXEC atomicity holds trivially.
+
+A blocked XREADGROUP waits on an ``asyncio.Event`` registered on each of
+its streams; XADD sets the events of that stream's readers, so a reader is
+woken by the first entry instead of polling. Lua scripts are not
+supported, so the coordinator keeps its state in memory with this backend
+(see coordinator_state.create_state). MEMORY USAGE is not tracked and
+returns None. Everything lives in one process, so components started as
+separate processes do not see each other's messages.
+"""
+
+import asyncio
+import fnmatch
+import functools
+import time
+from time import monotonic
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Set, Tuple
+from redis.exceptions import ResponseError
+
+StreamId = Tuple[int, int]
+
+MAX_SEQUENCE = 2 ** 64 - 1
+# Approximate trimming (MAXLEN ~) only trims once this many entries are over the limit,
+# like Redis, which only drops whole nodes of its stream radix tree
+APPROXIMATE_TRIM_SLACK = 100
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+def parse_id(text: str, upper: bool = False) -> StreamId:
+    """A stream ID; a bare millisecond time gets the lowest (or, as an upper bound, highest) sequence"""
+    if isinstance(text, bytes):
+        text = text.decode()
+    milliseconds, _, sequence = str(text).partition('-')
+    try:
+        return int(milliseconds), int(sequence) if sequence else (MAX_SEQUENCE if upper else 0)
+    except ValueError:
+        raise ResponseError("ERR Invalid stream ID specified as stream command argument") from None
+
+
+def format_id(stream_id: StreamId) -> str:
+    return f"{stream_id[0]}-{stream_id[1]}"
+
+
+def _bound(text, upper: bool) -> Tuple[StreamId, bool]:
+    """An XRANGE/XPENDING bound as (id, exclusive); accepts '-', '+' and '(' prefixes"""
+    if text in ('-', b'-'):
+        return (0, 0), False
+    if text in ('+', b'+'):
+        return (MAX_SEQUENCE, MAX_SEQUENCE), False
+    text = text.decode() if isinstance(text, bytes) else str(text)
+    if text.startswith('('):
+        return parse_id(text[1:], upper), True
+    return parse_id(text, upper), False
+
+
+def _score_bound(value) -> Tuple[float, bool]:
+    """A ZRANGEBYSCORE bound as (score, exclusive)"""
+    text = value.decode() if isinstance(value, bytes) else str(value)
+    exclusive = text.startswith('(')
+    return float(text[1:] if exclusive else text), exclusive
+
+
+def _encode(value) -> str:
+    """Values are stored as strings, as Redis with decode_responses=True returns them"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, bool) or value is None:
+        raise ResponseError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class PendingEntry:
+    """An entry delivered to a consumer and not yet acknowledged"""
+    __slots__ = ('consumer', 'delivered', 'count')
+
+    def __init__(self, consumer: str, delivered: float):
+        self.consumer = consumer
+        self.delivered = delivered  # monotonic() of the last delivery
+        self.count = 1
+
+
+class ConsumerGroup:
+    __slots__ = ('name', 'last_delivered', 'entries_read', 'pending', 'consumers', 'ordered')
+
+    def __init__(self, name: str, last_delivered: StreamId):
+        self.name = name
+        self.last_delivered = last_delivered
+        self.entries_read = 0
+        self.pending: Dict[str, PendingEntry] = {}  # entry ID -> PendingEntry, in delivery order
+        self.consumers: Set[str] = set()
+        # Sorted (parsed IDs, ID strings) of ``pending``, rebuilt after it gains or loses an entry
+        self.ordered: Optional[Tuple[List[StreamId], List[str]]] = None
+
+    def add_pending(self, message_id: str, entry: PendingEntry):
+        self.pending[message_id] = entry
+        self.ordered = None
+
+    def drop_pending(self, message_id: str) -> bool:
+        if self.pending.pop(message_id, None) is None:
+            return False
+        self.ordered = None
+        return True
+
+    def pending_ids(self, low: StreamId = (0, 0), high: StreamId = (MAX_SEQUENCE, MAX_SEQUENCE),
+                    count: int = None) -> List[str]:
+        """Up to ``count`` pending entry IDs between ``low`` and ``high`` (inclusive), in ID order"""
+        if self.ordered is None:
+            ids = sorted((parse_id(message_id), message_id) for message_id in self.pending)
+            self.ordered = [stream_id for stream_id, _ in ids], [message_id for _, message_id in ids]
+        ids, names = self.ordered
+        start, end = bisect_left(ids, low), bisect_right(ids, high)
+        return names[start:min(end, start + count) if count is not None else end]
+
+
+class Stream:
+    """Entries in ID order, as parallel lists so ranges are found by bisection"""
+    __slots__ = ('ids', 'entries', 'last_id', 'groups')
+
+    def __init__(self):
+        self.ids: List[StreamId] = []
+        self.entries: List[Tuple[str, Dict[str, str]]] = []  # (ID string, fields)
+        self.last_id: StreamId = (0, 0)  # highest ID ever added, even if trimmed since
+        self.groups: Dict[str, ConsumerGroup] = {}
+
+    def next_id(self) -> StreamId:
+        milliseconds = int(time.time() * 1000)
+        if milliseconds > self.last_id[0]:
+            return milliseconds, 0
+        return self.last_id[0], self.last_id[1] + 1
+
+    def slice(self, low: Tuple[StreamId, bool], high: Tuple[StreamId, bool]) -> Tuple[int, int]:
+        start = (bisect_right if low[1] else bisect_left)(self.ids, low[0])
+        end = (bisect_left if high[1] else bisect_right)(self.ids, high[0])
+        return start, max(start, end)
+
+    def drop_first(self, count: int) -> int:
+        del self.ids[:count]
+        del self.entries[:count]
+        return count
+
+    def find(self, message_id: str) -> Optional[Dict[str, str]]:
+        stream_id = parse_id(message_id)
+        index = bisect_left(self.ids, stream_id)
+        if index < len(self.ids) and self.ids[index] == stream_id:
+            return self.entries[index][1]
+        return None
+
+
+class SortedSet(dict):
+    """member -> score; ordered on demand (ZRANGEBYSCORE is the only range query used)"""
+
+
+class MemberSet(set):
+    """A set with a sorted snapshot for SSCAN, rebuilt after SADD or SREM changes it"""
+    __slots__ = ('ordered',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.ordered: Optional[List[str]] = None
+
+    def sorted(self) -> List[str]:
+        if self.ordered is None:
+            self.ordered = sorted(self)
+        return self.ordered
+
+
+class MemoryBroker:
+    """The keyspace shared by every MemoryRedis client in the process"""
+
+    # Methods that clients and pipelines may call, named as on redis.asyncio.Redis
+    COMMANDS = frozenset((
+        'xadd', 'xreadgroup', 'xack', 'xgroup_create', 'xpending', 'xpending_range', 'xclaim',
+        'xautoclaim', 'xinfo_groups', 'xrange', 'xlen', 'xtrim', 'xdel',
+        'delete', 'exists', 'expire', 'type', 'memory_usage', 'keys',
+        'sadd', 'srem', 'scard', 'smembers', 'sismember', 'smismember', 'sscan',
+        'hset', 'hget', 'hgetall', 'hmget', 'hvals', 'hincrby', 'hdel', 'hlen',
+        'rpush', 'lrange', 'llen',
+        'zadd', 'zrem', 'zscore', 'zcard', 'zrangebyscore',
+    ))
+
+    def __init__(self):
+        self.data: Dict[str, object] = {}
+        self.expires: Dict[str, float] = {}  # key -> monotonic() deadline
+        self.readers: Dict[str, Set[asyncio.Event]] = {}  # stream -> events of blocked XREADGROUPs
+
+    def execute(self, command: str, args, options):
+        if command not in self.COMMANDS:
+            raise ResponseError(f"ERR unknown command '{command}' for the memory broker")
+        return getattr(self, command)(*args, **options)
+
+    # Keyspace
+
+    def _live(self, key: str):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= monotonic():
+            del self.expires[key]
+            self.data.pop(key, None)
+        return self.data.get(key)
+
+    def _get(self, key: str, kind: type, create: bool = False):
+        value = self._live(key)
+        if value is None:
+            if not create:
+                return None
+            value = self.data[key] = kind()
+        elif type(value) is not kind:
+            raise ResponseError(WRONGTYPE)
+        return value
+
+    def _drop_if_empty(self, key: str, value):
+        if not value:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def delete(self, *names) -> int:
+        removed = 0
+        for name in names:
+            if self._live(name) is not None:
+                del self.data[name]
+                removed += 1
+            self.expires.pop(name, None)
+        return removed
+
+    def exists(self, *names) -> int:
+        return sum(1 for name in names if self._live(name) is not None)
+
+    def expire(self, name: str, time_seconds) -> bool:
+        if self._live(name) is None:
+            return False
+        seconds = time_seconds.total_seconds() if hasattr(time_seconds, 'total_seconds') else time_seconds
+        self.expires[name] = monotonic() + seconds
+        return True
+
+    TYPE_NAMES = {Stream: 'stream', MemberSet: 'set', dict: 'hash', list: 'list', SortedSet: 'zset', str: 'string'}
+
+    def type(self, name: str) -> str:
+        value = self._live(name)
+        return 'none' if value is None else self.TYPE_NAMES[type(value)]
+
+    def memory_usage(self, key: str, samples=None) -> None:
+        return None
+
+    def keys(self, pattern: str = '*', _type: str = None) -> List[str]:
+        return [key for key in list(self.data)
+                if fnmatch.fnmatchcase(key, pattern) and self._live(key) is not None
+                and (_type is None or self.type(key) == _type)]
+
+    # Streams
+
+    def _stream(self, name: str) -> Stream:
+        stream = self._get(name, Stream)
+        if stream is None:
+            raise ResponseError("ERR no such key")
+        return stream
+
+    def _group(self, name: str, groupname: str, command: str = 'XREADGROUP') -> Tuple[Stream, ConsumerGroup]:
+        stream = self._get(name, Stream)
+        group = stream.groups.get(groupname) if stream is not None else None
+        if group is None:
+            raise ResponseError(f"NOGROUP No such key '{name}' or consumer group '{groupname}' in {command}")
+        return stream, group
+
+    def xadd(self, name: str, fields: Dict, id='*', maxlen: int = None, approximate: bool = True,
+             nomkstream: bool = False, minid=None, limit: int = None) -> Optional[str]:
+        stream = self._get(name, Stream, create=not nomkstream)
+        if stream is None:
+            return None
+        if id in ('*', b'*'):
+            stream_id = stream.next_id()
+        else:
+            stream_id = parse_id(id)
+            if stream_id <= stream.last_id:
+                raise ResponseError("ERR The ID specified in XADD is equal or smaller than the target stream top item")
+        message_id = format_id(stream_id)
+        stream.ids.append(stream_id)
+        stream.entries.append((message_id, {_encode(key): _encode(value) for key, value in fields.items()}))
+        stream.last_id = stream_id
+        if maxlen is not None or minid is not None:
+            self._trim(stream, maxlen, minid, approximate)
+        for event in self.readers.get(name, ()):
+            event.set()
+        return message_id
+
+    @staticmethod
+    def _trim(stream: Stream, maxlen: Optional[int], minid, approximate: bool) -> int:
+        if maxlen is not None:
+            excess = len(stream.ids) - maxlen
+        else:
+            excess = bisect_left(stream.ids, parse_id(minid))
+        if excess <= 0 or (approximate and excess < APPROXIMATE_TRIM_SLACK):
+            return 0
+        return stream.drop_first(excess)
+
+    def xtrim(self, name: str, maxlen: int = None, approximate: bool = True, minid=None, limit: int = None) -> int:
+        stream = self._get(name, Stream)
+        return self._trim(stream, maxlen, minid, approximate) if stream is not None else 0
+
+    def xdel(self, name: str, *ids) -> int:
+        stream = self._get(name, Stream)
+        if stream is None:
+            return 0
+        removed = 0
+        for message_id in ids:
+            stream_id = parse_id(message_id)
+            index = bisect_left(stream.ids, stream_id)
+            if index < len(stream.ids) and stream.ids[index] == stream_id:
+                del stream.ids[index]
+                del stream.entries[index]
+                removed += 1
+        return removed
+
+    def xlen(self, name: str) -> int:
+        stream = self._get(name, Stream)
+        return len(stream.ids) if stream is not None else 0
+
+    def xrange(self, name: str, min='-', max='+', count: int = None) -> List[Tuple[str, Dict[str, str]]]:
+        stream = self._get(name, Stream)
+        if stream is None:
+            return []
+        start, end = stream.slice(_bound(min, False), _bound(max, True))
+        if count is not None and start + count < end:
+            end = start + count
+        return [(message_id, dict(fields)) for message_id, fields in stream.entries[start:end]]
+
+    def xgroup_create(self, name: str, groupname: str, id='$', mkstream: bool = False, entries_read=None) -> bool:
+        stream = self._get(name, Stream, create=mkstream)
+        if stream is None:
+            raise ResponseError("ERR The XGROUP subcommand requires the key to exist. "
+                                "Note that for CREATE you may want to use the MKSTREAM option to create an empty stream automatically.")
+        if groupname in stream.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        last_delivered = stream.last_id if id in ('$', b'$') else parse_id(id)
+        stream.groups[groupname] = ConsumerGroup(groupname, last_delivered)
+        return True
+
+    def xreadgroup(self, groupname: str, consumername: str, streams: Dict[str, str], count: int = None,
+                   block: int = None, noack: bool = False) -> List[list]:
+        """One non-blocking XREADGROUP pass; MemoryRedis.xreadgroup adds the blocking wait"""
+        result = []
+        now = monotonic()
+        for name, start in streams.items():
+            stream, group = self._group(name, groupname)
+            group.consumers.add(consumername)
+            if start in ('>', b'>'):
+                begin = bisect_right(stream.ids, group.last_delivered)
+                entries = stream.entries[begin:begin + count if count else None]
+                if not entries:
+                    continue
+                group.last_delivered = stream.ids[begin + len(entries) - 1]
+                group.entries_read += len(entries)
+                if not noack:
+                    for message_id, _ in entries:
+                        group.add_pending(message_id, PendingEntry(consumername, now))
+                result.append([name, [(message_id, dict(fields)) for message_id, fields in entries]])
+            else:
+                # History: this consumer's pending entries after ``start`` (deleted ones have no fields)
+                after = parse_id(start)
+                ids = [message_id for message_id in group.pending_ids(after)
+                       if group.pending[message_id].consumer == consumername and parse_id(message_id) > after]
+                ids = ids[:count] if count else ids
+                for message_id in ids:
+                    group.pending[message_id].delivered = now
+                    group.pending[message_id].count += 1
+                result.append([name, [(message_id, stream.find(message_id)) for message_id in ids]])
+        return result
+
+    def xack(self, name: str, groupname: str, *ids) -> int:
+        stream = self._get(name, Stream)
+        group = stream.groups.get(groupname) if stream is not None else None
+        if group is None:
+            return 0
+        return sum(1 for message_id in ids if group.drop_pending(_encode(message_id)))
+
+    def xpending(self, name: str, groupname: str) -> Dict:
+        _, group = self._group(name, groupname, 'XPENDING')
+        ids = group.pending_ids()
+        consumers: Dict[str, int] = {}
+        for entry in group.pending.values():
+            consumers[entry.consumer] = consumers.get(entry.consumer, 0) + 1
+        return {
+            'pending': len(ids),
+            'min': ids[0] if ids else None,
+            'max': ids[-1] if ids else None,
+            'consumers': [{'name': consumer, 'pending': pending} for consumer, pending in sorted(consumers.items())],
+        }
+
+    def xpending_range(self, name: str, groupname: str, min, max, count: int, consumername: str = None,
+                       idle: int = None) -> List[Dict]:
+        _, group = self._group(name, groupname, 'XPENDING')
+        low, low_exclusive = _bound(min, False)
+        high, high_exclusive = _bound(max, True)
+        now = monotonic()
+        result = []
+        for message_id in group.pending_ids(low, high):
+            stream_id = parse_id(message_id)
+            entry = group.pending[message_id]
+            idle_ms = int((now - entry.delivered) * 1000)
+            if ((low_exclusive and stream_id == low) or (high_exclusive and stream_id == high)
+                    or (consumername is not None and entry.consumer != consumername)
+                    or (idle is not None and idle_ms < idle)):
+                continue
+            result.append({'message_id': message_id, 'consumer': entry.consumer,
+                           'time_since_delivered': idle_ms, 'times_delivered': entry.count})
+            if len(result) >= count:
+                break
+        return result
+
+    def _claim(self, stream: Stream, group: ConsumerGroup, consumername: str, message_id: str,
+               min_idle_time: int, now: float) -> Optional[Tuple[str, Dict[str, str]]]:
+        entry = group.pending.get(message_id)
+        if entry is None or (now - entry.delivered) * 1000 < min_idle_time:
+            return None
+        fields = stream.find(message_id)
+        if fields is None:
+            group.drop_pending(message_id)  # deleted from the stream while pending
+            return None
+        entry.consumer = consumername
+        entry.delivered = now
+        entry.count += 1
+        group.consumers.add(consumername)
+        return message_id, dict(fields)
+
+    def xclaim(self, name: str, groupname: str, consumername: str, min_idle_time: int, message_ids,
+               idle=None, time=None, retrycount=None, force=False, justid=False) -> List:
+        stream, group = self._group(name, groupname, 'XCLAIM')
+        now = monotonic()
+        claimed = [self._claim(stream, group, consumername, _encode(message_id), min_idle_time, now)
+                   for message_id in message_ids]
+        claimed = [entry for entry in claimed if entry is not None]
+        return [message_id for message_id, _ in claimed] if justid else claimed
+
+    def xautoclaim(self, name: str, groupname: str, consumername: str, min_idle_time: int, start_id='0-0',
+                   count: int = None, justid: bool = False) -> list:
+        stream, group = self._group(name, groupname, 'XAUTOCLAIM')
+        count = count or 100
+        now = monotonic()
+        # One ID past the page tells where the next call starts
+        ids = group.pending_ids(parse_id(start_id), count=count + 1)
+        claimed, deleted = [], []
+        for message_id in ids[:count]:
+            if message_id in group.pending and stream.find(message_id) is None:
+                group.drop_pending(message_id)
+                deleted.append(message_id)
+                continue
+            entry = self._claim(stream, group, consumername, message_id, min_idle_time, now)
+            if entry is not None:
+                claimed.append(entry)
+        cursor = ids[count] if len(ids) > count else '0-0'
+        return [cursor, [message_id for message_id, _ in claimed] if justid else claimed, deleted]
+
+    def xinfo_groups(self, name: str) -> List[Dict]:
+        stream = self._stream(name)
+        return [{
+            'name': group.name,
+            'consumers': len(group.consumers),
+            'pending': len(group.pending),
+            'last-delivered-id': format_id(group.last_delivered),
+            'entries-read': group.entries_read,
+            'lag': len(stream.ids) - bisect_right(stream.ids, group.last_delivered),
+        } for group in stream.groups.values()]
+
+    # Sets
+
+    def sadd(self, name: str, *values) -> int:
+        members = self._get(name, MemberSet, create=True)
+        before = len(members)
+        members.update(_encode(value) for value in values)
+        if len(members) != before:
+            members.ordered = None
+        return len(members) - before
+
+    def srem(self, name: str, *values) -> int:
+        members = self._get(name, MemberSet)
+        if members is None:
+            return 0
+        before = len(members)
+        members.difference_update(_encode(value) for value in values)
+        if len(members) != before:
+            members.ordered = None
+        self._drop_if_empty(name, members)
+        return before - len(members)
+
+    def scard(self, name: str) -> int:
+        members = self._get(name, MemberSet)
+        return len(members) if members is not None else 0
+
+    def smembers(self, name: str) -> Set[str]:
+        return set(self._get(name, MemberSet) or ())
+
+    def sismember(self, name: str, value) -> bool:
+        return _encode(value) in (self._get(name, MemberSet) or ())
+
+    def smismember(self, name: str, values, *args) -> List[bool]:
+        members = self._get(name, MemberSet) or ()
+        values = list(values) if isinstance(values, (list, tuple)) else [values]
+        return [_encode(value) in members for value in values + list(args)]
+
+    def sscan(self, name: str, cursor: int = 0, match: str = None, count: int = None) -> Tuple[int, List[str]]:
+        """Members in sorted order from position ``cursor``; like SSCAN, a member added or
+        removed during the scan may be missed or returned twice"""
+        members = self._get(name, MemberSet)
+        members = members.sorted() if members is not None else []
+        count = count or 10
+        page = members[cursor:cursor + count]
+        if match is not None:
+            page = [member for member in page if fnmatch.fnmatchcase(member, match)]
+        cursor += count
+        return (cursor if cursor < len(members) else 0), page
+
+    # Hashes
+
+    def hset(self, name: str, key=None, value=None, mapping: Dict = None, items: list = None) -> int:
+        fields = self._get(name, dict, create=True)
+        updates = dict(mapping or {})
+        if key is not None:
+            updates[key] = value
+        for index in range(0, len(items or ()), 2):
+            updates[items[index]] = items[index + 1]
+        added = 0
+        for field, field_value in updates.items():
+            field = _encode(field)
+            added += field not in fields
+            fields[field] = _encode(field_value)
+        return added
+
+    def hget(self, name: str, key) -> Optional[str]:
+        return (self._get(name, dict) or {}).get(_encode(key))
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        return dict(self._get(name, dict) or {})
+
+    def hmget(self, name: str, keys, *args) -> List[Optional[str]]:
+        fields = self._get(name, dict) or {}
+        keys = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        return [fields.get(_encode(key)) for key in keys + list(args)]
+
+    def hvals(self, name: str) -> List[str]:
+        return list((self._get(name, dict) or {}).values())
+
+    def hlen(self, name: str) -> int:
+        return len(self._get(name, dict) or ())
+
+    def hincrby(self, name: str, key, amount: int = 1) -> int:
+        fields = self._get(name, dict, create=True)
+        key = _encode(key)
+        try:
+            value = int(fields.get(key, 0)) + int(amount)
+        except ValueError:
+            raise ResponseError("ERR hash value is not an integer") from None
+        fields[key] = str(value)
+        return value
+
+    def hdel(self, name: str, *keys) -> int:
+        fields = self._get(name, dict)
+        if fields is None:
+            return 0
+        removed = sum(1 for key in keys if fields.pop(_encode(key), None) is not None)
+        self._drop_if_empty(name, fields)
+        return removed
+
+    # Lists
+
+    def rpush(self, name: str, *values) -> int:
+        items = self._get(name, list, create=True)
+        items.extend(_encode(value) for value in values)
+        return len(items)
+
+    def lrange(self, name: str, start: int, end: int) -> List[str]:
+        items = self._get(name, list) or []
+        length = len(items)
+        start = start + length if start < 0 else start
+        end = end + length if end < 0 else end
+        return items[max(start, 0):end + 1]
+
+    def llen(self, name: str) -> int:
+        return len(self._get(name, list) or ())
+
+    # Sorted sets
+
+    def zadd(self, name: str, mapping: Dict, nx: bool = False, xx: bool = False, ch: bool = False,
+             incr: bool = False, gt: bool = False, lt: bool = False) -> int:
+        scores = self._get(name, SortedSet, create=True)
+        added = 0
+        for member, score in mapping.items():
+            member = _encode(member)
+            if member in scores:
+                if not nx:
+                    scores[member] = float(score)
+            elif not xx:
+                scores[member] = float(score)
+                added += 1
+        self._drop_if_empty(name, scores)
+        return added
+
+    def zrem(self, name: str, *values) -> int:
+        scores = self._get(name, SortedSet)
+        if scores is None:
+            return 0
+        removed = sum(1 for value in values if scores.pop(_encode(value), None) is not None)
+        self._drop_if_empty(name, scores)
+        return removed
+
+    def zscore(self, name: str, value) -> Optional[float]:
+        return (self._get(name, SortedSet) or {}).get(_encode(value))
+
+    def zcard(self, name: str) -> int:
+        return len(self._get(name, SortedSet) or ())
+
+    def zrangebyscore(self, name: str, min, max, start: int = None, num: int = None,
+                      withscores: bool = False, score_cast_func=float) -> list:
+        scores = self._get(name, SortedSet) or {}
+        low, low_exclusive = _score_bound(min)
+        high, high_exclusive = _score_bound(max)
+        selected = sorted(
+            (score, member) for member, score in scores.items()
+            if (low < score if low_exclusive else low <= score) and (score < high if high_exclusive else score <= high)
+        )
+        if start is not None and num is not None:
+            selected = selected[start:start + num if num >= 0 else None]
+        if withscores:
+            return [(member, score_cast_func(score)) for score, member in selected]
+        return [member for _, member in selected]
+
+
+class MemoryPipeline:
+    """Queues commands and runs them back to back on ``execute``"""
+
+    def __init__(self, broker: MemoryBroker, transaction: bool = True):
+        self.broker = broker
+        self.transaction = transaction
+        self.commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name not in MemoryBroker.COMMANDS:
+            raise AttributeError(name)
+
+        def queue(*args, **options):
+            self.commands.append((name, args, options))
+            return self
+        return queue
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.reset()
+
+    def reset(self):
+        self.commands = []
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        """Run every queued command; like MULTI/EXEC, a failed command does not stop the others"""
+        commands, self.commands = self.commands, []
+        results = []
+        for name, args, options in commands:
+            try:
+                results.append(self.broker.execute(name, args, options))
+            except ResponseError as e:
+                results.append(e)
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, ResponseError):
+                    raise result
+        return results
+
+
+class MemoryRedis:
+    """A client of a MemoryBroker with the redis.asyncio.Redis methods the components call.
+
+    Every command goes through ``execute_command``, so wrappers that count
+    round trips on a Redis client (see benchmarks/pipeline.py) work unchanged.
+    """
+
+    def __init__(self, broker: MemoryBroker):
+        self.broker = broker
+
+    async def execute_command(self, command: str, *args, **options):
+        return self.broker.execute(command, args, options)
+
+    def __getattr__(self, name: str):
+        if name not in MemoryBroker.COMMANDS:
+            raise AttributeError(name)
+        return functools.partial(self.execute_command, name)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> MemoryPipeline:
+        return MemoryPipeline(self.broker, transaction)
+
+    async def xreadgroup(self, groupname: str, consumername: str, streams: Dict[str, str], count: int = None,
+                         block: int = None, noack: bool = False) -> List[list]:
+        """XREADGROUP; with ``block`` (ms, 0 = forever) waits until an XADD to one of the streams"""
+        result = await self.execute_command('xreadgroup', groupname, consumername, streams, count=count, noack=noack)
+        if result or block is None or not any(start in ('>', b'>') for start in streams.values()):
+            return result
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + block / 1000 if block else None
+        readers = self.broker.readers
+        while not result:
+            timeout = None if deadline is None else deadline - loop.time()
+            if timeout is not None and timeout <= 0:
+                return []
+            woken = asyncio.Event()
+            for name in streams:
+                readers.setdefault(name, set()).add(woken)
+            try:
+                await asyncio.wait_for(woken.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                for name in streams:
+                    waiting = readers.get(name)
+                    if waiting is not None:
+                        waiting.discard(woken)
+                        if not waiting:
+                            del readers[name]
+            result = await self.execute_command('xreadgroup', groupname, consumername, streams,
+                                                count=count, noack=noack)
+        return result
+
+    async def scan_iter(self, match: str = None, count: int = None, _type: str = None):
+        for key in await self.execute_command('keys', match or '*', _type=_type):
+            yield key
+
+    async def sscan_iter(self, name: str, match: str = None, count: int = None):
+        cursor = 0
+        while True:
+            cursor, members = await self.execute_command('sscan', name, cursor, match=match, count=count)
+            for member in members:
+                yield member
+            if cursor == 0:
+                break
+
+    def register_script(self, script: str):
+        raise RuntimeError("The memory broker does not run Lua scripts; use COORDINATOR_STATE=memory")
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self):
+        pass
+
+    close = aclose
+
+
+_broker: Optional[MemoryBroker] = None
+
+
+def shared_broker() -> MemoryBroker:
+    """The process-wide broker used by BROKER_BACKEND=memory"""
+    global _broker
+    if _broker is None:
+        _broker = MemoryBroker()
+    return _broker
@@ -1,9 +1,142 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import ClassVar, Dict, List, Optional, Tuple
 from datetime import datetime
 import json
+from config import Config
 
-class EventInvitation(BaseModel):
+# Wire formats
+#
+# 'fields' stores every model field as its own stream field (the original
+# format). 'packed' stores a single field: a schema version followed by the
+# field values in ``packed_fields`` order, separated by the ASCII unit
+# separator. Timestamps are ISO 8601 text, as in 'fields', so their time zone
+# survives. An entry is then one bulk string instead of one per field name
+# and value, which is most of what redis-py spends parsing a stream reply,
+# and it decodes with a single ``str.split``. A summary's embedded responses
+# are rows joined by the record separator, each row's values joined by the
+# group separator. A message whose text contains one of these control
+# characters is written in the 'fields' format instead. Readers detect the
+# format per message, so both can be mixed on a stream.
+
+PACKED_VERSION = '2'
+UNIT_SEP, ROW_SEP, VALUE_SEP = '\x1f', '\x1e', '\x1d'
+
+def _clean(text: str) -> bool:
+    return UNIT_SEP not in text and ROW_SEP not in text and VALUE_SEP not in text
+
+def _pack(values: list) -> Optional[str]:
+    """Packed payload for string values (or lists of string rows), None if any contains a separator"""
+    try:
+        text = UNIT_SEP.join([PACKED_VERSION, *values])
+    except TypeError:
+        # Nested rows (EventSummary.responses): check every leaf before joining them up
+        leaves = [value for value in values if type(value) is str]
+        leaves += [item for value in values if type(value) is not str for row in value for item in row]
+        if not _clean(''.join(leaves)):
+            return None
+        return UNIT_SEP.join([PACKED_VERSION, *(
+            value if type(value) is str else ROW_SEP.join(VALUE_SEP.join(row) for row in value) for value in values
+        )])
+    if text.count(UNIT_SEP) != len(values) or ROW_SEP in text or VALUE_SEP in text:
+        return None
+    return text
+
+def _unpack(payload: str, name: str) -> List[str]:
+    version, *values = payload.split(UNIT_SEP)
+    if version != PACKED_VERSION:
+        raise ValueError(f"Unsupported packed schema version {version[:16]!r} for {name}")
+    return values
+
+def _unpack_rows(text: str) -> List[List[str]]:
+    return [row.split(VALUE_SEP) for row in text.split(ROW_SEP)] if text else []
+
+class FieldCodec:
+    """One stream field per model field"""
+    name = 'fields'
+    
+    def encode(self, model) -> Dict[str, str]:
+        return model.to_field_dict()
+    
+    def decode(self, cls, data: Dict[str, str]):
+        return cls.from_field_dict(data)
+    
+    def encode_rows(self, cls, rows, timestamp: datetime) -> List[Dict[str, str]]:
+        names = cls.packed_fields
+        stamp = timestamp.isoformat()
+        return [dict(zip(names, row), timestamp=stamp) for row in rows]
+
+class PackedCodec:
+    """Schema-versioned positional payload in a single stream field"""
+    name = 'packed'
+    payload_field = 'p'
+    
+    def encode(self, model) -> Dict[str, str]:
+        payload = _pack(model.to_packed_values())
+        return {self.payload_field: payload} if payload is not None else model.to_field_dict()
+    
+    def decode(self, cls, data: Dict[str, str]):
+        return cls.from_packed_values(_unpack(data[self.payload_field], cls.__name__))
+    
+    def encode_rows(self, cls, rows, timestamp: datetime) -> List[Dict[str, str]]:
+        stamp = timestamp.isoformat()
+        field, names = self.payload_field, cls.packed_fields
+        encoded = []
+        for row in rows:
+            payload = _pack([*row, stamp])
+            encoded.append({field: payload} if payload is not None else dict(zip(names, row), timestamp=stamp))
+        return encoded
+
+FIELD_CODEC = FieldCodec()
+PACKED_CODEC = PackedCodec()
+CODECS = {codec.name: codec for codec in (FIELD_CODEC, PACKED_CODEC)}
+
+def get_codec(name: str = None):
+    """Codec by name (default: Config.WIRE_CODEC)"""
+    return CODECS[name or Config.WIRE_CODEC]
+
+class WireModel(BaseModel):
+    """Base for models that travel over Redis Streams"""
+    packed_fields: ClassVar[Tuple[str, ...]] = ()
+    
+    def to_redis_dict(self, codec=None):
+        return (codec or get_codec()).encode(self)
+    
+    @classmethod
+    def from_redis_dict(cls, data):
+        codec = PACKED_CODEC if PackedCodec.payload_field in data else FIELD_CODEC
+        return codec.decode(cls, data)
+    
+    @classmethod
+    def from_trusted_dict(cls, data):
+        """Decode a message written by our own components, skipping validation.
+        
+        Returns a lightweight view (see ``MessageView``) unless
+        ``Config.VALIDATE_INTERNAL_MESSAGES`` is set.
+        """
+        if Config.VALIDATE_INTERNAL_MESSAGES:
+            return cls.from_redis_dict(data)
+        return VIEWS[cls].from_redis_dict(data)
+    
+    @classmethod
+    def encode_rows(cls, rows, timestamp: datetime, codec=None) -> List[Dict[str, str]]:
+        """Wire dicts for many messages without building models.
+        
+        Each row holds the values of ``packed_fields`` except the timestamp,
+        all already plain strings (flat models only: EventInvitation,
+        GuestResponse); every message gets ``timestamp``.
+        """
+        return (codec or get_codec()).encode_rows(cls, rows, timestamp)
+    
+    def to_packed_values(self) -> List[str]:
+        """The ``packed_fields`` values as they appear in the field format"""
+        data = self.to_field_dict()
+        return [data[name] for name in self.packed_fields]
+    
+    @classmethod
+    def from_packed_values(cls, values: list):
+        return cls.from_field_dict(dict(zip(cls.packed_fields, values)))
+
+class EventInvitation(WireModel):
     id: str
     event_name: str
     event_date: str
@@ -14,7 +147,12 @@ class EventInvitation(BaseModel):
     host_id: str
     timestamp: datetime
     
-    def to_redis_dict(self):
+    packed_fields: ClassVar[Tuple[str, ...]] = (
+        'id', 'event_name', 'event_date', 'event_time', 'location',
+        'description', 'host_name', 'host_id', 'timestamp'
+    )
+    
+    def to_field_dict(self):
         return {
             'id': self.id,
             'event_name': self.event_name,
@@ -27,12 +165,16 @@ class EventInvitation(BaseModel):
             'timestamp': self.timestamp.isoformat()
         }
     
+    def to_packed_values(self) -> List[str]:
+        return [self.id, self.event_name, self.event_date, self.event_time, self.location,
+                self.description, self.host_name, self.host_id, self.timestamp.isoformat()]
+    
     @classmethod
-    def from_redis_dict(cls, data):
+    def from_field_dict(cls, data):
         data['timestamp'] = datetime.fromisoformat(data['timestamp'])
         return cls(**data)
 
-class GuestResponse(BaseModel):
+class GuestResponse(WireModel):
     id: str
     invitation_id: str
     guest_name: str
@@ -41,7 +183,11 @@ class GuestResponse(BaseModel):
     message: Optional[str] = None
     timestamp: datetime
     
-    def to_redis_dict(self):
+    packed_fields: ClassVar[Tuple[str, ...]] = (
+        'id', 'invitation_id', 'guest_name', 'guest_id', 'response', 'message', 'timestamp'
+    )
+    
+    def to_field_dict(self):
         return {
             'id': self.id,
             'invitation_id': self.invitation_id,
@@ -52,14 +198,18 @@ class GuestResponse(BaseModel):
             'timestamp': self.timestamp.isoformat()
         }
     
+    def to_packed_values(self) -> List[str]:
+        return [self.id, self.invitation_id, self.guest_name, self.guest_id, self.response,
+                self.message or '', self.timestamp.isoformat()]
+    
     @classmethod
-    def from_redis_dict(cls, data):
+    def from_field_dict(cls, data):
         data['timestamp'] = datetime.fromisoformat(data['timestamp'])
         if not data['message']:
             data['message'] = None
         return cls(**data)
 
-class EventSummary(BaseModel):
+class EventSummary(WireModel):
     id: str
     invitation_id: str
     host_id: str
@@ -71,7 +221,12 @@ class EventSummary(BaseModel):
     responses: List[GuestResponse]
     timestamp: datetime
     
-    def to_redis_dict(self):
+    packed_fields: ClassVar[Tuple[str, ...]] = (
+        'id', 'invitation_id', 'host_id', 'total_invited', 'total_responses',
+        'yes_count', 'no_count', 'maybe_count', 'responses', 'timestamp'
+    )
+    
+    def to_field_dict(self):
         return {
             'id': self.id,
             'invitation_id': self.invitation_id,
@@ -81,13 +236,212 @@ class EventSummary(BaseModel):
             'yes_count': self.yes_count,
             'no_count': self.no_count,
             'maybe_count': self.maybe_count,
-            'responses': json.dumps([r.dict() for r in self.responses]),
+            'responses': json.dumps([r.to_field_dict() for r in self.responses]),
             'timestamp': self.timestamp.isoformat()
         }
     
     @classmethod
-    def from_redis_dict(cls, data):
+    def from_field_dict(cls, data):
         data['timestamp'] = datetime.fromisoformat(data['timestamp'])
         responses_data = json.loads(data['responses'])
-        data['responses'] = [GuestResponse(**r) for r in responses_data]
-        return cls(**data)
\ No newline at end of file
+        data['responses'] = [GuestResponse.from_field_dict(r) for r in responses_data]
+        return cls(**data)
+    
+    def to_packed_values(self) -> list:
+        # Embedded responses are packed positionally as well, without a version of their own
+        return [self.id, self.invitation_id, self.host_id, str(self.total_invited), str(self.total_responses),
+                str(self.yes_count), str(self.no_count), str(self.maybe_count),
+                [r.to_packed_values() for r in self.responses], self.timestamp.isoformat()]
+    
+    @classmethod
+    def from_packed_values(cls, values: list):
+        data = dict(zip(cls.packed_fields, values))
+        data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+        responses = data['responses']
+        rows = _unpack_rows(responses) if isinstance(responses, str) else responses
+        data['responses'] = [GuestResponse.from_packed_values(r) for r in rows]
+        return cls(**data)
+
+# Trusted fast path
+#
+# Messages written by our own components do not need validating again on
+# every read. The views below decode them without pydantic: plain
+# ``__slots__`` objects with the model's attributes, whose timestamp is
+# parsed only when it is read (and re-encoded from the original text when
+# the message is forwarded). A summary's embedded responses are decoded on
+# first access. Views encode like the models they mirror, and ``to_model()``
+# validates one when needed. Decode with ``Model.from_trusted_dict(data)``;
+# anything that enters from outside still goes through the models.
+
+class MessageView:
+    """Base for unvalidated read-only views of wire models"""
+    __slots__ = ('_raw_timestamp', '_timestamp')
+    model: ClassVar[type] = None
+    
+    @property
+    def timestamp(self) -> datetime:
+        if self._timestamp is None:
+            self._timestamp = datetime.fromisoformat(self._raw_timestamp)
+        return self._timestamp
+    
+    @classmethod
+    def from_redis_dict(cls, data):
+        payload = data.get(PackedCodec.payload_field)
+        if payload is not None:
+            return cls.from_packed_values(_unpack(payload, cls.model.__name__))
+        return cls.from_field_dict(data)
+    
+    @classmethod
+    def from_packed_values(cls, values: list):
+        return cls(*values)
+    
+    def to_redis_dict(self, codec=None):
+        return (codec or get_codec()).encode(self)
+    
+    def to_packed_values(self) -> list:
+        data = self.to_field_dict()
+        return [data[name] for name in self.model.packed_fields]
+    
+    def to_model(self):
+        """Validated model with the same values"""
+        return self.model.from_redis_dict(self.to_redis_dict(FIELD_CODEC))
+    
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.model.packed_fields)
+        return f"{type(self).__name__}({values})"
+
+class InvitationView(MessageView):
+    __slots__ = ('id', 'event_name', 'event_date', 'event_time', 'location', 'description', 'host_name', 'host_id')
+    model = EventInvitation
+    
+    def __init__(self, id, event_name, event_date, event_time, location, description, host_name, host_id, timestamp):
+        self.id = id
+        self.event_name = event_name
+        self.event_date = event_date
+        self.event_time = event_time
+        self.location = location
+        self.description = description
+        self.host_name = host_name
+        self.host_id = host_id
+        self._raw_timestamp = timestamp
+        self._timestamp = None
+    
+    @classmethod
+    def from_field_dict(cls, data):
+        return cls(data['id'], data['event_name'], data['event_date'], data['event_time'], data['location'],
+                   data['description'], data['host_name'], data['host_id'], data['timestamp'])
+    
+    def to_field_dict(self):
+        return {
+            'id': self.id,
+            'event_name': self.event_name,
+            'event_date': self.event_date,
+            'event_time': self.event_time,
+            'location': self.location,
+            'description': self.description,
+            'host_name': self.host_name,
+            'host_id': self.host_id,
+            'timestamp': self._raw_timestamp
+        }
+    
+    def to_packed_values(self) -> List[str]:
+        return [self.id, self.event_name, self.event_date, self.event_time, self.location,
+                self.description, self.host_name, self.host_id, self._raw_timestamp]
+
+class ResponseView(MessageView):
+    __slots__ = ('id', 'invitation_id', 'guest_name', 'guest_id', 'response', 'message')
+    model = GuestResponse
+    
+    def __init__(self, id, invitation_id, guest_name, guest_id, response, message, timestamp):
+        self.id = id
+        self.invitation_id = invitation_id
+        self.guest_name = guest_name
+        self.guest_id = guest_id
+        self.response = response
+        self.message = message or None
+        self._raw_timestamp = timestamp
+        self._timestamp = None
+    
+    @classmethod
+    def from_field_dict(cls, data):
+        return cls(data['id'], data['invitation_id'], data['guest_name'], data['guest_id'],
+                   data['response'], data['message'], data['timestamp'])
+    
+    def to_field_dict(self):
+        return {
+            'id': self.id,
+            'invitation_id': self.invitation_id,
+            'guest_name': self.guest_name,
+            'guest_id': self.guest_id,
+            'response': self.response,
+            'message': self.message or '',
+            'timestamp': self._raw_timestamp
+        }
+    
+    def to_packed_values(self) -> List[str]:
+        return [self.id, self.invitation_id, self.guest_name, self.guest_id, self.response,
+                self.message or '', self._raw_timestamp]
+
+class SummaryView(MessageView):
+    __slots__ = ('id', 'invitation_id', 'host_id', 'total_invited', 'total_responses',
+                 'yes_count', 'no_count', 'maybe_count', '_raw_responses', '_responses')
+    model = EventSummary
+    
+    def __init__(self, id, invitation_id, host_id, total_invited, total_responses,
+                 yes_count, no_count, maybe_count, responses, timestamp):
+        self.id = id
+        self.invitation_id = invitation_id
+        self.host_id = host_id
+        self.total_invited = int(total_invited)
+        self.total_responses = int(total_responses)
+        self.yes_count = int(yes_count)
+        self.no_count = int(no_count)
+        self.maybe_count = int(maybe_count)
+        self._raw_responses = responses  # JSON text (fields) or a list of packed rows
+        self._responses = None
+        self._raw_timestamp = timestamp
+        self._timestamp = None
+    
+    @property
+    def responses(self) -> List[ResponseView]:
+        if self._responses is None:
+            raw = self._raw_responses
+            if isinstance(raw, str):
+                self._responses = [ResponseView.from_field_dict(r) for r in json.loads(raw)]
+            else:
+                self._responses = [ResponseView.from_packed_values(r) for r in raw]
+        return self._responses
+    
+    @classmethod
+    def from_packed_values(cls, values: list):
+        values = list(values)
+        index = cls.model.packed_fields.index('responses')
+        values[index] = _unpack_rows(values[index])
+        return cls(*values)
+    
+    @classmethod
+    def from_field_dict(cls, data):
+        return cls(data['id'], data['invitation_id'], data['host_id'], data['total_invited'],
+                   data['total_responses'], data['yes_count'], data['no_count'], data['maybe_count'],
+                   data['responses'], data['timestamp'])
+    
+    def to_field_dict(self):
+        return {
+            'id': self.id,
+            'invitation_id': self.invitation_id,
+            'host_id': self.host_id,
+            'total_invited': self.total_invited,
+            'total_responses': self.total_responses,
+            'yes_count': self.yes_count,
+            'no_count': self.no_count,
+            'maybe_count': self.maybe_count,
+            'responses': json.dumps([r.to_field_dict() for r in self.responses]),
+            'timestamp': self._raw_timestamp
+        }
+    
+    def to_packed_values(self) -> list:
+        return [self.id, self.invitation_id, self.host_id, str(self.total_invited), str(self.total_responses),
+                str(self.yes_count), str(self.no_count), str(self.maybe_count),
+                [r.to_packed_values() for r in self.responses], self._raw_timestamp]
+
+VIEWS = {view.model: view for view in (InvitationView, ResponseView, SummaryView)}
\ No newline at end of file
@@ -1,78 +1,359 @@
-import redis
+import asyncio
+import time
+import weakref
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
 from config import Config
-from typing import Dict
+from logs import get_logger
+from memory_broker import MemoryRedis, shared_broker
+from metrics import BATCH_SIZE, REDIS_SECONDS
+from routing import delivery_pattern, summary_pattern
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = get_logger('redis')
+message_log = get_logger('redis', per_message=True)
+
+XREADGROUP_SECONDS = REDIS_SECONDS.labels(op='xreadgroup')
+XREADGROUP_SIZE = BATCH_SIZE.labels(op='xreadgroup')
+XACK_SECONDS = REDIS_SECONDS.labels(op='xack')
+XACK_SIZE = BATCH_SIZE.labels(op='xack')
+XADD_SECONDS = REDIS_SECONDS.labels(op='xadd')
+XADD_PIPELINE_SECONDS = REDIS_SECONDS.labels(op='xadd_pipeline')
+XADD_PIPELINE_SIZE = BATCH_SIZE.labels(op='xadd_pipeline')
+
+# (stream, group) pairs known to exist, so each group is created once per process,
+# with the start ID they were created at, so a deleted group is recreated the same way
+_known_groups: Dict[Tuple[str, str], str] = {}
+
+
+_fake_server = None
+
+
+def _make_fake_redis() -> redis.Redis:
+    """An in-process fakeredis client; all clients in the process share one fake server"""
+    global _fake_server
+    try:
+        import fakeredis
+        from fakeredis import aioredis
+    except ImportError as e:
+        raise RuntimeError("BROKER_BACKEND=fakeredis needs the fakeredis package (pip install fakeredis lupa)") from e
+    if _fake_server is None:
+        _fake_server = fakeredis.FakeServer()
+    return aioredis.FakeRedis(server=_fake_server, decode_responses=True)
+
+
+def _make_redis() -> redis.Redis:
+    """A Redis client with its own connection pool (bounded if REDIS_MAX_CONNECTIONS is set)"""
+    if Config.BROKER_BACKEND == 'fakeredis':
+        return _make_fake_redis()
+    if Config.BROKER_BACKEND == 'memory':
+        return MemoryRedis(shared_broker())  # see memory_broker.py
+    pool_args = dict(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB, decode_responses=True)
+    if Config.REDIS_MAX_CONNECTIONS:
+        # Callers wait for a free connection instead of failing when the pool is exhausted
+        pool = redis.BlockingConnectionPool(max_connections=Config.REDIS_MAX_CONNECTIONS, timeout=None, **pool_args)
+    else:
+        pool = redis.ConnectionPool(**pool_args)
+    return redis.Redis(connection_pool=pool)
+
+
+class SharedConnection:
+    """The Redis client and connection pool shared by every RedisClient on one event loop.
+
+    The connection is pinged once, consumer groups requested in the same loop
+    iteration are created with one pipeline, and the pool is closed when the
+    last RedisClient using it is closed.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.redis = _make_redis()
+        self.users = 0
+        self._ping: Optional[asyncio.Future] = None
+        self._pending_groups: Dict[Tuple[str, str], Tuple[str, asyncio.Future]] = {}
+        self._flush_scheduled = False
+
+    async def ready(self):
+        """Ping the server once per shared connection"""
+        if self._ping is None:
+            self._ping = asyncio.ensure_future(self.redis.ping())
+        try:
+            await asyncio.shield(self._ping)
+        except Exception:
+            self._ping = None  # let the next caller retry
+            raise
+
+    async def ensure_group(self, stream: str, group: str, start_id: str = '0'):
+        """Create a consumer group, batched with other requests made in the same loop iteration"""
+        pending = self._pending_groups.get((stream, group))
+        if pending is None:
+            pending = (start_id, self.loop.create_future())
+            self._pending_groups[(stream, group)] = pending
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                self.loop.call_soon(lambda: asyncio.ensure_future(self._create_pending_groups()))
+        await pending[1]
+
+    async def _create_pending_groups(self):
+        self._flush_scheduled = False
+        requests, self._pending_groups = self._pending_groups, {}
+        items = list(requests.items())
+        created = []
+        for offset in range(0, len(items), Config.PUBLISH_CHUNK_SIZE):
+            chunk = items[offset:offset + Config.PUBLISH_CHUNK_SIZE]
+            pipe = self.redis.pipeline(transaction=False)
+            for (stream, group), (start_id, _) in chunk:
+                pipe.xgroup_create(stream, group, start_id, mkstream=True)
+            try:
+                results = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                results = [e] * len(chunk)
+            for ((stream, group), (start_id, future)), result in zip(chunk, results):
+                if isinstance(result, Exception) and "BUSYGROUP" not in str(result):
+                    log.error("❌ Error creating consumer group: %s", result)
+                    future.set_exception(result)
+                    continue
+                if not isinstance(result, Exception):
+                    created.append((stream, group))
+                _known_groups[stream, group] = start_id
+                future.set_result(None)
+        if len(created) == 1:
+            log.info("✅ Created consumer group '%s' for stream '%s'", created[0][1], created[0][0])
+        elif created:
+            log.info("✅ Created %d consumer groups", len(created))
+
+
+_shared: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SharedConnection]" = weakref.WeakKeyDictionary()
+
+
+def shared_connection() -> Optional[SharedConnection]:
+    """The running loop's shared connection, or None outside an event loop"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    shared = _shared.get(loop)
+    if shared is None:
+        shared = _shared[loop] = SharedConnection(loop)
+    return shared
+
 
 class RedisClient:
+    """Asyncio Redis Streams client used by every component.
+
+    All commands are awaited, so a blocking XREADGROUP only suspends the
+    listener that issued it instead of the whole event loop. Clients created
+    inside a running event loop share one connection pool (see
+    ``SharedConnection``), so constructing one is cheap; a client created
+    outside a loop gets a pool of its own.
+    """
+
     def __init__(self):
-        self.redis = redis.Redis(
-            host=Config.REDIS_HOST,
-            port=Config.REDIS_PORT,
-            db=Config.REDIS_DB,
-            decode_responses=True
-        )
-        self._ensure_streams_exist()
-    
-    def _ensure_streams_exist(self):
-        """Create streams if they don't exist"""
-        streams = [
-            Config.INVITATION_STREAM,
-            Config.RESPONSE_STREAM,
-            Config.SUMMARY_STREAM
-        ]
-        
-        for stream in streams:
+        self.shared = shared_connection()
+        if self.shared is not None:
+            self.shared.users += 1
+            self.redis = self.shared.redis
+        else:
+            self.redis = _make_redis()
+        self.closed = False
+
+    async def connect(self):
+        """Check the connection (once per shared pool)"""
+        if self.shared is not None:
+            await self.shared.ready()
+        else:
+            await self.redis.ping()
+        return self
+
+    async def create_consumer_group(self, stream: str, group: str, consumer_id: str = '0'):
+        """Create a consumer group (and its stream) unless this process already did"""
+        if (stream, group) in _known_groups:
+            return
+        if self.shared is not None:
             try:
-                # Try to create the stream with a dummy message
-                self.redis.xadd(stream, {'init': 'stream_created'})
-                # Remove the dummy message
-                messages = self.redis.xrange(stream, count=1)
-                if messages:
-                    self.redis.xdel(stream, messages[0][0])
-            except redis.ResponseError:
-                pass  # Stream might already exist
-    
-    def create_consumer_group(self, stream: str, group: str, consumer_id: str = '0'):
-        """Create a consumer group for a stream"""
+                await self.shared.ensure_group(stream, group, consumer_id)
+            except ResponseError:
+                pass  # already logged
+            return
         try:
-            self.redis.xgroup_create(stream, group, consumer_id, mkstream=True)
-            print(f"✅ Created consumer group '{group}' for stream '{stream}'")
-        except redis.ResponseError as e:
+            await self.redis.xgroup_create(stream, group, consumer_id, mkstream=True)
+            log.info("✅ Created consumer group '%s' for stream '%s'", group, stream)
+        except ResponseError as e:
             if "BUSYGROUP" not in str(e):
-                print(f"❌ Error creating consumer group: {e}")
-    
-    def publish_message(self, stream: str, data: Dict) -> str:
+                log.error("❌ Error creating consumer group: %s", e)
+                return
+        _known_groups[stream, group] = consumer_id
+
+    @staticmethod
+    def _trim_args() -> Dict:
+        """XADD arguments for the approximate MAXLEN cap (MAXLEN ~ lets Redis trim whole nodes)"""
+        if Config.STREAM_MAXLEN:
+            return {'maxlen': Config.STREAM_MAXLEN, 'approximate': True}
+        return {}
+
+    async def publish_message(self, stream: str, data: Dict) -> str:
         """Publish a message to a Redis stream"""
-        message_id = self.redis.xadd(stream, data)
-        print(f"📤 Published message {message_id} to stream '{stream}'")
+        started = time.perf_counter()
+        message_id = await self.redis.xadd(stream, data, **self._trim_args())
+        XADD_SECONDS.observe(time.perf_counter() - started)
+        message_log.debug("📤 Published message %s to stream '%s'", message_id, stream)
         return message_id
-    
-    def consume_messages(self, stream: str, group: str, consumer: str, count: int = 1, block: int = 1000):
-        """Consume messages from a Redis stream using consumer groups"""
+
+    async def publish_many(self, stream: str, messages: Iterable[Dict], chunk_size: int = None,
+                           transaction: bool = False) -> List[str]:
+        """Publish many messages to a stream with chunked pipelines.
+
+        Each chunk of ``chunk_size`` XADDs is sent in one round trip. Pipelines
+        are non-transactional by default; pass ``transaction=True`` to wrap each
+        chunk in MULTI/EXEC.
+        """
+        message_ids = await self.publish_batch(
+            ((stream, data) for data in messages), chunk_size, transaction
+        )
+        message_log.debug("📤 Published %d message(s) to stream '%s'", len(message_ids), stream)
+        return message_ids
+
+    async def publish_batch(self, entries: Iterable[Tuple[str, Dict]], chunk_size: int = None,
+                            transaction: bool = False) -> List[str]:
+        """Publish ``(stream, data)`` pairs, possibly to many streams, with chunked pipelines"""
+        chunk_size = chunk_size or Config.PUBLISH_CHUNK_SIZE
+        trim_args = self._trim_args()
+        message_ids = []
+        pipe = self.redis.pipeline(transaction=transaction)
+        queued = 0
+        for stream, data in entries:
+            pipe.xadd(stream, data, **trim_args)
+            queued += 1
+            if queued >= chunk_size:
+                message_ids.extend(await self._execute_publish(pipe, queued))
+                queued = 0
+        if queued:
+            message_ids.extend(await self._execute_publish(pipe, queued))
+        return message_ids
+
+    @staticmethod
+    async def _execute_publish(pipe, queued: int) -> List[str]:
+        started = time.perf_counter()
+        message_ids = await pipe.execute()
+        XADD_PIPELINE_SECONDS.observe(time.perf_counter() - started)
+        XADD_PIPELINE_SIZE.observe(queued)
+        return message_ids
+
+    async def consume_messages(self, stream: str, group: str, consumer: str, count: int = None, block: int = None):
+        """Consume up to ``count`` messages from a Redis stream using consumer groups"""
+        return await self.consume_streams([stream], group, consumer, count, block)
+
+    async def consume_streams(self, streams: List[str], group: str, consumer: str, count: int = None, block: int = None):
+        """Consume new messages from several streams with one XREADGROUP (same group on each)"""
+        count = count or Config.CONSUMER_BATCH_SIZE
+        block = Config.CONSUMER_BLOCK_MS if block is None else block
         try:
-            messages = self.redis.xreadgroup(
-                group, consumer, {stream: '>'}, count=count, block=block
+            started = time.perf_counter()
+            messages = await self.redis.xreadgroup(
+                group, consumer, {stream: '>' for stream in streams}, count=count, block=block
             )
+            XREADGROUP_SECONDS.observe(time.perf_counter() - started)
+            if messages:
+                XREADGROUP_SIZE.observe(sum(len(stream_messages) for _, stream_messages in messages))
             return messages
-        except redis.ResponseError as e:
-            print(f"❌ Error consuming messages: {e}")
+        except ResponseError as e:
+            log.error("❌ Error consuming messages: %s", e)
+            if "NOGROUP" in str(e):
+                # The stream was deleted (e.g. by cleanup_streams); recreate its group at its original start ID
+                for stream in streams:
+                    start_id = _known_groups.pop((stream, group), '0')
+                    await self.create_consumer_group(stream, group, start_id)
             return []
-    
-    def acknowledge_message(self, stream: str, group: str, message_id: str):
+
+    async def acknowledge_message(self, stream: str, group: str, message_id: str):
         """Acknowledge that a message has been processed"""
-        self.redis.xack(stream, group, message_id)
-        print(f"✅ Acknowledged message {message_id} in stream '{stream}'")
-    
-    def cleanup_streams(self):
+        await self.acknowledge_messages(stream, group, [message_id])
+
+    async def acknowledge_messages(self, stream: str, group: str, message_ids: List[str]) -> int:
+        """Acknowledge a batch of processed messages with a single XACK"""
+        if not message_ids:
+            return 0
+        started = time.perf_counter()
+        acked = await self.redis.xack(stream, group, *message_ids)
+        XACK_SECONDS.observe(time.perf_counter() - started)
+        XACK_SIZE.observe(len(message_ids))
+        message_log.debug("✅ Acknowledged %d message(s) in stream '%s'", len(message_ids), stream)
+        return acked
+
+    async def claim_pending(self, stream: str, group: str, consumer: str, min_idle_ms: int = None) -> List[Tuple[str, Dict]]:
+        """Take over unacknowledged entries, e.g. after a restart.
+
+        Entries still pending for ``consumer`` itself are claimed right away
+        (XPENDING + XCLAIM); entries left by other consumers are claimed only
+        once they have been idle for ``min_idle_ms`` (XAUTOCLAIM).
+        """
+        min_idle_ms = Config.RECOVERY_MIN_IDLE_MS if min_idle_ms is None else min_idle_ms
+        claimed = []
+
+        start = '-'
+        while True:
+            pending = await self.redis.xpending_range(
+                stream, group, min=start, max='+', count=Config.CONSUMER_BATCH_SIZE, consumername=consumer
+            )
+            if not pending:
+                break
+            message_ids = [entry['message_id'] for entry in pending]
+            claimed.extend(await self.redis.xclaim(stream, group, consumer, 0, message_ids))
+            start = f"({message_ids[-1]}"
+
+        cursor = '0-0'
+        while True:
+            result = await self.redis.xautoclaim(
+                stream, group, consumer, min_idle_ms, start_id=cursor, count=Config.CONSUMER_BATCH_SIZE
+            )
+            cursor, messages = result[0], result[1]
+            claimed.extend(messages)
+            if cursor in ('0-0', b'0-0'):
+                break
+
+        # Entries deleted from the stream while pending come back without fields
+        claimed = [(message_id, fields) for message_id, fields in claimed if fields]
+        if claimed:
+            log.info("♻️  Claimed %d pending message(s) in stream '%s'", len(claimed), stream)
+        return claimed
+
+    async def cleanup_streams(self):
         """Clean up all streams (for testing/demo purposes)"""
         streams = [
             Config.INVITATION_STREAM,
             Config.RESPONSE_STREAM,
             Config.SUMMARY_STREAM
         ]
-        
+
+        _known_groups.clear()
         for stream in streams:
             try:
-                self.redis.delete(stream)
-                print(f"🧹 Cleaned up stream '{stream}'")
-            except redis.ResponseError:
-                pass
\ No newline at end of file
+                await self.redis.delete(stream)
+                log.info("🧹 Cleaned up stream '%s'", stream)
+            except ResponseError:
+                pass
+
+        # Per-guest delivery, per-host summary and per-coordinator-worker streams
+        patterns = (delivery_pattern(), summary_pattern(),
+                    f"{Config.INVITATION_STREAM}:*", f"{Config.RESPONSE_STREAM}:*")
+        for pattern in patterns:
+            async for stream in self.redis.scan_iter(match=pattern, _type='stream'):
+                await self.redis.delete(stream)
+        log.info("🧹 Cleaned up guest delivery, host summary and coordinator worker streams")
+
+        # Chunked responses of large summaries (see summary_details.py)
+        async for key in self.redis.scan_iter(match=f"{Config.SUMMARY_DETAIL_PREFIX}:*", _type='list'):
+            await self.redis.delete(key)
+
+    async def close(self):
+        """Release the connection pool; a shared pool is closed by its last user"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.shared is None:
+            await self.redis.aclose()
+            return
+        self.shared.users -= 1
+        if self.shared.users == 0:
+            _shared.pop(self.shared.loop, None)
+            await self.shared.redis.aclose()
@@ -0,0 +1,206 @@
+"""Bulk guest response generation for large simulations.
+
+``EventGuest._generate_response`` answers one invitation at a time: a
+``random.random()`` to decide whether the guest follows its likely response,
+a ``random.choices`` over its weights otherwise, a ``random.choice`` of
+message, a ``uuid4()`` and a validated model. ``ResponseSampler`` makes the
+same draws for N guests at once:
+
+- guests are described by a preference matrix: each guest's likely response
+  plus an index into a small table of cumulative weight rows, so guests that
+  share preferences share a row;
+- kinds and messages come from one vectorised pass over that matrix when
+  NumPy is installed and the batch has at least ``NUMPY_MIN_BATCH`` guests,
+  or from a tight pure-Python loop otherwise (NumPy's per-call overhead
+  makes it the slower choice for small batches, down to a single guest);
+- response IDs are version-4 UUIDs cut from a single ``os.urandom`` buffer;
+- ``redis_dicts`` encodes the results straight to wire dicts
+  (``WireModel.encode_rows``) and ``views`` returns ``ResponseView``s,
+  neither building a validated model per response.
+
+The draws follow the per-guest logic exactly: with probability
+``FOLLOW_PREFERENCE`` the likely response, else a weighted choice; then a
+uniformly chosen message for that kind.
+"""
+
+import os
+import random
+from bisect import bisect_right
+from datetime import datetime
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from models import GuestResponse, ResponseView
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python sampler is used instead
+    np = None
+
+RESPONSE_KINDS = ('yes', 'maybe', 'no')
+KIND_INDEX = {kind: index for index, kind in enumerate(RESPONSE_KINDS)}
+DEFAULT_WEIGHTS = (0.4, 0.3, 0.3)  # EventGuest's default response_probability
+FOLLOW_PREFERENCE = 0.7  # chance a guest gives its likely response
+# Smallest batch drawn with NumPy; below it the pure-Python paths are faster
+# (measured with benchmarks/response_generation.py: break-even at about 50
+# guests for sampling and 20 for UUIDs)
+NUMPY_MIN_BATCH = 64
+
+# Positions of the hex digits in a formatted UUID (the rest are dashes)
+UUID_DIGIT_COLUMNS = [column for column in range(36) if column not in (8, 13, 18, 23)]
+# RFC 4122 variant: the top two bits of hex digit 16 are 10
+VARIANT_DIGIT = {digit: '89ab'[int(digit, 16) & 3] for digit in '0123456789abcdef'}
+
+WeightRow = Tuple[float, ...]
+
+
+def cumulative_weights(weights: Sequence[float]) -> WeightRow:
+    """Normalised cumulative weights in ``RESPONSE_KINDS`` order (last one exactly 1.0)"""
+    total = sum(weights)
+    cumulative = [value / total for value in accumulate(weights)]
+    cumulative[-1] = 1.0
+    return tuple(cumulative)
+
+
+def preference_matrix(preferences: Sequence[Dict]) -> Tuple[List[int], List[WeightRow], List[int]]:
+    """Preference matrix for EventGuest preference dicts.
+
+    Returns each guest's likely-response index, the table of distinct
+    cumulative weight rows and each guest's row in that table.
+    """
+    likely, table, row_index = [], [], []
+    rows: Dict[WeightRow, int] = {}
+    seen: Dict[int, Tuple[int, int]] = {}  # id(preference dict) -> (likely, row)
+    for preference in preferences:
+        entry = seen.get(id(preference))
+        if entry is None:
+            probabilities = preference.get('response_probability', dict(zip(RESPONSE_KINDS, DEFAULT_WEIGHTS)))
+            row = cumulative_weights([probabilities.get(kind, 0) for kind in RESPONSE_KINDS])
+            if row not in rows:
+                rows[row] = len(table)
+                table.append(row)
+            entry = seen[id(preference)] = (KIND_INDEX[preference.get('likely_response', 'maybe')], rows[row])
+        likely.append(entry[0])
+        row_index.append(entry[1])
+    return likely, table, row_index
+
+
+def bulk_uuid4(count: int, use_numpy: bool = None) -> List[str]:
+    """``count`` random (version 4) UUID strings from one ``os.urandom`` call"""
+    if use_numpy is None:
+        use_numpy = np is not None and count >= NUMPY_MIN_BATCH
+    if use_numpy:
+        raw = bytearray(os.urandom(16 * count))
+        octets = np.frombuffer(raw, dtype=np.uint8).reshape(count, 16)
+        octets[:, 6] = (octets[:, 6] & 0x0F) | 0x40  # version 4
+        octets[:, 8] = (octets[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+        digits = np.frombuffer(raw.hex().encode('ascii'), dtype=np.uint8).reshape(count, 32)
+        formatted = np.full((count, 36), ord('-'), dtype=np.uint8)
+        formatted[:, UUID_DIGIT_COLUMNS] = digits
+        text = formatted.tobytes().decode('ascii')
+        return [text[i:i + 36] for i in range(0, 36 * count, 36)]
+    # Version and variant are set on the hex text: digit 12 becomes '4', digit 16 one of '89ab'
+    hex_digits = os.urandom(16 * count).hex()
+    return [
+        f"{hex_digits[i:i + 8]}-{hex_digits[i + 8:i + 12]}-4{hex_digits[i + 13:i + 16]}-"
+        f"{VARIANT_DIGIT[hex_digits[i + 16]]}{hex_digits[i + 17:i + 20]}-{hex_digits[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+class ResponseSampler:
+    """Draws responses for many guests at once.
+
+    Guests are given as their likely-response indexes, a table of cumulative
+    weight rows (see ``cumulative_weights``) and, when the table has more
+    than one row, each guest's row index (see ``preference_matrix``).
+    Batches of at least ``numpy_min_batch`` guests use NumPy when it is
+    installed; ``use_numpy=False`` forces the pure-Python path.
+    """
+
+    def __init__(self, messages: Dict[str, Sequence[str]], seed: int = None, use_numpy: bool = None,
+                 numpy_min_batch: int = NUMPY_MIN_BATCH):
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise RuntimeError("NumPy is not installed; use the pure-Python sampler (use_numpy=False)")
+        self.numpy_min_batch = numpy_min_batch
+        # Message templates, flattened once: kind k's messages are templates[offsets[k]:offsets[k] + counts[k]]
+        self.templates = [message for kind in RESPONSE_KINDS for message in messages[kind]]
+        self.counts = [len(messages[kind]) for kind in RESPONSE_KINDS]
+        self.offsets = [0, *accumulate(self.counts)][:-1]
+        self.rng = random.Random(seed)
+        if self.use_numpy:
+            self.np_rng = np.random.default_rng(seed)
+            self._counts = np.array(self.counts)
+            self._offsets = np.array(self.offsets)
+
+    def _numpy_for(self, count: int) -> bool:
+        return self.use_numpy and count >= self.numpy_min_batch
+
+    def sample(self, likely: Sequence[int], table: Sequence[WeightRow],
+               row_index: Optional[Sequence[int]] = None) -> Tuple[List[int], List[int]]:
+        """Response kind indexes and template indexes for ``len(likely)`` guests"""
+        if self._numpy_for(len(likely)):
+            return self._sample_numpy(likely, table, row_index)
+        return self._sample_python(likely, table, row_index)
+
+    def _sample_numpy(self, likely, table, row_index):
+        count = len(likely)
+        draws = self.np_rng.random((3, count))
+        if row_index is None:
+            chosen = np.searchsorted(np.asarray(table[0]), draws[1], side='right')
+        else:
+            # bisect_right over each guest's cumulative row: how many bounds are <= the draw
+            cumulative = np.asarray(table)[np.asarray(row_index)]
+            chosen = (draws[1][:, None] >= cumulative).sum(axis=1)
+        kinds = np.where(draws[0] < FOLLOW_PREFERENCE, np.asarray(likely),
+                         np.minimum(chosen, len(RESPONSE_KINDS) - 1))
+        templates = self._offsets[kinds] + (draws[2] * self._counts[kinds]).astype(np.int64)
+        return kinds.tolist(), templates.tolist()
+
+    def _sample_python(self, likely, table, row_index):
+        rand = self.rng.random
+        counts, offsets, last = self.counts, self.offsets, len(RESPONSE_KINDS) - 1
+        shared = table[0]
+        kinds, templates = [], []
+        for index, likely_kind in enumerate(likely):
+            if rand() < FOLLOW_PREFERENCE:
+                kind = likely_kind
+            else:
+                row = shared if row_index is None else table[row_index[index]]
+                kind = min(bisect_right(row, rand()), last)
+            kinds.append(kind)
+            templates.append(offsets[kind] + int(rand() * counts[kind]))
+        return kinds, templates
+
+    def rows(self, invitation_ids: Union[str, Sequence[str]], guest_ids: Sequence[str],
+             guest_names: Sequence[str], likely: Sequence[int], table: Sequence[WeightRow],
+             row_index: Optional[Sequence[int]] = None) -> List[Tuple[str, ...]]:
+        """Response values in ``GuestResponse.packed_fields`` order, without the timestamp.
+
+        ``invitation_ids`` is one ID for every guest or one per guest.
+        """
+        count = len(guest_ids)
+        if isinstance(invitation_ids, str):
+            invitation_ids = [invitation_ids] * count
+        kinds, template_indexes = self.sample(likely, table, row_index)
+        templates = self.templates
+        return [
+            (response_id, invitation_id, guest_name, guest_id, RESPONSE_KINDS[kind], templates[template])
+            for response_id, invitation_id, guest_name, guest_id, kind, template
+            in zip(bulk_uuid4(count, self._numpy_for(count)), invitation_ids, guest_names, guest_ids, kinds, template_indexes)
+        ]
+
+    def redis_dicts(self, *args, timestamp: datetime = None, codec=None, **kwargs) -> List[Dict[str, str]]:
+        """Wire dicts for the responses (same arguments as ``rows``)"""
+        return GuestResponse.encode_rows(self.rows(*args, **kwargs), timestamp or datetime.now(), codec)
+
+    def views(self, *args, timestamp: datetime = None, **kwargs) -> List[ResponseView]:
+        """Unvalidated ``ResponseView``s for the responses (same arguments as ``rows``)"""
+        stamp = (timestamp or datetime.now()).isoformat()
+        return [ResponseView(*row, stamp) for row in self.rows(*args, **kwargs)]
+
+    def responses(self, *args, timestamp: datetime = None, **kwargs) -> List[GuestResponse]:
+        """GuestResponse models for the responses (same arguments as ``rows``)"""
+        timestamp = timestamp or datetime.now()
+        names = GuestResponse.packed_fields
+        return [GuestResponse(**dict(zip(names, row)), timestamp=timestamp) for row in self.rows(*args, **kwargs)]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""Stream retention: time-based MINID trimming that never drops unprocessed entries.
+
+The compactor enforces an age limit: entries older than
+``Config.STREAM_RETENTION_SECONDS`` are trimmed with ``XTRIM MINID``, but
+never past the oldest entry still pending in any consumer group or not yet
+delivered to one. The optional approximate ``MAXLEN`` cap on every XADD
+(``Config.STREAM_MAXLEN``, off by default) gives no such guarantee.
+"""
+
+import asyncio
+import time
+from typing import List, NamedTuple, Optional, Tuple
+from redis.exceptions import ResponseError
+from config import Config
+from redis_client import RedisClient
+from logs import get_logger, setup_logging
+
+log = get_logger('retention')
+
+
+class CompactionResult(NamedTuple):
+    stream: str
+    entries_removed: int
+    bytes_reclaimed: int
+
+
+def parse_id(message_id: str) -> Tuple[int, int]:
+    milliseconds, _, sequence = message_id.partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
+def format_id(parsed: Tuple[int, int]) -> str:
+    return f"{parsed[0]}-{parsed[1]}"
+
+
+def stream_patterns() -> List[str]:
+    """SCAN patterns covering every stream the system writes"""
+    return [
+        Config.INVITATION_STREAM, f"{Config.INVITATION_STREAM}:*",
+        Config.RESPONSE_STREAM, f"{Config.RESPONSE_STREAM}:*",
+        Config.SUMMARY_STREAM, f"{Config.SUMMARY_STREAM}:*",
+        f"{Config.GUEST_DELIVERY_PREFIX}:*",
+    ]
+
+
+class StreamCompactor:
+    """Background task that trims expired stream entries and reports reclaimed memory"""
+
+    def __init__(self, redis_client: RedisClient, retention_seconds: int = None, interval: float = None):
+        self.redis_client = redis_client
+        self.redis = redis_client.redis
+        self.retention_seconds = Config.STREAM_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        self.interval = Config.COMPACTOR_INTERVAL_SECONDS if interval is None else interval
+        self.running = True
+        self.stopped = asyncio.Event()  # wakes the sleep between passes on stop()
+        self.total_bytes_reclaimed = 0
+
+    async def safe_min_id(self, stream: str, cutoff: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Lowest ID that may be used as MINID without losing unprocessed entries"""
+        floor = cutoff
+        try:
+            groups = await self.redis.xinfo_groups(stream)
+        except ResponseError:
+            return None  # stream vanished
+        for group in groups:
+            # Entries after last-delivered-id have not been read by this group yet
+            last_delivered = parse_id(group['last-delivered-id'])
+            floor = min(floor, (last_delivered[0], last_delivered[1] + 1))
+            if group['pending']:
+                pending = await self.redis.xpending(stream, group['name'])
+                if pending['min']:
+                    floor = min(floor, parse_id(pending['min']))
+        return floor
+
+    async def memory_usage(self, stream: str) -> int:
+        try:
+            return await self.redis.memory_usage(stream) or 0
+        except ResponseError:
+            return 0
+
+    async def compact_stream(self, stream: str, now: float = None) -> CompactionResult:
+        """Trim one stream; returns how many entries and bytes were reclaimed"""
+        now = time.time() if now is None else now
+        cutoff = (int((now - self.retention_seconds) * 1000), 0)
+        min_id = await self.safe_min_id(stream, cutoff)
+        if min_id is None:
+            return CompactionResult(stream, 0, 0)
+
+        before = await self.memory_usage(stream)
+        removed = await self.redis.xtrim(stream, minid=format_id(min_id), approximate=False)
+        after = await self.memory_usage(stream) if removed else before
+        return CompactionResult(stream, removed, max(before - after, 0))
+
+    async def streams(self) -> List[str]:
+        found = set()
+        for pattern in stream_patterns():
+            async for stream in self.redis.scan_iter(match=pattern, _type='stream'):
+                found.add(stream)
+        return sorted(found)
+
+    async def compact(self) -> List[CompactionResult]:
+        """Trim every stream once and log a report"""
+        if not self.retention_seconds:
+            return []
+        now = time.time()
+        results = [await self.compact_stream(stream, now) for stream in await self.streams()]
+        removed = sum(result.entries_removed for result in results)
+        reclaimed = sum(result.bytes_reclaimed for result in results)
+        self.total_bytes_reclaimed += reclaimed
+        log.info("🧹 Compacted %d stream(s): removed %d entries, reclaimed %d bytes (%d total)",
+                 len(results), removed, reclaimed, self.total_bytes_reclaimed)
+        return results
+
+    async def run(self):
+        """Compact every ``interval`` seconds until stopped"""
+        while self.running:
+            try:
+                await self.compact()
+            except Exception as e:
+                log.error("❌ Error compacting streams: %s", e)
+            try:
+                await asyncio.wait_for(self.stopped.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self.running = False
+        self.stopped.set()
+
+
+async def main():
+    redis_client = RedisClient()
+    compactor = StreamCompactor(redis_client)
+    try:
+        await compactor.compact()
+    finally:
+        await redis_client.close()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(main())
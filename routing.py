@@ -0,0 +1,122 @@
+"""Stream routing for forwarded invitations and event summaries.
+
+The coordinator does not write personalised invitations back onto the shared
+invitation stream. Each guest gets a delivery stream of its own or, when
+``Config.GUEST_STREAM_SHARDS`` is set, one of N shard streams picked by a
+stable hash of the guest ID. Either way a guest reads only its own traffic
+(plus, in shard mode, that of the guests hashed to the same shard).
+
+Summaries are routed the same way on ``host_id``: one stream per host, or
+``Config.SUMMARY_PARTITIONS`` hash partitions.
+
+With several coordinator workers, each invitation is owned by exactly one
+worker, picked by consistent hashing on the invitation ID. The owner gets
+the invitation through its inbox stream and the guests' responses through
+its own response stream.
+"""
+
+import bisect
+import hashlib
+import zlib
+from functools import lru_cache
+from typing import List
+from config import Config
+
+
+def shard_for(key: str, shards: int) -> int:
+    """Stable shard index for a key (same result in every process)"""
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+def guest_stream(guest_id: str) -> str:
+    """Delivery stream that carries invitations for ``guest_id``"""
+    if Config.GUEST_STREAM_SHARDS:
+        return f"{Config.GUEST_DELIVERY_PREFIX}:shard:{shard_for(guest_id, Config.GUEST_STREAM_SHARDS)}"
+    return f"{Config.GUEST_DELIVERY_PREFIX}:guest:{guest_id}"
+
+
+def guest_shard_streams() -> List[str]:
+    """Every shard delivery stream (empty unless ``Config.GUEST_STREAM_SHARDS`` is set)"""
+    return [f"{Config.GUEST_DELIVERY_PREFIX}:shard:{shard}" for shard in range(Config.GUEST_STREAM_SHARDS)]
+
+
+def guest_group(guest_id: str) -> str:
+    """Consumer group a guest uses on its delivery stream.
+
+    A per-guest stream has a single reader, so the shared guest group is
+    enough. A shard stream is read by every guest hashed to it, and each of
+    them needs every entry, so each guest gets a group of its own.
+    """
+    if Config.GUEST_STREAM_SHARDS:
+        return f"{Config.GUEST_GROUP}:{guest_id}"
+    return Config.GUEST_GROUP
+
+
+def delivery_pattern() -> str:
+    """SCAN pattern matching every guest delivery stream"""
+    return f"{Config.GUEST_DELIVERY_PREFIX}:*"
+
+
+def summary_stream(host_id: str) -> str:
+    """Stream that carries event summaries for ``host_id``"""
+    if Config.SUMMARY_PARTITIONS:
+        return f"{Config.SUMMARY_STREAM}:partition:{shard_for(host_id, Config.SUMMARY_PARTITIONS)}"
+    return f"{Config.SUMMARY_STREAM}:host:{host_id}"
+
+
+def summary_group(host_id: str) -> str:
+    """Consumer group a host uses on its summary stream (private in partition mode)"""
+    if Config.SUMMARY_PARTITIONS:
+        return f"{Config.HOST_GROUP}:{host_id}"
+    return Config.HOST_GROUP
+
+
+def summary_pattern() -> str:
+    """SCAN pattern matching every per-host or partitioned summary stream"""
+    return f"{Config.SUMMARY_STREAM}:*"
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to workers.
+
+    Each worker is placed on the ring ``replicas`` times, so keys spread
+    evenly and adding or removing a worker only moves about 1/N of them.
+    """
+
+    def __init__(self, workers: List[str], replicas: int = None):
+        replicas = replicas or Config.HASH_RING_REPLICAS
+        points = sorted(
+            (self._hash(f"{worker}#{replica}"), worker)
+            for worker in workers for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def owner(self, key: str) -> str:
+        """Worker that owns ``key``"""
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._workers[index]
+
+
+def coordinator_name(index: int) -> str:
+    return f"coordinator-{index}"
+
+
+@lru_cache(maxsize=None)
+def coordinator_ring(worker_count: int) -> HashRing:
+    """Ring over the ``worker_count`` coordinator workers"""
+    return HashRing([coordinator_name(index) for index in range(worker_count)])
+
+
+def coordinator_inbox(worker: str) -> str:
+    """Stream of invitations forwarded to their owning worker"""
+    return f"{Config.INVITATION_STREAM}:{worker}"
+
+
+def coordinator_response_stream(worker: str) -> str:
+    """Stream the guests answer on for invitations owned by ``worker``"""
+    return f"{Config.RESPONSE_STREAM}:{worker}"
@@ -1,33 +1,31 @@
 #!/usr/bin/env python3
 
-import subprocess
+import argparse
+import asyncio
 import sys
-import time
-import signal
-import threading
 from redis_client import RedisClient
+from logs import setup_logging
+import runner
 
-def run_component(script_name, component_name):
-    """Run a component and display its output with prefixes"""
-    def output_reader(process, prefix):
-        for line in iter(process.stdout.readline, ''):
-            if line:
-                print(f"[{prefix}] {line.rstrip()}")
-    
-    print(f"🚀 Starting {component_name}...")
-    process = subprocess.Popen([
-        sys.executable, script_name
-    ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-       universal_newlines=True, bufsize=1)
-    
-    # Start thread to read output
-    thread = threading.Thread(target=output_reader, args=(process, component_name))
-    thread.daemon = True
-    thread.start()
-    
-    return process, thread
+async def prepare_redis():
+    """Ping Redis and clean up the streams for a fresh start"""
+    redis_client = RedisClient()
+    try:
+        await redis_client.redis.ping()
+        print("✅ Redis connection successful!")
+        await redis_client.cleanup_streams()  # Clean up for fresh start
+    finally:
+        await redis_client.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Run every component of the Pub/Sub event planning system")
+    runner.add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        runner.parse_units(args.components)
+    except ValueError as e:
+        parser.error(str(e))
+    
     print("🎯 PUB/SUB EVENT PLANNING SYSTEM - MANUAL RUN")
     print("=" * 50)
     print("📋 This will start all components with labeled output")
@@ -37,66 +35,25 @@ def main():
     
     # Check Redis connection
     try:
-        redis_client = RedisClient()
-        redis_client.redis.ping()
-        print("✅ Redis connection successful!")
-        redis_client.cleanup_streams()  # Clean up for fresh start
+        asyncio.run(prepare_redis())
     except Exception as e:
         print(f"❌ Redis connection failed: {e}")
         print("🔧 Please start Redis server and try again")
         sys.exit(1)
     
-    processes = []
-    
-    def signal_handler(signum, frame):
-        print("\n🛑 Shutting down all components...")
-        for process, _ in processes:
-            if process.poll() is None:
-                process.terminate()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    try:
-        # Start Coordinator
-        coord_process, coord_thread = run_component("coordinator.py", "COORDINATOR")
-        processes.append((coord_process, coord_thread))
-        time.sleep(2)
-        
-        # Start Guests
-        guests_process, guests_thread = run_component("event_guest.py", "GUESTS")
-        processes.append((guests_process, guests_thread))
-        time.sleep(3)
-        
-        # Start Host
-        host_process, host_thread = run_component("event_host.py", "HOST")
-        processes.append((host_process, host_thread))
-        
-        print("\n🔄 ALL COMPONENTS RUNNING!")
-        print("=" * 30)
-        print("👀 Watch the labeled output below to see the Pub/Sub flow:")
-        print("   [COORDINATOR] - Message routing and summary generation")
-        print("   [GUESTS] - Guest responses and decision making")
-        print("   [HOST] - Invitation publishing and summary receiving")
-        print("   📡 All communication via Redis Streams")
-        print("=" * 30)
-        print("⏹️  Press Ctrl+C to stop all components")
-        
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
-            # Check if any process has died
-            for process, _ in processes:
-                if process.poll() is not None:
-                    print(f"⚠️  A component has stopped unexpectedly")
-                    break
-    
-    except KeyboardInterrupt:
-        print("\n🛑 Interrupted by user")
-    finally:
-        for process, _ in processes:
-            if process.poll() is None:
-                process.terminate()
+    print("\n🔄 STARTING ALL COMPONENTS...")
+    print("=" * 30)
+    print("👀 Watch the output below to see the Pub/Sub flow:")
+    print("   🎛️  Coordinator - Message routing and summary generation")
+    print("   👥 Guests - Guest responses and decision making")
+    print("   🎯 Host - Invitation publishing and summary receiving")
+    print("   📡 All communication via Redis Streams")
+    print("=" * 30)
+    print("⏹️  Press Ctrl+C to stop all components")
+    
+    # The host publishes once every consumer group exists, and Ctrl+C drains in-flight work
+    setup_logging()
+    sys.exit(runner.launch(args.components, args.processes, args.duration, args.metrics_port))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
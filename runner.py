@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+
+"""Run any mix of components in one event loop, or in a pool of processes.
+
+``run_components.py`` and ``demo.py`` used to start every component as a
+separate interpreter and wait out fixed sleeps while they warmed up. The
+runner instead:
+
+- builds the requested components (e.g. ``coordinator=2 guests host``, see
+  ``parse_units``) and starts them concurrently. A component's ``start()``
+  returns once its consumer groups exist, so when every start has returned
+  the system is ready and the hosts publish their invitations;
+- with ``--processes N``, deals the components round-robin over N processes,
+  each with its own event loop. Every process reports readiness to the
+  parent, which releases the hosts once all of them are ready;
+- on Ctrl+C, SIGTERM or the end of ``--duration``, stops every component.
+  Its listeners finish (and acknowledge) the batch in hand. The runner waits
+  up to ``SHUTDOWN_DRAIN_SECONDS`` for them, then cancels whatever is left
+  and closes the connections.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from config import Config
+from coordinator import Coordinator
+from event_guest import DEMO_GUESTS, EventGuest
+from event_host import EventHost
+from swarm import GuestSwarm
+from logs import get_logger, setup_logging
+from metrics import MESSAGES, REGISTRY, MetricsEndpoint, MetricsRegistry, StreamMonitor, serve_metrics
+
+log = get_logger('runner')
+
+ROLES = ('coordinator', 'guests', 'host', 'swarm')
+DEFAULT_COMPONENTS = ('coordinator', 'guests', 'host')
+SWARM_SHARDS = 16  # shard streams used when a swarm is requested without GUEST_STREAM_SHARDS
+
+
+class Unit(NamedTuple):
+    """One component to build: its role, its position among that role's units and their number"""
+    role: str
+    index: int
+    count: int
+    size: int = 0  # virtual guests, for a swarm
+    worker: int = 0  # copy of the unit in a --workers pool (see worker_shares)
+    guest_list: str = None  # registry list a host invites (None = HOST_GUEST_LIST)
+
+
+def parse_units(specs: Sequence[str]) -> List[Unit]:
+    """Components from specs such as ``coordinator=2``, ``guests``, ``host=3`` or ``swarm=10000``.
+
+    ``coordinator=N`` starts N coordinator workers (default COORDINATOR_WORKERS),
+    ``guests`` the five demo guests, ``host=N`` N hosts that each publish the
+    demo invitation and ``swarm=N`` one swarm of N virtual guests. With a swarm, the
+    hosts invite the swarm's own list (SWARM_GUEST_LIST) rather than the demo guests.
+    """
+    units = []
+    host_list = Config.SWARM_GUEST_LIST if any(spec.partition('=')[0] == 'swarm' for spec in specs) else None
+    for spec in specs:
+        role, _, amount = spec.partition('=')
+        if role not in ROLES:
+            raise ValueError(f"Unknown component '{role}' (choose from {', '.join(ROLES)})")
+        if role == 'coordinator':
+            count = int(amount or Config.COORDINATOR_WORKERS)
+            units += [Unit(role, index, count) for index in range(count)]
+        elif role == 'guests':
+            units += [Unit(role, index, len(DEMO_GUESTS)) for index in range(len(DEMO_GUESTS))]
+        elif role == 'host':
+            count = int(amount or 1)
+            units += [Unit(role, index, count, guest_list=host_list) for index in range(count)]
+        else:
+            units.append(Unit(role, 0, 1, int(amount or 1000)))
+    return units
+
+
+def build(unit: Unit):
+    if unit.role == 'coordinator':
+        return Coordinator(unit.index, unit.count)
+    if unit.role == 'guests':
+        name, guest_id, preferences = DEMO_GUESTS[unit.index]
+        return EventGuest(name, guest_id, preferences, unit.worker)
+    if unit.role == 'host':
+        return EventHost("Sarah Johnson" if unit.count == 1 else f"Host {unit.index + 1}",
+                         guest_list=unit.guest_list)
+    return GuestSwarm(unit.size)
+
+
+class ComponentRunner:
+    """Starts, runs and drains a set of components in the current event loop"""
+
+    def __init__(self, units: Sequence[Unit], drain_seconds: float = None):
+        self.units = list(units)
+        self.drain_seconds = Config.SHUTDOWN_DRAIN_SECONDS if drain_seconds is None else drain_seconds
+        self.components = []
+        self.tasks: List[asyncio.Task] = []
+        self.stopped = asyncio.Event()
+
+    @property
+    def hosts(self) -> List[EventHost]:
+        return [component for component in self.components if isinstance(component, EventHost)]
+
+    def consumer_groups(self) -> List[Tuple[str, str]]:
+        """Every (stream, group) pair the components read, for lag and pending metrics"""
+        return list(dict.fromkeys(pair for component in self.components for pair in component.consumer_groups()))
+
+    async def start(self) -> float:
+        """Build and start every component; returns the seconds taken, once all consumer groups exist"""
+        started = time.perf_counter()
+        self.components = [build(unit) for unit in self.units]
+        await asyncio.gather(*(self._start(component) for component in self.components))
+        self.tasks = [asyncio.create_task(listener)
+                      for component in self.components for listener in component.listeners()]
+        elapsed = time.perf_counter() - started
+        log.info("✅ %d component(s) ready in %.2fs", len(self.components), elapsed)
+        return elapsed
+
+    @staticmethod
+    async def _start(component):
+        await component.start()
+        if isinstance(component, GuestSwarm):
+            await component.register(Config.SWARM_GUEST_LIST)
+
+    async def publish_invitations(self):
+        """Have every host publish the demo invitation"""
+        for host in self.hosts:
+            await host.publish_sample_invitation()
+
+    def stop(self):
+        """Ask ``wait`` to return (safe to call from a signal handler)"""
+        self.stopped.set()
+
+    async def wait(self, duration: float = None, until: Callable[[], bool] = None, poll: float = 0.1):
+        """Until ``stop()`` is called, ``duration`` seconds pass or ``until()`` is true"""
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        while not self.stopped.is_set():
+            if until is not None and until():
+                return
+            timeout = poll if until is not None else None
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                await asyncio.wait_for(self.stopped.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def shutdown(self):
+        """Stop every component, let its listeners drain, then close the connections"""
+        for component in self.components:
+            component.stop()
+        pending = set()
+        if self.tasks:
+            _, pending = await asyncio.wait(self.tasks, timeout=self.drain_seconds)
+        if pending:
+            log.warning("⚠️ %d listener(s) still busy after %.0fs; cancelling them", len(pending), self.drain_seconds)
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await asyncio.gather(*(component.close() for component in self.components), return_exceptions=True)
+        log.info("👋 %d component(s) stopped", len(self.components))
+
+
+async def run(units: Sequence[Unit], duration: float = None, metrics_port: int = None) -> int:
+    """Run ``units`` in this event loop until Ctrl+C, SIGTERM or ``duration`` seconds"""
+    runner = ComponentRunner(units)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, runner.stop)
+    metrics_port = Config.METRICS_PORT if metrics_port is None else metrics_port
+    metrics_endpoint = None
+    try:
+        await runner.start()
+        if metrics_port:
+            metrics_endpoint = MetricsEndpoint(metrics_port, runner.components[0].redis_client,
+                                               runner.consumer_groups())
+            await metrics_endpoint.start()
+        await runner.publish_invitations()
+        log.info("🔄 All components running%s; press Ctrl+C to stop",
+                 f" for {duration:.0f}s" if duration else "")
+        await runner.wait(duration)
+    finally:
+        if metrics_endpoint:
+            await metrics_endpoint.stop()
+        await runner.shutdown()
+    return 0
+
+
+def round_robin(units: Sequence[Unit], processes: int) -> List[List[Unit]]:
+    """Deal ``units`` over ``processes`` processes"""
+    return [share for share in (list(units[offset::processes]) for offset in range(processes)) if share]
+
+
+def worker_shares(specs: Sequence[str], workers: int) -> List[List[Unit]]:
+    """One share per worker process, each running every component in ``specs``.
+
+    Coordinators become worker i of ``workers`` (each owns part of the hash ring);
+    guests keep their IDs and read each guest's group under a per-worker consumer name.
+    """
+    units = parse_units(specs)
+    coordinators = any(unit.role == 'coordinator' for unit in units)
+    shares = []
+    for worker in range(workers):
+        share = [Unit('coordinator', worker, workers)] if coordinators else []
+        share += [unit._replace(worker=worker) for unit in units if unit.role != 'coordinator']
+        shares.append(share)
+    return shares
+
+
+def _process_main(position: int, units: List[Unit], settings: Dict, ready, release, stop, metrics):
+    """Entry point of a pool process: apply the parent's settings and run ``units`` in a new loop"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when to stop
+    for name, value in settings.items():
+        setattr(Config, name, value)
+    setup_logging(prefix=f"{Config.LOG_PREFIX or 'RUNNER'} {position}")
+    asyncio.run(_serve(position, units, ready, release, stop, metrics))
+
+
+async def _report_metrics(position: int, metrics):
+    while True:
+        await asyncio.sleep(Config.METRICS_SAMPLE_SECONDS)
+        metrics.put((position, REGISTRY.export()))
+
+
+async def _serve(position: int, units: List[Unit], ready, release, stop, metrics):
+    runner = ComponentRunner(units)
+    loop = asyncio.get_running_loop()
+    reporters = []
+    try:
+        try:
+            await runner.start()
+        except Exception as e:
+            ready.put((position, str(e)))
+            raise
+        if metrics is not None:
+            # The parent serves the sum of every process's registry
+            monitor = StreamMonitor(runner.components[0].redis_client, runner.consumer_groups())
+            reporters = [asyncio.create_task(monitor.run()), asyncio.create_task(_report_metrics(position, metrics))]
+        ready.put((position, None))
+        # Hosts publish only once every process is ready
+        await loop.run_in_executor(None, release.wait)
+        if not stop.is_set():
+            await runner.publish_invitations()
+        await loop.run_in_executor(None, stop.wait)
+    finally:
+        for task in reporters:
+            task.cancel()
+        await asyncio.gather(*reporters, return_exceptions=True)
+        await runner.shutdown()
+        if metrics is not None:
+            metrics.put((position, REGISTRY.export()))
+
+
+class PoolSupervisor:
+    """Starts one process per share, releases the hosts once all are ready and stops them together"""
+
+    def __init__(self, shares: Sequence[Sequence[Unit]], metrics_port: int = None):
+        self.shares = [list(share) for share in shares if share]
+        self.metrics_port = Config.METRICS_PORT if metrics_port is None else metrics_port
+        # Spawned processes read Config from the environment again, so pass on any overrides
+        settings = {name: value for name, value in vars(Config).items() if name.isupper()}
+        context = multiprocessing.get_context('spawn')
+        self.ready, self.release, self.stop = context.Queue(), context.Event(), context.Event()
+        self.metrics = context.Queue() if self.metrics_port else None
+        self.children = [
+            context.Process(target=_process_main, name=f"runner-{position}",
+                            args=(position, share, settings, self.ready, self.release, self.stop, self.metrics))
+            for position, share in enumerate(self.shares)
+        ]
+        self.interrupted = asyncio.Event()
+        self.joined = asyncio.Event()
+        self.exports: Dict[int, Dict] = {}
+        self.aggregate = MetricsRegistry()
+
+    def dead(self) -> bool:
+        return any(not child.is_alive() for child in self.children)
+
+    async def wait_ready(self) -> bool:
+        loop = asyncio.get_running_loop()
+        waiting = len(self.children)
+        while waiting:
+            if self.interrupted.is_set():
+                return False
+            try:
+                position, error = await loop.run_in_executor(None, self.ready.get, True, 0.5)
+            except queue.Empty:
+                if self.dead():
+                    log.error("❌ A runner process exited during startup")
+                    return False
+                continue
+            if error:
+                log.error("❌ Runner process %d failed to start: %s", position, error)
+                return False
+            waiting -= 1
+        return True
+
+    async def watch(self, duration: float = None):
+        """Until Ctrl+C, SIGTERM, ``duration`` seconds or a process exiting on its own"""
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+        while not self.interrupted.is_set():
+            if deadline is not None and loop.time() >= deadline:
+                return
+            if self.dead():
+                log.warning("⚠️ A runner process exited unexpectedly; stopping the others")
+                return
+            try:
+                await asyncio.wait_for(self.interrupted.wait(), 0.2)
+            except asyncio.TimeoutError:
+                pass
+
+    async def collect_metrics(self):
+        """Keep the aggregate registry up to date until every process has exited"""
+        loop = asyncio.get_running_loop()
+        while not self.joined.is_set():
+            try:
+                position, export = await loop.run_in_executor(None, self.metrics.get, True, 0.5)
+            except queue.Empty:
+                continue
+            self.exports[position] = export
+            self.aggregate.aggregate(self.exports.values())
+        # The final exports, sent after each process drained
+        while True:
+            try:
+                position, export = self.metrics.get_nowait()
+            except queue.Empty:
+                break
+            self.exports[position] = export
+        self.aggregate.aggregate(self.exports.values())
+
+    def join(self):
+        deadline = time.monotonic() + Config.SHUTDOWN_DRAIN_SECONDS + 5
+        for child in self.children:
+            child.join(max(deadline - time.monotonic(), 0))
+        for child in self.children:
+            if child.is_alive():
+                child.terminate()
+                child.join()
+
+    async def run(self, duration: float = None) -> int:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.interrupted.set)
+        started = time.perf_counter()
+        for child in self.children:
+            child.start()
+        collector: Optional[asyncio.Task] = None
+        server = None
+        try:
+            if self.metrics is not None:
+                collector = asyncio.create_task(self.collect_metrics())
+                server = await serve_metrics(self.metrics_port, registry=self.aggregate)
+            if await self.wait_ready():
+                log.info("✅ %d component(s) ready in %d process(es) after %.2fs",
+                         sum(map(len, self.shares)), len(self.children), time.perf_counter() - started)
+                self.release.set()
+                await self.watch(duration)
+        finally:
+            self.stop.set()
+            self.release.set()
+            await loop.run_in_executor(None, self.join)
+            self.joined.set()
+            if collector:
+                await collector
+                log.info("📈 Messages processed by all processes: %s", self.message_totals() or 'none')
+            if server:
+                server.close()
+                await server.wait_closed()
+        return 0 if all(child.exitcode == 0 for child in self.children) else 1
+
+    def message_totals(self) -> str:
+        metric = self.aggregate.metrics.get(MESSAGES.name)
+        if metric is None:
+            return ''
+        return ', '.join(f"{dict(labels)['component']} {dict(labels)['kind']}={child.value:.0f}"
+                         for labels, child in metric.children.items() if child.value)
+
+
+def run_pool(shares: Sequence[Sequence[Unit]], duration: float = None, metrics_port: int = None) -> int:
+    """Run each share of units in its own process and event loop; returns the exit status"""
+    if Config.BROKER_BACKEND in ('memory', 'fakeredis'):
+        log.error("❌ The %s broker lives in one process; use one process or a Redis server", Config.BROKER_BACKEND)
+        return 1
+    return asyncio.run(PoolSupervisor(shares, metrics_port).run(duration))
+
+
+def launch(specs: Sequence[str] = DEFAULT_COMPONENTS, processes: int = 1, duration: float = None,
+           metrics_port: int = None) -> int:
+    """Run the components named by ``specs`` in this process or dealt over ``processes`` processes"""
+    units = parse_units(specs)
+    if any(unit.role == 'swarm' for unit in units) and not Config.GUEST_STREAM_SHARDS:
+        # The swarm reads shard streams; the environment carries the count to pool processes
+        Config.GUEST_STREAM_SHARDS = SWARM_SHARDS
+        os.environ['GUEST_STREAM_SHARDS'] = str(SWARM_SHARDS)
+        log.info("🔀 Swarm requested: routing guests over %d shard streams", SWARM_SHARDS)
+    if processes > 1:
+        return run_pool(round_robin(units, processes), duration, metrics_port)
+    return asyncio.run(run(units, duration, metrics_port))
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('components', nargs='*', default=list(DEFAULT_COMPONENTS),
+                        help="components to run: coordinator[=N], guests, host[=N], swarm=N "
+                             "(default: coordinator guests host)")
+    parser.add_argument('--processes', type=int, default=1,
+                        help='spread the components over this many processes, one event loop each')
+    parser.add_argument('--duration', type=float, default=None, help='stop after this many seconds')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve /metrics for all processes on this port (default: METRICS_PORT, 0 = off)')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Pub/Sub components in one process or a process pool")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        specs = args.components
+        parse_units(specs)
+    except ValueError as e:
+        parser.error(str(e))
+    sys.exit(launch(specs, args.processes, args.duration, args.metrics_port))
@@ -0,0 +1,90 @@
+"""Chunked detail store for the responses of large event summaries.
+
+A summary stream entry used to embed every guest response, so a 50k-guest
+event produced a multi-megabyte entry that the host had to parse in full
+before it could show even the counts. Summaries with more than
+``Config.SUMMARY_INLINE_RESPONSES`` responses are now split:
+
+- the stream entry is a header, a summary with the counts and no embedded
+  responses, plus ``details_key`` / ``detail_chunks`` fields;
+- the responses go to a Redis list at ``details_key``, one element per
+  ``Config.SUMMARY_DETAIL_CHUNK`` responses, and expire after
+  ``Config.SUMMARY_DETAIL_TTL_SECONDS``.
+
+Each list element is a JSON array of responses in the summary's wire codec
+(field dicts or packed values). Hosts read the chunks lazily with LRANGE,
+a few at a time.
+"""
+
+import json
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Sequence
+from config import Config
+from models import PACKED_CODEC, ResponseView, get_codec
+
+
+class SummaryDetails(NamedTuple):
+    key: str
+    chunks: int
+    responses: int
+
+    @classmethod
+    def from_fields(cls, fields: Dict) -> Optional['SummaryDetails']:
+        """Detail reference carried by a summary stream entry, if any"""
+        key = fields.get('details_key')
+        if not key:
+            return None
+        return cls(key, int(fields.get('detail_chunks', 0)), int(fields.get('detail_responses', 0)))
+
+    def to_fields(self) -> Dict[str, str]:
+        return {'details_key': self.key, 'detail_chunks': str(self.chunks), 'detail_responses': str(self.responses)}
+
+
+def details_key(summary_id: str) -> str:
+    return f"{Config.SUMMARY_DETAIL_PREFIX}:{summary_id}"
+
+
+def should_split(responses: Sequence) -> bool:
+    """Whether a summary with these responses keeps them out of its stream entry"""
+    return len(responses) > Config.SUMMARY_INLINE_RESPONSES
+
+
+def encode_chunks(responses: Sequence, codec=None, chunk_size: int = None) -> List[str]:
+    """Responses (models or views) as JSON chunks of ``chunk_size``"""
+    codec = codec or get_codec()
+    chunk_size = chunk_size or Config.SUMMARY_DETAIL_CHUNK
+    if codec is PACKED_CODEC:
+        encoded = [response.to_packed_values() for response in responses]
+    else:
+        encoded = [response.to_field_dict() for response in responses]
+    return [json.dumps(encoded[offset:offset + chunk_size], separators=(',', ':'))
+            for offset in range(0, len(encoded), chunk_size)]
+
+
+def prepare(summary_id: str, responses: Sequence, codec=None):
+    """The detail reference and encoded chunks for a summary's responses"""
+    chunks = encode_chunks(responses, codec)
+    return SummaryDetails(details_key(summary_id), len(chunks), len(responses)), chunks
+
+
+def queue_store(pipe, details: SummaryDetails, chunks: List[str]):
+    """Queue the chunk list and its expiry on a pipeline (e.g. inside the summary's transaction)"""
+    if not chunks:
+        return
+    pipe.rpush(details.key, *chunks)
+    if Config.SUMMARY_DETAIL_TTL_SECONDS:
+        pipe.expire(details.key, Config.SUMMARY_DETAIL_TTL_SECONDS)
+
+
+def decode_chunk(chunk: str) -> List[ResponseView]:
+    return [ResponseView.from_field_dict(item) if isinstance(item, dict) else ResponseView.from_packed_values(item)
+            for item in json.loads(chunk)]
+
+
+async def iter_details(redis, details: SummaryDetails, chunks_per_read: int = 4) -> AsyncIterator[List[ResponseView]]:
+    """Yield the summary's responses one chunk at a time, reading ``chunks_per_read`` chunks per LRANGE"""
+    for start in range(0, details.chunks, chunks_per_read):
+        chunks = await redis.lrange(details.key, start, start + chunks_per_read - 1)
+        if not chunks:
+            return  # expired or deleted
+        for chunk in chunks:
+            yield decode_chunk(chunk)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+"""Guest swarm: many virtual guests answering invitations from one process.
+
+Every ``EventGuest`` has its own Redis client and polling loop, and sleeps
+through its response delay before it reads the next invitation. That is
+fine for a five-guest demo but not for load-testing the coordinator with
+100k invitees. The swarm instead keeps its guests in compact array-backed
+records (``VirtualGuests``). One consumer reads every shard delivery stream
+with a single XREADGROUP and hands each invitation to its target guest. A
+heap scheduler (``ResponseScheduler``) fires the delayed responses and
+publishes those that fall due in the same tick with pipelined XADDs.
+
+The swarm's guests are the registry's synthetic guests
+(``sim_guest_<start>`` ... ``sim_guest_<start + count - 1>``), and it
+registers them in a guest list on startup. Reading shard streams needs
+``GUEST_STREAM_SHARDS`` set to the same value for the coordinator and
+the swarm. Each swarm reads through a consumer group of its own and skips
+entries addressed to other guests, so several swarms with different
+``--start`` offsets can run side by side. Invitations are acknowledged
+once their response is scheduled, so responses still pending when the
+swarm stops are dropped.
+"""
+
+import argparse
+import asyncio
+import heapq
+import math
+import random
+import sys
+import time
+from array import array
+from typing import Awaitable, Callable, List, Optional, Tuple
+from config import Config
+from models import EventInvitation
+from redis_client import RedisClient
+from routing import guest_shard_streams
+from guest_registry import SYNTHETIC_GUEST_PREFIX, create_registry, synthetic_guests
+from event_guest import RESPONSE_MESSAGES
+from response_generator import DEFAULT_WEIGHTS, RESPONSE_KINDS, ResponseSampler, cumulative_weights
+from logs import get_logger, setup_logging
+from metrics import MESSAGES, REGISTRY, STAGE_SECONDS, MetricsEndpoint
+
+log = get_logger('swarm')
+
+DELAY_CURVES = ('uniform', 'exponential', 'lognormal')
+
+DISPATCH_SECONDS = STAGE_SECONDS.labels(component='swarm', stage='dispatch')
+RESPOND_SECONDS = STAGE_SECONDS.labels(component='swarm', stage='respond')
+INVITATIONS = MESSAGES.labels(component='swarm', kind='invitation')
+RESPONSES = MESSAGES.labels(component='swarm', kind='response')
+SCHEDULED = REGISTRY.gauge('pubsub_swarm_scheduled', 'Swarm responses waiting for their delay').labels()
+
+# (due time, guest index, invitation ID, reply stream)
+Scheduled = Tuple[float, int, str, str]
+
+
+def delay_sampler(curve: str, mean: float, rng: random.Random) -> Callable[[], float]:
+    """Response delays (seconds) with the given mean, following an RSVP arrival curve.
+
+    'uniform' spreads answers evenly over ``[0, 2 * mean]``. 'exponential'
+    has most guests answer early with a long tail. 'lognormal' peaks after a
+    short while, with a heavier tail of late answers.
+    """
+    if curve == 'uniform':
+        return lambda: rng.uniform(0, 2 * mean)
+    if curve == 'exponential':
+        return lambda: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if curve == 'lognormal':
+        sigma = 1.0
+        mu = math.log(mean) - sigma * sigma / 2 if mean > 0 else -math.inf
+        return lambda: rng.lognormvariate(mu, sigma) if mean > 0 else 0.0
+    raise ValueError(f"Unknown delay curve '{curve}' (expected one of {', '.join(DELAY_CURVES)})")
+
+
+class VirtualGuests:
+    """Compact records for the synthetic guests ``start`` ... ``start + count - 1``.
+
+    Each guest costs five bytes: its usual response delay (float32) and its
+    likely response (an index into ``RESPONSE_KINDS``). IDs and names are
+    derived from the index rather than stored.
+    """
+
+    __slots__ = ('start', 'count', 'delays', 'likely', 'weights', 'rng')
+
+    def __init__(self, count: int, start: int = 0, curve: str = 'exponential', mean_delay: float = 3.0,
+                 rng: random.Random = None):
+        self.start = start
+        self.count = count
+        self.rng = rng or random.Random()
+        draw = delay_sampler(curve, mean_delay, self.rng)
+        self.delays = array('f', (draw() for _ in range(count)))
+        self.likely = array('B', self.rng.choices(range(len(RESPONSE_KINDS)), DEFAULT_WEIGHTS, k=count))
+        self.weights = cumulative_weights(DEFAULT_WEIGHTS)  # shared by every guest
+
+    def index_of(self, guest_id: str) -> Optional[int]:
+        """Index of ``guest_id`` in this swarm, or None if it is not one of its guests"""
+        if not guest_id.startswith(SYNTHETIC_GUEST_PREFIX):
+            return None
+        try:
+            index = int(guest_id[len(SYNTHETIC_GUEST_PREFIX):]) - self.start
+        except ValueError:
+            return None
+        return index if 0 <= index < self.count else None
+
+    def guest_id(self, index: int) -> str:
+        return f"{SYNTHETIC_GUEST_PREFIX}{self.start + index}"
+
+    def guest_name(self, index: int) -> str:
+        return f"Simulated Guest {self.start + index}"
+
+    def delay(self, index: int) -> float:
+        """This guest's usual delay with ±20% jitter, so repeated invitations do not land in lockstep"""
+        return self.delays[index] * self.rng.uniform(0.8, 1.2)
+
+    def respond(self, due: List[Scheduled], sampler: ResponseSampler) -> List[Tuple[str, dict]]:
+        """Wire entries ``(reply stream, response)`` for scheduled responses, drawn in bulk"""
+        indexes = [index for _, index, _, _ in due]
+        responses = sampler.redis_dicts(
+            [invitation_id for _, _, invitation_id, _ in due],
+            [self.guest_id(index) for index in indexes],
+            [self.guest_name(index) for index in indexes],
+            [self.likely[index] for index in indexes],
+            [self.weights]
+        )
+        return [(reply_stream, response) for (_, _, _, reply_stream), response in zip(due, responses)]
+
+
+class ResponseScheduler:
+    """Min-heap of responses keyed by due time (event loop clock).
+
+    ``run`` sleeps until the earliest entry is due, then hands every entry
+    due within the next ``tick`` seconds (up to ``batch_size``) to ``send``
+    in one call, so responses that arrive close together share a pipeline.
+    """
+
+    def __init__(self, send: Callable[[List[Scheduled]], Awaitable[None]], tick: float = None,
+                 batch_size: int = None):
+        self.send = send
+        self.tick = Config.SWARM_TICK_MS / 1000 if tick is None else tick
+        self.batch_size = batch_size or Config.PUBLISH_CHUNK_SIZE
+        self.heap: List[Scheduled] = []
+        self.wake = asyncio.Event()
+        self.running = True
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def schedule(self, due: float, guest_index: int, invitation_id: str, reply_stream: str):
+        heapq.heappush(self.heap, (due, guest_index, invitation_id, reply_stream))
+        if self.heap[0][0] == due:
+            self.wake.set()  # new earliest entry; the run loop may be sleeping past it
+
+    def pop_due(self, now: float) -> List[Scheduled]:
+        horizon = now + self.tick
+        due = []
+        while self.heap and self.heap[0][0] <= horizon and len(due) < self.batch_size:
+            due.append(heapq.heappop(self.heap))
+        return due
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            timeout = self.heap[0][0] - loop.time() if self.heap else None
+            if timeout is None or timeout > 0:
+                self.wake.clear()
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            due = self.pop_due(loop.time())
+            SCHEDULED.set(len(self.heap))
+            try:
+                await self.send(due)
+            except Exception as e:
+                log.error("❌ Error sending %d swarm response(s): %s", len(due), e)
+                await asyncio.sleep(1)
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+
+class GuestSwarm:
+    def __init__(self, count: int, start: int = 0, curve: str = 'exponential', mean_delay: float = 3.0,
+                 seed: int = None):
+        self.redis_client = RedisClient()
+        self.guests = VirtualGuests(count, start, curve, mean_delay, random.Random(seed))
+        self.sampler = ResponseSampler(RESPONSE_MESSAGES, seed)
+        self.scheduler = ResponseScheduler(self.send_responses)
+        self.streams = guest_shard_streams()
+        # A group per swarm: each one sees every entry and answers for its own guests
+        self.group = f"{Config.SWARM_GROUP}:{start}"
+        self.consumer = f"swarm_{start}"
+        self.running = True
+        self.received = 0
+        self.sent = 0
+
+    async def start(self):
+        """Connect to Redis and create the swarm's group on every shard stream"""
+        if not self.streams:
+            raise RuntimeError("The guest swarm reads shard streams; set GUEST_STREAM_SHARDS (same value as the coordinator)")
+        await self.redis_client.connect()
+        # Start at the end of each shard so earlier invitations are not answered
+        await asyncio.gather(*(self.redis_client.create_consumer_group(stream, self.group, '$')
+                               for stream in self.streams))
+        log.info("🐝 Swarm of %d virtual guests (%s%d...%d) reading %d shard streams",
+                 self.guests.count, SYNTHETIC_GUEST_PREFIX, self.guests.start,
+                 self.guests.start + self.guests.count - 1, len(self.streams))
+
+    async def register(self, list_id: str):
+        """Add the swarm's guests to a registry list so the coordinator invites them"""
+        registry = create_registry(self.redis_client)
+        added = await registry.add_guests(list_id, synthetic_guests(self.guests.count, self.guests.start))
+        log.info("📇 Registered %d swarm guests in list '%s' (%d new)",
+                 self.guests.count, list_id, added)
+
+    async def listen_for_invitations(self):
+        """Read every shard with one XREADGROUP and schedule a response per invitation"""
+        loop = asyncio.get_running_loop()
+        guests = self.guests
+        while self.running:
+            try:
+                messages = await self.redis_client.consume_streams(
+                    self.streams, self.group, self.consumer,
+                    count=Config.CONSUMER_BATCH_SIZE, block=Config.CONSUMER_BLOCK_MS
+                )
+                for stream, stream_messages in messages:
+                    processed = []
+                    try:
+                        started = time.perf_counter()
+                        now = loop.time()
+                        for message_id, fields in stream_messages:
+                            processed.append(message_id)
+                            index = guests.index_of(fields.get('target_guest_id', ''))
+                            if index is None:
+                                continue  # another swarm's or a real guest's invitation
+                            invitation = EventInvitation.from_trusted_dict(fields)
+                            reply_stream = fields.get('reply_stream') or Config.RESPONSE_STREAM
+                            self.scheduler.schedule(now + guests.delay(index), index,
+                                                    sys.intern(invitation.id), sys.intern(reply_stream))
+                            self.received += 1
+                            INVITATIONS.inc()
+                        DISPATCH_SECONDS.observe(time.perf_counter() - started)
+                        SCHEDULED.set(len(self.scheduler))
+                    finally:
+                        await self.redis_client.acknowledge_messages(stream, self.group, processed)
+            except Exception as e:
+                if self.running:
+                    log.error("❌ Error reading invitations for the swarm: %s", e)
+                await asyncio.sleep(1)
+
+    async def send_responses(self, due: List[Scheduled]):
+        started = time.perf_counter()
+        await self.redis_client.publish_batch(self.guests.respond(due, self.sampler))
+        RESPOND_SECONDS.observe(time.perf_counter() - started)
+        RESPONSES.inc(len(due))
+        self.sent += len(due)
+
+    async def report(self, interval: float):
+        while self.running:
+            await asyncio.sleep(interval)
+            log.info("🐝 Invitations received: %d | responses sent: %d | waiting: %d",
+                     self.received, self.sent, len(self.scheduler))
+
+    def listeners(self):
+        """The coroutines that run the swarm once it has started"""
+        return [self.listen_for_invitations(), self.scheduler.run()]
+
+    def consumer_groups(self):
+        """The (stream, group) pairs the swarm reads, for lag and pending metrics"""
+        return [(stream, self.group) for stream in self.streams]
+
+    def stop(self):
+        self.running = False
+        self.scheduler.stop()
+        log.info("\n🛑 Swarm stopping (%d scheduled response(s) dropped)", len(self.scheduler))
+
+    async def close(self):
+        await self.redis_client.close()
+
+
+async def main(args):
+    if args.shards is not None:
+        Config.GUEST_STREAM_SHARDS = args.shards
+    swarm = GuestSwarm(args.guests, args.start, args.curve, args.mean_delay, args.seed)
+    try:
+        await swarm.start()
+    except RuntimeError as e:
+        log.error("❌ %s", e)
+        await swarm.close()
+        return 1
+    if args.list:
+        await swarm.register(args.list)
+
+    tasks = [asyncio.create_task(listener) for listener in swarm.listeners()]
+    if args.report_seconds:
+        tasks.append(asyncio.create_task(swarm.report(args.report_seconds)))
+
+    metrics_port = Config.METRICS_PORT if args.metrics_port is None else args.metrics_port
+    metrics_endpoint = None
+    if metrics_port:
+        metrics_endpoint = MetricsEndpoint(metrics_port, swarm.redis_client, swarm.consumer_groups())
+        await metrics_endpoint.start()
+
+    try:
+        log.info("🐝 Swarm is listening for invitations...")
+        await asyncio.gather(*tasks)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        swarm.stop()
+        if metrics_endpoint:
+            await metrics_endpoint.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await swarm.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Many virtual guests answering invitations from one process")
+    parser.add_argument('--guests', type=int, default=1000, help='number of virtual guests')
+    parser.add_argument('--start', type=int, default=0, help='number of the first synthetic guest')
+    parser.add_argument('--list', default=Config.SWARM_GUEST_LIST,
+                        help="registry list to add the guests to ('' to skip registration; "
+                             "hosts invite it with --guest-list or HOST_GUEST_LIST)")
+    parser.add_argument('--shards', type=int, default=None,
+                        help='shard delivery streams (default: GUEST_STREAM_SHARDS; must match the coordinator)')
+    parser.add_argument('--curve', choices=DELAY_CURVES, default='exponential', help='RSVP arrival curve')
+    parser.add_argument('--mean-delay', type=float, default=3.0, help='mean response delay in seconds')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for reproducible runs')
+    parser.add_argument('--report-seconds', type=float, default=5.0, help='progress log interval (0 = off)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve /metrics on this port (default: METRICS_PORT, 0 = off)')
+    args = parser.parse_args()
+
+    setup_logging()
+    log.info("🐝 STARTING GUEST SWARM - PUB/SUB LOAD GENERATOR")
+    log.info("=" * 50)
+    try:
+        sys.exit(asyncio.run(main(args)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,108 @@
+"""Many EventHosts in one process on the in-memory broker: every host gets its own summary and nothing else."""
+
+import asyncio
+import uuid
+
+import pytest
+
+import memory_broker
+import redis_client
+from benchmarks.many_hosts import RecordingHost, sample_summary
+from config import Config
+from coordinator import Coordinator
+from event_guest import EventGuest
+from redis_client import RedisClient
+from routing import summary_stream
+
+HOSTS = 1000
+TIMEOUT = 60.0
+
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    """A fresh in-memory broker per test, with no consumer groups remembered from earlier tests"""
+    monkeypatch.setattr(Config, 'BROKER_BACKEND', 'memory')
+    monkeypatch.setattr(memory_broker, '_broker', None)
+    monkeypatch.setattr(redis_client, '_known_groups', {})
+
+
+async def wait_for(predicate, timeout: float = TIMEOUT):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.05)
+    return predicate()
+
+
+def make_hosts(count: int):
+    run_id = uuid.uuid4().hex[:8]
+    return [RecordingHost(f"Host {index}", f"host_{run_id}_{index}") for index in range(count)]
+
+
+async def stop_all(components, tasks):
+    for component in components:
+        component.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for component in components:
+        await component.close()
+
+
+def test_each_host_receives_only_its_own_summary():
+    async def scenario():
+        hosts = make_hosts(HOSTS)
+        for host in hosts:
+            await host.start()
+        tasks = [asyncio.create_task(host.listen_for_summaries()) for host in hosts]
+
+        summaries = {host.host_id: sample_summary(host.host_id) for host in hosts}
+        publisher = RedisClient()
+        await publisher.publish_batch(
+            (summary_stream(host_id), summary.to_redis_dict()) for host_id, summary in summaries.items()
+        )
+        await wait_for(lambda: all(host.received for host in hosts))
+        await asyncio.sleep(0.2)  # give any misrouted summary time to arrive as well
+        await publisher.close()
+        await stop_all(hosts, tasks)
+        return hosts, summaries
+
+    hosts, summaries = asyncio.run(scenario())
+    for host in hosts:
+        assert [summary.id for summary in host.received] == [summaries[host.host_id].id], host.host_id
+
+
+def test_many_hosts_through_the_coordinator():
+    async def scenario():
+        coordinator = Coordinator()
+        await coordinator.start()
+        guests = [EventGuest(f"Guest {index}", f"guest_{index}", {'response_delay': 0})
+                  for index in range(1, 6)]
+        for guest in guests:
+            await guest.start()
+        hosts = make_hosts(HOSTS)
+        for host in hosts:
+            await host.start()
+
+        tasks = [asyncio.create_task(coordinator.listen_for_invitations()),
+                 asyncio.create_task(coordinator.listen_for_responses())]
+        tasks += [asyncio.create_task(guest.listen_for_invitations()) for guest in guests]
+        tasks += [asyncio.create_task(host.listen_for_summaries()) for host in hosts]
+
+        invitations = {}
+        for host in hosts:
+            invitation = host.create_invitation(f"Event of {host.host_name}", "2025-02-15", "14:00", "Room A", "Test")
+            invitations[host.host_id] = invitation.id
+            await host.publish_invitation(invitation)
+
+        await wait_for(lambda: all(host.received for host in hosts))
+        await asyncio.sleep(0.2)
+        await stop_all([coordinator, *guests, *hosts], tasks)
+        return hosts, invitations, len(guests)
+
+    hosts, invitations, guest_count = asyncio.run(scenario())
+    for host in hosts:
+        assert len(host.received) == 1, host.host_id
+        summary = host.received[0]
+        assert summary.host_id == host.host_id
+        assert summary.invitation_id == invitations[host.host_id]
+        assert summary.total_responses == guest_count